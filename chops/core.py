@@ -3,58 +3,80 @@ import os
 import pprint
 from shutil import copyfile
 import sys
+import threading
+import time
 from typing import Dict, List
 
-from invoke import Collection, Program, task
+from invoke import Argument, Call, Collection, Program, task
+from invoke.parser import ParseError, Parser
 import yaml
 
-from chops.settings_loader import load_chops_settings
-from chops.store import Store
+from chops.scheduler import ChopsExecutor, TaskGraph
+from chops.settings_loader import SettingsSnapshot, load_chops_settings, load_settings_snapshot
+from chops.store import BaseStore, create_store
+from chops.task_manifest import TaskManifest, get_fingerprint
 from chops import utils
 
 
+# Core arguments which only inspect tasks and never execute them (`--list`, `--help`, etc.)
+TASK_INSPECTION_ARGS = ['list', 'help', 'complete', 'print-completion-script']
+
+
 class MissingPluginDependencyError(RuntimeError):
     pass
 
 
+class CyclicPluginDependencyError(RuntimeError):
+    pass
+
+
 class IncompletePluginConfigError(RuntimeError):
     pass
 
 
 class ChopsApplication(object):
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, argv=None):
         self.version: str = utils.version()
+        self.settings_snapshot: SettingsSnapshot = load_settings_snapshot()
         self.config: dict = self.load_config()
+        self.argv: List[str] = sys.argv if argv is None else argv
+        # Maximum number of concurrently running tasks, set from the `--jobs` core flag
+        self.jobs: int = 1
+        # Whether persistent caches could be read, unset by the `--no-cache` core flag
+        self.use_cache: bool = True
 
         if logger is None:
             logger = utils.get_logger(self.config['project_name'])
         self.logger = logger
         self.pp = pprint.PrettyPrinter(indent=2, width=240, compact=True)
 
-        self.store = Store(
-            os.path.join(self.config['project_path'], utils.CHOPS_STORE_FILE),
-            self.logger
-        )
+        self.store: BaseStore = create_store(self.config, self.logger, self)
         self.init_store()
 
         self.update_import_paths()
+        self.prepare_paths()
 
-        self.plugins: Dict[Plugin] = {}
-        self.load_plugins()
+        self.plugins: Dict[LazyPlugin] = {}
         self.ns: Collection = self.get_root_namespace()
+        self.program = ChopsProgram(self, namespace=self.ns, version=self.version, executor_class=ChopsExecutor)
+        self.task_manifest: TaskManifest = self.get_task_manifest()
+
+        if not self.register_manifest_tasks():
+            self.load_plugins()
+            # Only plugins with invoked tasks are constructed upfront, the rest are constructed on the first use
+            invoked_plugins = self.get_invoked_plugins()
+            self.construct_plugins(invoked_plugins)
+            self.register_plugin_tasks(invoked_plugins)
+            if invoked_plugins is None:
+                self.dump_task_manifest()
 
-        self.register_plugin_tasks()
         self.ns.configure(self.get_context())
-        self.program = Program(namespace=self.ns, version=self.version)
-
-        self.prepare_paths()
 
-    @staticmethod
-    def load_config():
+    def load_config(self):
         config = dict()
 
         # Load chops settings
-        config = load_chops_settings(config)
+        config = load_chops_settings(config, self.settings_snapshot)
 
         return config
 
@@ -74,32 +96,161 @@ class ChopsApplication(object):
         if not self.config['is_initialised']:
             return
 
+        plugins = {}
         for name in self.config['plugins']:
-            plugin = import_plugin(name, self.config, self, self.logger)
-            for dependency in getattr(plugin, 'dependencies', []):
-                if dependency not in self.plugins.keys():
+            plugin = LazyPlugin(import_plugin_class(name), self.config, self, self.logger)
+            plugins[plugin.name] = plugin
+
+        for plugin in plugins.values():
+            for dependency in plugin.dependencies:
+                if dependency not in plugins:
                     raise MissingPluginDependencyError(
                         'Plugin "{name}" requires dependency "{dependency}" '
-                        'to be loaded before its instantiation.'.format(name=plugin.name, dependency=dependency)
+                        'which is not listed in plugins.'.format(name=plugin.name, dependency=dependency)
                     )
-            self.plugins[plugin.name] = plugin
 
-    def register_plugin_tasks(self):
+        try:
+            ordered_names = utils.topological_sort({name: plugin.dependencies for name, plugin in plugins.items()})
+        except ValueError as e:
+            raise CyclicPluginDependencyError(str(e))
+
+        for name in ordered_names:
+            self.plugins[name] = plugins[name]
+
+    def construct_plugins(self, names=None):
+        """
+        Constructs plugins concurrently.
+        Each plugin is constructed as soon as all of its dependencies are constructed.
+        :param names: str[] | None plugins to construct together with their dependencies, defaults to all plugins
+        """
+        required = set(self.plugins if names is None else names)
+        # Plugins are sorted topologically, so dependents are visited before their dependencies
+        for name in reversed(list(self.plugins)):
+            if name in required:
+                required.update(self.plugins[name].dependencies)
+
+        remaining = {
+            name: plugin.dependencies for name, plugin in self.plugins.items()
+            if name in required and not plugin.is_materialised
+        }
+        if not remaining:
+            return
+
+        started = time.time()
+        utils.run_graph(
+            remaining,
+            lambda name: self.plugins[name].materialise(),
+            max_workers=self.config.get('plugin_workers', min(8, len(remaining))),
+        )
+
+        self.logger.debug('Plugins constructed in {:.3f}s: {}'.format(
+            time.time() - started,
+            ', '.join('{}={:.3f}s'.format(name, self.plugins[name].construction_time) for name in remaining),
+        ))
+
+    def register_plugin_tasks(self, names=None):
+        """
+        Adds plugin collections to the root namespace.
+        :param names: str[] | None plugins to register tasks of, defaults to all plugins
+        """
         if not self.config['is_initialised']:
             return
 
-        for plugin in self.plugins.values():
-            plugin.register_tasks(self.ns)
+        for name, plugin in self.plugins.items():
+            if names is None or name in names:
+                plugin.register_tasks(self.ns)
 
-    @classmethod
-    def run_invoke_task(cls, invoke_task, *args, **kwargs):
-        for sub_task in invoke_task.pre:
-            cls.run_invoke_task(sub_task, *args, **kwargs)
+    def get_task_manifest(self):
+        if not self.config['is_initialised']:
+            return None
+
+        return TaskManifest(
+            os.path.join(self.config['build_path'], utils.CHOPS_TASK_MANIFEST_FILE),
+            get_fingerprint(self.config, self.version, self.store.get('installed_plugins', [])),
+            self.logger,
+        )
 
-        invoke_task(*args, **kwargs)
+    def parse_core_args(self):
+        """
+        Parses core arguments of the current invocation, unparsed arguments start with the first task name.
+        :return: ParseResult | None parse result or None if core arguments are invalid
+        """
+        try:
+            return Parser(initial=self.program.initial_context, ignore_unknown=True).parse_argv(self.argv[1:])
+        except ParseError:
+            return None
+
+    def get_invoked_plugins(self):
+        """
+        Returns plugins whose tasks are invoked by the current invocation.
+        :return: str[] | None plugin names or None if tasks of all plugins are required (e.g. to list them)
+        """
+        core = self.parse_core_args()
+        if core is None or not core.unparsed or self.has_inspection_args(core):
+            return None
+
+        names = []
+        for arg in core.unparsed:
+            # Task arguments never start with plugin collection names, unlike task names (e.g. `aws-ecs.deploy`)
+            name = arg.split('.')[0].replace('-', '_')
+            if not arg.startswith('-') and name in self.plugins and name not in names:
+                names.append(name)
+
+        return names
 
-        for sub_task in invoke_task.post:
-            cls.run_invoke_task(sub_task, *args, **kwargs)
+    @staticmethod
+    def has_inspection_args(core):
+        """
+        Returns whether core arguments request to list or describe tasks.
+        :param core: ParseResult parsed core arguments
+        :return: bool whether tasks are inspected
+        """
+        return any(core[0].args[name].value for name in TASK_INSPECTION_ARGS if name in core[0].args)
+
+    def is_task_inspection(self):
+        """
+        Returns whether current invocation only lists or describes tasks,
+        or runs tasks which do not require plugins.
+        Only core arguments (the ones before the first task name) are considered, so task flags like `-h` are not.
+        :return: bool whether plugins are not required
+        """
+        core = self.parse_core_args()
+        if core is None:
+            return False
+        if self.has_inspection_args(core):
+            return True
+
+        task_names = [arg for arg in core.unparsed if not arg.startswith('-')]
+        return all(
+            name in self.ns.tasks and not getattr(self.ns.tasks[name], 'requires_plugins', True)
+            for name in task_names
+        )
+
+    def register_manifest_tasks(self):
+        """
+        Registers plugin tasks from the task manifest if plugins are not required by the current invocation.
+        :return: bool whether tasks were registered from the manifest
+        """
+        if self.task_manifest is None or not self.is_task_inspection():
+            return False
+
+        return self.task_manifest.register_tasks(self.ns)
+
+    def dump_task_manifest(self):
+        if self.task_manifest is None or self.task_manifest.is_fresh():
+            return
+
+        self.task_manifest.dump(self.ns.collections.values())
+
+    def run_invoke_task(self, invoke_task, *args, **kwargs):
+        """
+        Runs task together with its pre- and post-tasks, which receive the same arguments.
+        Each task is executed only once, independent pre-tasks of parallel tasks run concurrently.
+        :param invoke_task: Task task to run
+        """
+        graph = TaskGraph(inherit_arguments=True)
+        graph.add(Call(invoke_task, args=args, kwargs=kwargs))
+        graph.run(lambda call: call.task(*call.args, **call.kwargs), jobs=self.jobs)
 
     def get_tasks(self):
         return {task_path: self.get_task(task_path) for task_path in self.program.collection.task_names}
@@ -110,6 +261,9 @@ class ChopsApplication(object):
             return self.program.collection.tasks[task_path]
         elif len(path_parts) == 2:
             plugin_name, task_name = path_parts
+            if plugin_name not in self.program.collection.collections and plugin_name in self.plugins:
+                # Plugin was not invoked from the command line, so its tasks are registered on demand
+                self.plugins[plugin_name].register_tasks(self.ns)
             return self.program.collection.collections[plugin_name].tasks[task_name]
 
     def run_task(self, task_path, *args, **kwargs):
@@ -140,8 +294,10 @@ class ChopsApplication(object):
         return plugin.name not in self.store.get('installed_plugins')
 
     def install_plugins(self, force_install=False):
-        for plugin in self.plugins.values():
-            plugin.install_and_register(force_install)
+        # Write store once for all plugins
+        with self.store.batch():
+            for plugin in self.plugins.values():
+                plugin.install_and_register(force_install)
 
     @staticmethod
     def get_root_namespace() -> Collection:
@@ -165,7 +321,9 @@ class ChopsApplication(object):
                     project_path=ctx.project_path,
                     project_name=ctx.project_name,
                 ))
-                ctx.pp.pprint({k: v.__dict__ for k, v in ctx.app.plugins.items()})
+                ctx.pp.pprint({k: v.materialise().__dict__ for k, v in ctx.app.plugins.items()})
+                ctx.info('Plugins construction time (seconds):')
+                ctx.pp.pprint({k: v.construction_time for k, v in ctx.app.plugins.items()})
             else:
                 ctx.info('Chops project is not initialised.')
 
@@ -174,6 +332,9 @@ class ChopsApplication(object):
             """Shows chops version."""
             print(ctx.app.version)
 
+        # Mark tasks which are able to run without plugins being loaded
+        version.requires_plugins = False
+
         @task
         def init(ctx):
             """Creates settings file."""
@@ -189,6 +350,8 @@ class ChopsApplication(object):
                     settings_path=settings_path
                 ))
 
+        init.requires_plugins = False
+
         @task
         def install(ctx, force_install=False):
             """Installs chops plugins."""
@@ -205,6 +368,37 @@ class ChopsApplication(object):
         return ns
 
 
+class ChopsProgram(Program):
+    """
+    Invoke program with chops specific core flags.
+    """
+
+    def __init__(self, app: ChopsApplication, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.app = app
+
+    def core_args(self):
+        return super().core_args() + [
+            Argument(
+                names=('jobs', 'j'),
+                kind=int,
+                default=1,
+                help='Maximum number of tasks to run concurrently.',
+            ),
+            Argument(
+                names=('no-cache',),
+                kind=bool,
+                default=False,
+                help='Ignore persistent caches (e.g. AWS inventory) and refresh them.',
+            ),
+        ]
+
+    def execute(self):
+        self.app.jobs = max(1, self.args.jobs.value or 1)
+        self.app.use_cache = not self.args['no-cache'].value
+        super().execute()
+
+
 class Plugin(object):
     name = 'ChopsPlugin'
     dependencies: List[str] = []
@@ -277,7 +471,71 @@ class Plugin(object):
 Plugin.install.skip = True
 
 
-def import_plugin(name: str, config: dict, app: ChopsApplication, logger) -> Plugin:
+class LazyPlugin(object):
+    """
+    Stands for a plugin until it is actually used.
+
+    The plugin is constructed on the first access to any of its attributes.
+    Plugin dependencies are constructed before the plugin itself, so plugins
+    are still able to use `self.app.plugins[...]` in their constructors.
+    """
+
+    def __init__(self, plugin_class, config: dict, app: ChopsApplication, logger=None):
+        self._plugin_class = plugin_class
+        self._config = config
+        self._app = app
+        self._logger = logger
+        self._plugin: Plugin = None
+        self._lock = threading.RLock()
+        self.construction_time: float = None
+
+    @property
+    def name(self):
+        return self._plugin_class.name
+
+    @property
+    def dependencies(self):
+        return getattr(self._plugin_class, 'dependencies', [])
+
+    @property
+    def is_materialised(self):
+        return self._plugin is not None
+
+    def materialise(self) -> Plugin:
+        """
+        Returns plugin instance constructing it (and its dependencies) if necessary.
+        :return: Plugin plugin instance
+        """
+        if self._plugin is None:
+            with self._lock:
+                if self._plugin is None:
+                    for dependency in self.dependencies:
+                        self._app.plugins[dependency].materialise()
+
+                    started = time.time()
+                    self._plugin = self._plugin_class(self._config[self.name], self._app, self._logger)
+                    self.construction_time = time.time() - started
+
+                    self._app.logger.debug('Plugin "{name}" constructed in {time:.3f}s.'.format(
+                        name=self.name, time=self.construction_time,
+                    ))
+
+        return self._plugin
+
+    def __getattr__(self, item):
+        # Private attributes are never delegated, this keeps proxy safe from infinite recursion
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return getattr(self.materialise(), item)
+
+    def __repr__(self):
+        return '<LazyPlugin "{name}" ({state})>'.format(
+            name=self.name,
+            state='materialised' if self.is_materialised else 'pending',
+        )
+
+
+def import_plugin_class(name: str):
     mod = importlib.import_module(name)
-    plugin_class: Plugin = mod.PLUGIN_CLASS
-    return plugin_class(config[plugin_class.name], app, logger)
+    return mod.PLUGIN_CLASS
+
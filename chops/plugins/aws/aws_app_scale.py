@@ -35,20 +35,22 @@ class AwsAppScalePlugin(AwsEnvBoundServicePlugin, AwsEcsPluginMixin):
         ]
 
     def get_ecs_service_targets(self):
-        return self.client.describe_scalable_targets(
+        return list(self.paginate(
+            'describe_scalable_targets', 'ScalableTargets',
             ServiceNamespace='ecs',
             ResourceIds=self.get_ecs_service_resource_ids(),
-        ).get('ScalableTargets')
+        ))
 
     def get_ecs_service_policies_info(self):
         policies = []
 
         for resource_id in self.get_ecs_service_resource_ids():
             policies.extend(
-                self.client.describe_scaling_policies(
+                self.paginate(
+                    'describe_scaling_policies', 'ScalingPolicies',
                     ServiceNamespace='ecs',
                     ResourceId=resource_id,
-                ).get('ScalingPolicies')
+                )
             )
 
         return policies
@@ -58,25 +60,26 @@ class AwsAppScalePlugin(AwsEnvBoundServicePlugin, AwsEcsPluginMixin):
 
         for resource_id in self.get_ecs_service_resource_ids():
             actions.extend(
-                self.client.describe_scheduled_actions(
+                self.paginate(
+                    'describe_scheduled_actions', 'ScheduledActions',
                     ServiceNamespace='ecs',
                     ResourceId=resource_id,
-                ).get('ScheduledActions')
+                )
             )
 
         return actions
 
     def get_all_targets(self, namespace):
-        return self.client.describe_scalable_targets(ServiceNamespace=namespace).get('ScalableTargets')
+        return list(self.paginate('describe_scalable_targets', 'ScalableTargets', ServiceNamespace=namespace))
 
     def get_all_policies(self, namespace):
-        return self.client.describe_scaling_policies(ServiceNamespace=namespace).get('ScalingPolicies')
+        return list(self.paginate('describe_scaling_policies', 'ScalingPolicies', ServiceNamespace=namespace))
 
     def get_all_scheduled_actions(self, namespace):
-        return self.client.describe_scheduled_actions(ServiceNamespace=namespace).get('ScheduledActions')
+        return list(self.paginate('describe_scheduled_actions', 'ScheduledActions', ServiceNamespace=namespace))
 
     def get_all_scaling_activities(self, namespace):
-        return self.client.describe_scaling_activities(ServiceNamespace=namespace).get('ScalingActivities')
+        return list(self.paginate('describe_scaling_activities', 'ScalingActivities', ServiceNamespace=namespace))
 
     def register_ecs_service_target(self, service_name):
         resource_id = self.get_ecs_service_resource_id(service_name)
@@ -217,6 +220,10 @@ class AwsAppScalePlugin(AwsEnvBoundServicePlugin, AwsEcsPluginMixin):
         def describe_all(ctx):
             """Describe all parts of the auto-scaling service"""
 
+        # Descriptions are independent and may be requested concurrently with `--jobs`
+        describe.parallel = True
+        describe_all.parallel = True
+
         return [describe, targets, policies, actions, describe_all, all_policies, all_actions, all_activities]
 
     def get_tasks(self):
@@ -1,6 +1,23 @@
-import boto3
+import copy
+import os
+import threading
 
 import chops.core
+from chops.plugins.aws.aws_inventory import Inventory
+from chops import utils
+
+
+# Defaults for `botocore.config.Config`, could be overridden by the `client_config` key of the plugin config
+DEFAULT_CLIENT_CONFIG = {
+    'max_pool_connections': 32,
+    'retries': {
+        'mode': 'adaptive',
+        'max_attempts': 10,
+    },
+    'tcp_keepalive': True,
+    'connect_timeout': 10,
+    'read_timeout': 60,
+}
 
 
 class AwsPlugin(chops.core.Plugin):
@@ -10,21 +27,107 @@ class AwsPlugin(chops.core.Plugin):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.boto_session = boto3.Session(profile_name=self.config['profile'])
+        self._boto_session = None
+        # Sessions are not thread-safe, so session is used under lock
+        self._boto_session_lock = threading.RLock()
+        self._clients = threading.local()
+        self._client_config = None
+        self._inventory = None
+        self._aws_region = None
+        self._credentials = None
+
+    @property
+    def boto_session(self):
+        """
+        Returns boto3 session for the configured profile.
+        Session (and boto3 itself) is loaded on the first access.
+        :return: boto3.Session AWS session
+        """
+        if self._boto_session is None:
+            with self._boto_session_lock:
+                if self._boto_session is None:
+                    import boto3
+                    self._boto_session = boto3.Session(profile_name=self.config['profile'])
+
+        return self._boto_session
+
+    def get_client_config(self):
+        """
+        Returns botocore client config shared by all clients.
+        :return: botocore.config.Config client config
+        """
+        if self._client_config is None:
+            from botocore.config import Config
+            # Botocore modifies nested options (e.g. `retries`) in place, so they must not be shared with the defaults
+            client_config = utils.deep_merge(DEFAULT_CLIENT_CONFIG, self.config.get('client_config', {}))
+            self._client_config = Config(**copy.deepcopy(client_config))
+        return self._client_config
+
+    def get_client(self, service_name, region_name=None):
+        """
+        Returns client for the specified service and region.
+        Clients are created once per thread and reused, so they keep their connections warm.
+        :param service_name: str AWS service name
+        :param region_name: str | None AWS region or None for the session region
+        :return: botocore.client.BaseClient service client
+        """
+        if not hasattr(self._clients, 'registry'):
+            self._clients.registry = {}
+
+        key = (service_name, region_name or self.get_aws_region())
+        if key not in self._clients.registry:
+            with self._boto_session_lock:
+                self.logger.debug('Creating "{}" client in {} region...'.format(*key))
+                self._clients.registry[key] = self.boto_session.client(
+                    service_name, region_name=key[1], config=self.get_client_config(),
+                )
+
+        return self._clients.registry[key]
+
+    def get_inventory(self):
+        """
+        Returns persistent inventory of discovered resources or None if it is disabled by the `inventory` config key.
+        Stored entries are ignored (and refreshed) if chops is called with the `--no-cache` flag.
+        :return: Inventory | None inventory
+        """
+        if not self.config.get('inventory', True):
+            return None
+
+        if self._inventory is None:
+            with self._boto_session_lock:
+                if self._inventory is None:
+                    self._inventory = Inventory(
+                        os.path.join(self.app.config['build_path'], utils.CHOPS_AWS_INVENTORY_FILE),
+                        ttl=self.config.get('inventory_ttl'),
+                        logger=self.logger,
+                        refresh=not getattr(self.app, 'use_cache', True),
+                    )
+
+        return self._inventory
 
     def get_aws_region(self):
         """
-        Returns AWS region
+        Returns AWS region, it is resolved once under the session lock.
         :return: str AWS region
         """
-        return self.boto_session.region_name
+        if self._aws_region is None:
+            with self._boto_session_lock:
+                if self._aws_region is None:
+                    self._aws_region = self.boto_session.region_name
+
+        return self._aws_region
 
     def get_credentials(self):
         """
         Returns current session credentials (e.g. AWS key ID, secret key et c.).
-        :return: dict session credentials
+        Credentials are resolved once under the session lock, refreshable credentials renew themselves.
+        :return: botocore.credentials.Credentials session credentials
         """
-        return self.boto_session.get_credentials()
+        if self._credentials is None:
+            with self._boto_session_lock:
+                if self._credentials is None:
+                    self._credentials = self.boto_session.get_credentials()
 
+        return self._credentials
 
 PLUGIN_CLASS = AwsPlugin
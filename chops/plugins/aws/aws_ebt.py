@@ -13,11 +13,13 @@ class AwsEbtPlugin(AwsServicePlugin):
     service_name = 'elasticbeanstalk'
     required_keys = ['app_name']
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    @property
+    def s3_client(self):
+        return self.aws_plugin.get_client('s3')
 
-        self.s3_client = self.aws_plugin.boto_session.client('s3')
-        self.iam_client = self.aws_plugin.boto_session.client('iam')
+    @property
+    def iam_client(self):
+        return self.aws_plugin.get_client('iam')
 
     def install(self):
         self.allow_instances_to_pull_from_ecr_repos()
@@ -25,6 +27,9 @@ class AwsEbtPlugin(AwsServicePlugin):
     def envs_from_string(self, value):
         return self.app.plugins['aws_envs'].envs_from_string(value)
 
+    def map_envs(self, func, env=None):
+        return self.app.plugins['aws_envs'].map_envs(func, env)
+
     def create_app_bucket(self, bucket):
         response = self.s3_client.create_bucket(
             ACL='bucket-owner-full-control',
@@ -212,10 +217,10 @@ class AwsEbtPlugin(AwsServicePlugin):
         return version
 
     def get_application_versions(self):
-        response = self.client.describe_application_versions(
-            ApplicationName=self.config['app_name']
-        )
-        return response['ApplicationVersions']
+        return list(self.paginate(
+            'describe_application_versions', 'ApplicationVersions',
+            ApplicationName=self.config['app_name'],
+        ))
 
     def get_latest_app_version(self):
         sorted_versions = self.get_application_versions()
@@ -227,12 +232,10 @@ class AwsEbtPlugin(AwsServicePlugin):
             return None
 
     def get_environments(self) -> dict:
-        response = self.client.describe_environments(
-            ApplicationName=self.config['app_name'],
-        )
         environments = {}
 
-        for env_description in response['Environments']:
+        for env_description in self.paginate(
+                'describe_environments', 'Environments', ApplicationName=self.config['app_name']):
             env_name = env_description['EnvironmentName']
             env = {
                 'description': env_description,
@@ -277,11 +280,13 @@ class AwsEbtPlugin(AwsServicePlugin):
             if version is None:
                 version = self.get_latest_app_version()['VersionLabel']
 
-            for env_name in self.envs_from_string(env):
+            for env_name in sorted(self.envs_from_string(env)):
                 ctx.info('Creating Elastic Beanstalk environment "{env_name}" for "{app_name}" application.'.format(
                     env_name=env_name, app_name=self.config['app_name'],
                 ))
-                self.create_environment(env_name, version)
+
+            for env_name, _ in self.map_envs(lambda env_name: self.create_environment(env_name, version), env):
+                ctx.info('Elastic Beanstalk environment "{}" creation requested.'.format(env_name))
 
         @task
         def describe_versions(ctx):
@@ -39,17 +39,20 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
         Returns project VPC ID
         :return: str VPC ID
         """
-        response = self.client.describe_vpcs(
-            Filters=[
-                {
-                    'Name': 'tag:Name',
-                    'Values': [self.config['vpc_name']],
-                },
-            ]
-        )
-        assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+        def describe():
+            response = self.client.describe_vpcs(
+                Filters=[
+                    {
+                        'Name': 'tag:Name',
+                        'Values': [self.config['vpc_name']],
+                    },
+                ]
+            )
+            assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+
+            return response['Vpcs'][0]['VpcId']
 
-        return response['Vpcs'][0]['VpcId']
+        return self.describe_cache.get(('vpc', self.config['vpc_name']), describe)
 
     def get_security_group_config(self, group_name):
         """
@@ -59,9 +62,23 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
         """
         return self.config['security_groups'][group_name]
 
-    def get_security_group_info(self, group_name=None):
+    def get_security_group_info(self, group_name=None, use_inventory=True):
         """
         Returns security group details or None if group with specified name does not exist.
+        Details are cached until group is created or deleted.
+        :param group_name: str security group short name
+        :param use_inventory: bool whether details could be taken from the persistent inventory
+        :return: dict | None security group info or None
+        """
+        return self.describe_cache.get(
+            ('security_group', self.get_current_env(), group_name),
+            lambda: self.describe_security_group(group_name),
+            use_inventory=use_inventory,
+        )
+
+    def describe_security_group(self, group_name=None):
+        """
+        Requests security group details.
         :param group_name: str security group short name
         :return: dict | None security group info or None
         """
@@ -99,10 +116,11 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
     def security_group_exists(self, group_name):
         """
         Returns whether security group with the specified name exists.
+        Group is always looked up in AWS, since it could be changed elsewhere.
         :param group_name: str group short name
         :return: bool whether group exists or not
         """
-        return self.get_security_group_info(group_name) is not None
+        return self.get_security_group_info(group_name, use_inventory=False) is not None
 
     def create_security_group(self, group_name):
         """
@@ -123,6 +141,7 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
         )
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
         security_group_id = response['GroupId']
+        self.describe_cache.invalidate('security_group', self.get_current_env(), group_name)
 
         self.logger.info(f'Security group "{full_name}" (ID={security_group_id}) created in vpc {vpc_id}.')
 
@@ -164,6 +183,7 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
             GroupId=self.get_security_group_id(group_name),
         )
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+        self.describe_cache.invalidate('security_group', self.get_current_env(), group_name)
 
     def get_availability_zones_info(self):
         """
@@ -204,17 +224,15 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
         Returns subnets details for the current VPC
         :return: dict subnets details
         """
-        response = self.client.describe_subnets(
+        return list(self.paginate(
+            'describe_subnets', 'Subnets',
             Filters=[
                 {
                     'Name': 'vpc-id',
                     'Values': [self.get_vpc_id()]
                 }
             ]
-        )
-        assert response['ResponseMetadata']['HTTPStatusCode'] == 200
-
-        return response['Subnets']
+        ))
 
     def get_availability_zones_subnets(self):
         """
@@ -237,7 +255,16 @@ class AwsEc2Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
         Returns subnet IDs for default subnets of enabled availability zones.
         :return: str[] subnet ids
         """
-        return [subnet['SubnetId'] for subnet in self.get_availability_zones_subnets().values()]
+        return self.describe_cache.get(
+            ('subnets', self.config['vpc_name'], ''.join(self.config['availability_zone_azs'])),
+            lambda: [subnet['SubnetId'] for subnet in self.get_availability_zones_subnets().values()],
+        )
+
+    def prefetch(self):
+        self.get_vpc_id()
+        self.get_subnet_ids()
+        for group_name in self.get_security_group_names():
+            self.get_security_group_info(group_name)
 
     def get_tasks(self):
         @task
@@ -322,7 +349,7 @@ class AwsEc2PluginMixin:
 
     @property
     def ec2_client(self):
-        return self.app.plugins['aws_ec2'].client
+        return self.app.plugins['aws'].get_client('ec2')
 
 
 PLUGIN_CLASS = AwsEc2Plugin
@@ -44,9 +44,10 @@ class AwsEc2ScalePlugin(AwsEnvBoundServicePlugin, AwsEcsPluginMixin):
         Returns ECS autoscaling groups details for the current environment cluster.
         :return: dit[] autoscaling groups info
         """
-        return self.client.describe_auto_scaling_groups(
-            AutoScalingGroupNames=self.get_ecs_autoscaling_groups_names()
-        ).get('AutoScalingGroups')
+        return list(self.paginate(
+            'describe_auto_scaling_groups', 'AutoScalingGroups',
+            AutoScalingGroupNames=self.get_ecs_autoscaling_groups_names(),
+        ))
 
     def get_ecs_group_policies_info(self, group_name):
         """
@@ -54,9 +55,10 @@ class AwsEc2ScalePlugin(AwsEnvBoundServicePlugin, AwsEcsPluginMixin):
         :param group_name: str autoscaling group name
         :return: dit[] autoscaling groups info
         """
-        return self.client.describe_policies(
+        return list(self.paginate(
+            'describe_policies', 'ScalingPolicies',
             AutoScalingGroupName=group_name,
-        ).get('ScalingPolicies')
+        ))
 
     def put_scaling_policy(self, group_name, policy_name):
         """
@@ -144,6 +146,8 @@ class AwsEc2ScalePlugin(AwsEnvBoundServicePlugin, AwsEcsPluginMixin):
         def describe(ctx):
             """Describes the current environment."""
 
+        describe.parallel = True
+
         return [describe, scale, groups, policies, put_policies, delete_policies, update_groups]
 
 
@@ -1,8 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import sys
+import threading
+import time
+
+from botocore.exceptions import ClientError
 from invoke import task
 from invoke.exceptions import UnexpectedExit
 
 from chops.plugins.aws.aws_service_plugin import AwsServicePlugin
 from chops.plugins.docker import DockerPluginMixin
+from chops import utils
+
+
+# Default number of images processed concurrently by `tag`, `push` and `pull`,
+# could be overridden by the `parallel` config key
+DEFAULT_IMAGES_PARALLEL = 4
+# Manifests which refer to the image config, its digest is equal to the local image ID
+MANIFEST_MEDIA_TYPES = [
+    'application/vnd.docker.distribution.manifest.v2+json',
+    'application/vnd.oci.image.manifest.v1+json',
+]
+
+
+class ImageOperationError(RuntimeError):
+    pass
 
 
 class AwsEcrPlugin(AwsServicePlugin, DockerPluginMixin):
@@ -36,19 +58,22 @@ class AwsEcrPlugin(AwsServicePlugin, DockerPluginMixin):
     def describe_repositories(self):
         """
         Returns repository descriptions.
+        Descriptions are cached until repositories are created.
         :return: dict[] repository details
         """
         repository_names = [self.get_service_repo_name(service_name)
                             for service_name in self.config['services']]
 
-        response = self.client.describe_repositories(
-            repositoryNames=repository_names
-        )
+        def describe():
+            repositories = {}
+            for repo_entry in self.paginate('describe_repositories', 'repositories', repositoryNames=repository_names):
+                repositories[repo_entry['repositoryName']] = repo_entry
+            return repositories
 
-        repositories = {}
-        for repo_entry in response.get('repositories', []):
-            repositories[repo_entry['repositoryName']] = repo_entry
-        return repositories
+        return self.describe_cache.get(('repositories', ','.join(repository_names)), describe)
+
+    def prefetch(self):
+        self.describe_repositories()
 
     def get_service_image_uri(self, service_name, docker_tag=None):
         """
@@ -63,6 +88,211 @@ class AwsEcrPlugin(AwsServicePlugin, DockerPluginMixin):
             tag=docker_tag or self.get_docker_tag(),
         )
 
+    def get_images(self):
+        """
+        Returns images of all services: one for the current docker tag and one for the `latest` tag.
+        :return: (str, str)[] list of service short names and image names
+        """
+        repositories = self.describe_repositories()
+
+        return [
+            (service_name, '{uri}:{tag}'.format(
+                uri=repositories[self.get_service_path(service_name)]['repositoryUri'], tag=docker_tag,
+            ))
+            for service_name in self.config['services']
+            for docker_tag in [self.get_docker_tag(), 'latest']
+        ]
+
+    def process_images(self, ctx, action, parallel=None, images=None):
+        """
+        Applies action to images of all services concurrently.
+        Output of commands is prefixed with the service name and tag of the image.
+        :param ctx: Context invoke context
+        :param action: callable function which accepts service short name, image name and
+                       `run` function (`ctx.run` which prefixes output), processes the image
+                       and returns `True` if image is skipped since it is up to date
+        :param parallel: int | None maximum number of images processed at once, defaults to the `parallel` config key
+        :param images: (str, str)[] | None service short names and images to process, defaults to all images
+        :return: dict reports with `service`, `duration`, `bytes` (image size), `skipped` and `error` by images
+        """
+        images = self.get_images() if images is None else images
+        parallel = parallel or self.config.get('parallel', DEFAULT_IMAGES_PARALLEL)
+        output_lock = threading.Lock()
+        prefixes = {image: '[{}:{}] '.format(service_name, image.rsplit(':', 1)[1]) for service_name, image in images}
+        width = max((len(prefix) for prefix in prefixes.values()), default=0)
+
+        def process(service_name, image):
+            stream = utils.PrefixedStream(sys.stdout, prefixes[image].ljust(width), output_lock)
+
+            def run(command, **kwargs):
+                return ctx.run(command, out_stream=stream, err_stream=stream, in_stream=False, **kwargs)
+
+            report = {'service': service_name, 'duration': None, 'bytes': None, 'skipped': False, 'error': None}
+            started = time.monotonic()
+            try:
+                report['skipped'] = action(service_name, image, run) is True
+                report['bytes'] = self.get_image_size(ctx, image)
+            except (UnexpectedExit, ClientError) as e:
+                report['error'] = e
+            finally:
+                report['duration'] = time.monotonic() - started
+                stream.close()
+
+            return report
+
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(images)))) as executor:
+            reports = executor.map(lambda args: process(*args), images)
+            return dict(zip([image for _, image in images], reports))
+
+    @staticmethod
+    def get_image_size(ctx, image):
+        """
+        Returns size of the local image.
+        :param ctx: Context invoke context
+        :param image: str image name
+        :return: int | None image size in bytes or None if image is missing
+        """
+        command = 'docker image inspect --format "{{{{.Size}}}}" {}'.format(image)
+        result = ctx.run(command, hide=True, warn=True, in_stream=False)
+        return int(result.stdout.strip()) if result.ok and result.stdout.strip().isdigit() else None
+
+    @staticmethod
+    def get_image_id(ctx, image):
+        """
+        Returns ID (config digest) of the local image.
+        :param ctx: Context invoke context
+        :param image: str image name
+        :return: str | None image ID or None if image is missing
+        """
+        result = ctx.run('docker image inspect --format "{{{{.Id}}}}" {}'.format(image), hide=True, warn=True,
+                         in_stream=False)
+        if not result.ok:
+            return None
+        return result.stdout.strip() or None
+
+    def get_remote_images(self, service_name, tags):
+        """
+        Returns manifests of the service images in the repository, all tags are requested at once.
+        :param service_name: str service short name
+        :param tags: Iterable[str] image tags
+        :return: dict images with `manifest`, `media_type` and `digest` (config digest) by tags (missing are omitted)
+        """
+        response = self.client.batch_get_image(
+            repositoryName=self.get_service_repo_name(service_name),
+            imageIds=[{'imageTag': tag} for tag in tags],
+            acceptedMediaTypes=MANIFEST_MEDIA_TYPES,
+        )
+
+        images = {}
+        for image in response.get('images', []):
+            try:
+                digest = json.loads(image['imageManifest']).get('config', {}).get('digest')
+            except ValueError:
+                digest = None
+            images[image['imageId']['imageTag']] = {
+                'manifest': image['imageManifest'],
+                'media_type': image.get('imageManifestMediaType'),
+                'digest': digest,
+            }
+
+        return images
+
+    def put_image_tag(self, service_name, remote_image, tag):
+        """
+        Tags image in the repository by uploading its manifest, layers are not transferred.
+        :param service_name: str service short name
+        :param remote_image: dict image (see `get_remote_images`)
+        :param tag: str image tag
+        """
+        kwargs = {'imageManifestMediaType': remote_image['media_type']} if remote_image['media_type'] else {}
+        try:
+            self.client.put_image(
+                repositoryName=self.get_service_repo_name(service_name),
+                imageManifest=remote_image['manifest'],
+                imageTag=tag,
+                **kwargs
+            )
+        except ClientError as e:
+            # Tag already refers to this manifest
+            if e.response.get('Error', {}).get('Code') != 'ImageAlreadyExistsException':
+                raise
+
+    def push_service_image(self, ctx, service_name, image, run):
+        """
+        Pushes image unless the repository already has it and points the `latest` tag to it.
+        Images are compared by their config digests (local image IDs), `latest` tag is updated by `put_image`.
+        :param ctx: Context invoke context
+        :param service_name: str service short name
+        :param image: str image name with the current tag
+        :param run: callable function which runs commands
+        :return: bool whether image was already pushed and tagged as `latest`
+        """
+        tag = image.rsplit(':', 1)[1]
+        image_id = self.get_image_id(ctx, image)
+        remote_images = self.get_remote_images(service_name, sorted({tag, 'latest'}))
+
+        def is_pushed(remote_tag):
+            return image_id is not None and remote_images.get(remote_tag, {}).get('digest') == image_id
+
+        is_up_to_date = is_pushed(tag)
+        if is_up_to_date:
+            self.logger.info('Docker image {image} is already pushed to AWS ECR registry.'.format(image=image))
+        else:
+            run(f'docker push {image}')
+
+        if is_pushed('latest'):
+            return is_up_to_date
+
+        # Manifest of the just pushed image is requested again
+        remote_image = remote_images[tag] if is_up_to_date else self.get_remote_images(service_name, [tag]).get(tag)
+        if remote_image is not None and remote_image['digest'] == image_id:
+            self.put_image_tag(service_name, remote_image, 'latest')
+            self.logger.info('Docker image {image} is tagged as latest in AWS ECR registry.'.format(image=image))
+        else:
+            run('docker push {}:latest'.format(image.rsplit(':', 1)[0]))
+
+        return False
+
+    @staticmethod
+    def format_images_summary(reports):
+        """
+        Formats image reports as a table of durations and sizes.
+        :param reports: dict image reports by images (see `process_images`)
+        :return: str summary table
+        """
+        header = ['image', 'duration', 'size', 'status']
+        rows = [
+            [
+                image,
+                '{:.1f}s'.format(report['duration']),
+                '{:.1f} MB'.format(report['bytes'] / 1024 ** 2) if report['bytes'] is not None else '-',
+                'failed' if report['error'] is not None else 'skipped' if report.get('skipped') else 'ok',
+            ]
+            for image, report in reports.items()
+        ]
+
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+        return '\n'.join(
+            '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+            for row in [header] + rows
+        )
+
+    def report_images(self, ctx, reports, operation):
+        """
+        Prints summary of image reports and raises if any image failed.
+        :param ctx: Context invoke context
+        :param reports: dict image reports by images (see `process_images`)
+        :param operation: str operation name for messages
+        """
+        ctx.info('Summary of Docker images {}:'.format(operation))
+        print(self.format_images_summary(reports))
+
+        failed = [image for image, report in reports.items() if report['error'] is not None]
+        if failed:
+            raise ImageOperationError('Failed {operation} of Docker images {images}.'.format(
+                operation=operation, images=', '.join(failed),
+            ))
+
     def get_tasks(self):
         @task
         def create(ctx):
@@ -81,6 +311,7 @@ class AwsEcrPlugin(AwsServicePlugin, DockerPluginMixin):
                         project_name=self.get_aws_project_name()
                     )
                 )
+                self.describe_cache.invalidate('repositories')
                 ctx.pp.pprint(response)
 
         @task
@@ -99,60 +330,51 @@ class AwsEcrPlugin(AwsServicePlugin, DockerPluginMixin):
                     .format(aws_profile=self.get_profile()))
 
         @task
-        def tag(ctx):
-            """Tags Docker images according to AWS ECR registry."""
+        def tag(ctx, parallel=None):
+            """Tags Docker images according to AWS ECR registry, use --parallel to limit concurrent commands."""
             ctx.info('Tag Docker images according to AWS ECR registry.')
 
-            repositories = self.describe_repositories()
-
-            for service_name in self.config['services']:
-                for docker_tag in [self.get_docker_tag(), 'latest']:
-                    service_path = self.get_service_path(service_name)
-                    repo_uri = repositories[service_path]['repositoryUri']
-
-                    ctx.info('Tag Docker "{service_name}" images with "{repo_uri}:{tag}" tag.'.format(
-                        service_name=service_name, repo_uri=repo_uri, tag=docker_tag
-                    ))
+            def tag_image(service_name, image, run):
+                run('docker tag {project_name}_{service_name}:latest {image}'.format(
+                    project_name=self.get_docker_project_name(),
+                    service_name=service_name,
+                    image=image,
+                ))
 
-                    ctx.run('docker tag {project_name}_{service_name}:latest {repo_uri}:{tag}'.format(
-                        project_name=self.get_docker_project_name(),
-                        service_name=service_name,
-                        repo_uri=repo_uri,
-                        tag=docker_tag,
-                    ))
+            self.report_images(ctx, self.process_images(ctx, tag_image, int(parallel) if parallel else None), 'tag')
 
         @task
-        def pull(ctx):
-            """Pulls latest Docker images from the AWS ECR registry."""
+        def pull(ctx, parallel=None):
+            """Pulls latest Docker images from the AWS ECR registry, use --parallel to limit concurrent pulls."""
             ctx.info('Pull latest Docker images from the AWS ECR registry.')
 
-            repositories = self.describe_repositories()
+            def pull_image(service_name, image, run):
+                try:
+                    run(f'docker pull {image}')
+                except UnexpectedExit:
+                    ctx.info(f'Docker image "{image}" is missing in the AWS ECR registry.')
 
-            for service_name in self.config['services']:
-                for docker_tag in [self.get_docker_tag(), 'latest']:
-                    service_path = self.get_service_path(service_name)
-                    repo_uri = repositories[service_path]['repositoryUri']
-
-                    ctx.info(f'Pulling Docker image of "{repo_uri}:{docker_tag}" from the AWS ECR registry.')
-                    try:
-                        ctx.run(f'docker pull {repo_uri}:{docker_tag}')
-                    except UnexpectedExit:
-                        ctx.info(f'Docker image "{repo_uri}:{docker_tag}" is missing in the AWS ECR registry.')
+            self.report_images(ctx, self.process_images(ctx, pull_image, int(parallel) if parallel else None), 'pull')
 
         @task
-        def push(ctx):
-            """Pushes Docker images to AWS ECR registry."""
+        def push(ctx, parallel=None):
+            """
+            Pushes Docker images to AWS ECR registry, images which are already there are skipped.
+            Use --parallel to limit concurrent pushes.
+            """
             ctx.info('Push Docker images to AWS ECR registry.')
 
-            repositories = self.describe_repositories()
+            # The `latest` tag is pushed together with the current one (see `push_service_image`)
+            docker_tag = self.get_docker_tag()
+            images = [(service_name, image) for service_name, image in self.get_images()
+                      if image.rsplit(':', 1)[1] == docker_tag]
 
-            for service_name in self.config['services']:
-                for docker_tag in [self.get_docker_tag(), 'latest']:
-                    service_path = self.get_service_path(service_name)
-                    repo_uri = repositories[service_path]['repositoryUri']
+            def push_image(service_name, image, run):
+                return self.push_service_image(ctx, service_name, image, run)
 
-                    ctx.info(f'Push Docker image of "{repo_uri}:{docker_tag}" to AWS ECR registry.')
-                    ctx.run(f'docker push {repo_uri}:{docker_tag}')
+            reports = self.process_images(ctx, push_image, int(parallel) if parallel else None,
+                                          list(dict.fromkeys(images)))
+            self.report_images(ctx, reports, 'push')
 
         @task(login, tag, push)
         def publish(ctx):
@@ -1,15 +1,53 @@
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
 import time
 
+from botocore.exceptions import ClientError
 from invoke import task
 
 from chops.plugins.aws.aws_env_bound_service_plugin import AwsEnvBoundServicePlugin
 from chops.plugins.aws.aws_ec2 import AwsEc2PluginMixin
 from chops.plugins.aws.aws_ecr import AwsEcrPluginMixin
+from chops.plugins.aws.aws_ecs_revisions import RevisionCache, get_definition_hash, get_immutable_task_definition
 from chops.plugins.aws.aws_elb import AwsElbPluginMixin
 from chops.plugins.aws.aws_logs import AwsLogsPluginMixin
 from chops.plugins.aws.aws_s3 import AwsS3PluginMixin
 from chops.plugins.docker import DockerPluginMixin
+from chops.waiter import Waiter
+from chops import utils
+
+
+# Maximum number of container instances per `describe_container_instances` request
+DESCRIBE_CONTAINER_INSTANCES_LIMIT = 100
+# Number of EC2 instances requested at once by `describe_instances`
+DESCRIBE_INSTANCES_CHUNK_SIZE = 200
+# Maximum number of services per `describe_services` request
+DESCRIBE_SERVICES_LIMIT = 10
+# Number of task definition revisions described concurrently
+DESCRIBE_TASK_DEFS_WORKERS = 8
+# Number of tasks stopped concurrently and attempts to stop each of them when requests are throttled
+STOP_TASKS_WORKERS = 8
+STOP_TASK_ATTEMPTS = 5
+THROTTLING_ERROR_CODES = {'Throttling', 'ThrottlingException', 'TooManyRequestsException', 'RequestLimitExceeded'}
+# Default number of services deployed concurrently, could be overridden by the `parallel` config key
+DEFAULT_DEPLOY_PARALLEL = 4
+# Stages services pass through during deployment, recreated services are deleted, created and started,
+# while rolling deployment updates existing services
+DEPLOY_STAGES = ['delete', 'register', 'create', 'update', 'start']
+DEPLOY_MODES = ['recreate', 'rolling']
+# Could be overridden by the `deployment_configuration` key of the plugin or service config,
+# one extra task is started before an old one is stopped, so services with a single task are rolled too
+DEFAULT_DEPLOYMENT_CONFIGURATION = {
+    'maximumPercent': 200,
+    'minimumHealthyPercent': 100,
+}
+# Tag of registered task definitions which holds the hash of the definition they were registered from
+DEFINITION_HASH_TAG = 'chops:definition-hash'
+
+
+class DeploymentError(RuntimeError):
+    pass
 
 
 class AwsEcsPlugin(AwsEnvBoundServicePlugin,
@@ -21,6 +59,14 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
     service_name = 'ecs'
     required_keys = ['namespace', 'services', 'task_definitions']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._revision_cache = None
+        self._revision_cache_lock = threading.Lock()
+        # Environment setup by (environment, region), it is discovered once per invocation
+        self._aws_env_setup = {}
+        self._aws_env_setup_lock = threading.Lock()
+
     def get_task_def_names(self):
         """
         Returns task definitions short names
@@ -42,19 +88,17 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         :param task_name: str task short name
         :return: dict task definition
         """
-        task_config = deepcopy(self.config['task_definitions'][task_name])
-
-        task_config['containerDefinitions'] = self.process_container_definitions(
-            task_config['__containers__']
-        )
-        del task_config['__containers__']
+        task_config = self.config['task_definitions'][task_name]
 
         if 'family' in task_config:
             raise ValueError(f'Key "family" does not allowed in ECS task definition for Chops.')
 
-        task_config['family'] = self.get_task_definition_name(task_name)
+        # Config is frozen, so task definition is rendered as a new dictionary
+        task_definition = {key: value for key, value in task_config.items() if key != '__containers__'}
+        task_definition['containerDefinitions'] = self.process_container_definitions(task_config['__containers__'])
+        task_definition['family'] = self.get_task_definition_name(task_name)
 
-        return task_config
+        return task_definition
 
     def process_container_definitions(self, containers):
         """
@@ -63,18 +107,26 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         :return: dict[] container definitions
         """
         env = self.get_current_env()
+        definitions = []
+
+        # Environment setup is the same for all containers, so it is discovered once
+        if any('__requires_aws_env_setup__' in container for container in containers.values()):
+            aws_env_setup = self.get_aws_env_setup()
+        else:
+            aws_env_setup = []
 
         for container_name, container in containers.items():
+            definition = {'name': container_name}
+            definition.update(
+                (key, value) for key, value in container.items()
+                if key not in ('__image__', '__requires_aws_env_setup__')
+            )
+
             if 'image' not in container:
-                if '__image__' in container:
-                    image_name = container['__image__']
-                    del container['__image__']
-                else:
-                    image_name = container_name
-                container['image'] = self.get_service_image_uri(image_name)
+                definition['image'] = self.get_service_image_uri(container.get('__image__', container_name))
 
             if 'logConfiguration' not in container:
-                container['logConfiguration'] = {
+                definition['logConfiguration'] = {
                     'logDriver': 'awslogs',
                     'options': {
                         'awslogs-group': self.get_log_group_name(env),
@@ -84,29 +136,57 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
                 }
 
             if '__requires_aws_env_setup__' in container:
-                container['environment'] = container.get('environment', [])
-                container['environment'].extend([
-                    {'name': 'APP_ENV', 'value': env},
-                    {'name': 'AWS_REGION', 'value': self.get_aws_region()},
-                    {'name': 'AWS_ACCESS_KEY_ID', 'value': self.get_credentials().access_key},
-                    {'name': 'AWS_SECRET_ACCESS_KEY', 'value': self.get_credentials().secret_key},
-                    {'name': 'AWS_STORAGE_BUCKET_NAME', 'value': self.get_bucket_name(env)},
-                    {'name': 'PROJECT_NAME', 'value': self.get_aws_project_name()},
-                    {'name': 'ALLOW_HOSTS', 'value': ','.join(self.get_access_hosts())},
-                ])
-                del container['__requires_aws_env_setup__']
-
-        #
-        aws_containers = []
-        for container_name in containers.keys():
-            aws_containers.append({'name': container_name, **containers[container_name]})
-
-        # Finally convert container definitions from dictionary to list format
-        return [{'name': name, **container} for name, container in containers.items()]
+                definition['environment'] = list(container.get('environment', [])) + aws_env_setup
+
+            definitions.append(definition)
+
+        return definitions
+
+    def get_aws_env_setup(self):
+        """
+        Returns environment variables which give containers access to AWS resources of the current environment.
+        Setup is discovered once per environment and region, so all task definitions share it.
+        :return: dict[] environment variables
+        """
+        key = (self.get_current_env(), self.get_aws_region())
+
+        with self._aws_env_setup_lock:
+            if key not in self._aws_env_setup:
+                self._aws_env_setup[key] = self.discover_aws_env_setup(*key)
+
+        return [dict(variable) for variable in self._aws_env_setup[key]]
+
+    def discover_aws_env_setup(self, env, region):
+        """
+        Discovers environment variables which give containers access to AWS resources of the environment.
+        Access hosts and credentials are discovered concurrently.
+        :param env: str environment name
+        :param region: str AWS region
+        :return: dict[] environment variables
+        """
+
+        def get_access_hosts():
+            with self.app.plugins['aws_envs'].using(env):
+                return self.get_access_hosts()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            access_hosts = executor.submit(get_access_hosts)
+            credentials = executor.submit(self.get_credentials)
+            access_hosts, credentials = access_hosts.result(), credentials.result()
+
+        return [
+            {'name': 'APP_ENV', 'value': env},
+            {'name': 'AWS_REGION', 'value': region},
+            {'name': 'AWS_ACCESS_KEY_ID', 'value': credentials.access_key},
+            {'name': 'AWS_SECRET_ACCESS_KEY', 'value': credentials.secret_key},
+            {'name': 'AWS_STORAGE_BUCKET_NAME', 'value': self.get_bucket_name(env)},
+            {'name': 'PROJECT_NAME', 'value': self.get_aws_project_name()},
+            {'name': 'ALLOW_HOSTS', 'value': ','.join(access_hosts)},
+        ]
 
     def get_access_hosts(self):
         """
-        Returns a list of hosts by which the ECS application can be accessed.
+        Returns a sorted list of hosts by which the ECS application can be accessed.
         Includes load balancer DNS and EC2 instance public DNS and IPs.
         :return: str[] list of hosts
         """
@@ -131,7 +211,8 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
                             if key in section:
                                 get_access_hosts.add(section[key])
 
-        return list(get_access_hosts)
+        # Hosts are sorted, so rendered task definitions (and their hashes) do not depend on the set order
+        return sorted(get_access_hosts)
 
     def get_cluster_prefix(self):
         """
@@ -188,8 +269,7 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         Returns existing clusters matching the '<AWS project name>-*' pattern.
         :return: str[] list of cluster ARNs
         """
-        response = self.client.list_clusters()
-        return [cluster for cluster in response.get('clusterArns', [])
+        return [cluster for cluster in self.paginate('list_clusters', 'clusterArns')
                 if ':cluster/' + self.get_cluster_prefix() in cluster]
 
     def get_load_balancers(self, service_name):
@@ -198,15 +278,14 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         :param service_name: str service short name
         :return: dict[] load balancers config
         """
-        balancers = self.get_service_config(service_name).get('load_balancers', [])
-        for balancer in balancers:
+        balancers = []
+        for balancer in self.get_service_config(service_name).get('load_balancers', []):
+            balancer_config = {key: value for key, value in balancer.items() if key != '__target_group__'}
             if 'targetGroupArn' not in balancer:
-                if '__target_group__' in balancer:
-                    target_group_name = balancer['__target_group__']
-                    del balancer['__target_group__']
-                else:
-                    target_group_name = service_name
-                balancer['targetGroupArn'] = self.get_target_group_arn(target_group_name)
+                balancer_config['targetGroupArn'] = self.get_target_group_arn(
+                    balancer.get('__target_group__', service_name)
+                )
+            balancers.append(balancer_config)
         return balancers
 
     def get_service_config(self, service_name):
@@ -225,6 +304,40 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         """
         return self.get_service_config(service_name).get('config', {})
 
+    def get_deployment_configuration(self, service_name):
+        """
+        Returns service deployment configuration (e.g. minimum healthy and maximum percent of running tasks).
+        :param service_name: str service short name
+        :return: dict deployment configuration
+        """
+        return {
+            **DEFAULT_DEPLOYMENT_CONFIGURATION,
+            **self.config.get('deployment_configuration', {}),
+            **self.get_service_config(service_name).get('deployment_configuration', {}),
+        }
+
+    def check_deployment_configuration(self, service_name):
+        """
+        Ensures rolling deployment of the service is able to make progress with its deployment configuration,
+        i.e. at least one task could be started (or stopped) without breaking the configured limits.
+        :param service_name: str service short name
+        :return: dict deployment configuration
+        """
+        configuration = self.get_deployment_configuration(service_name)
+        tasks_count = self.get_tasks_count(service_name)
+        # ECS rounds the maximum down and the minimum up
+        maximum = tasks_count * configuration['maximumPercent'] // 100
+        minimum = -(-tasks_count * configuration['minimumHealthyPercent'] // 100)
+        if tasks_count and maximum - minimum < 1:
+            raise DeploymentError(
+                'Deployment configuration {configuration} of service {service_name} does not allow to replace '
+                'any of its {tasks_count} tasks.'.format(
+                    configuration=configuration,
+                    service_name=self.get_service_name(service_name),
+                    tasks_count=tasks_count,
+                ))
+        return configuration
+
     def get_tasks_count(self, service_name):
         """
         Returns desired tasks count for the specified service.
@@ -236,31 +349,46 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
     def get_container_instances(self, cluster_name):
         """
         Returns cluster container instances details
+        EC2 instances are described in batches, so the number of requests does not grow with each instance.
         :param cluster_name: str cluster name
         :return: dict[] cluster instances details
         """
-        container_instances_list = self.client.list_container_instances(
-            cluster=cluster_name
-        ).get('containerInstanceArns', [])
-
-        if len(container_instances_list) == 0:
-            return []
+        container_instances_arns = self.paginate(
+            'list_container_instances', 'containerInstanceArns', cluster=cluster_name,
+        )
 
-        container_instances = self.client.describe_container_instances(
-            cluster=cluster_name,
-            containerInstances=container_instances_list
-        ).get('containerInstances', [])
+        container_instances = []
+        for arns in utils.chunks(container_instances_arns, DESCRIBE_CONTAINER_INSTANCES_LIMIT):
+            container_instances.extend(self.client.describe_container_instances(
+                cluster=cluster_name,
+                containerInstances=arns
+            ).get('containerInstances', []))
 
+        ec2_instances = self.get_ec2_instances(
+            [instance['ec2InstanceId'] for instance in container_instances if 'ec2InstanceId' in instance]
+        )
         for instance in container_instances:
-            try:
-                instance['ec2_instance'] = self.ec2_client.describe_instances(
-                    InstanceIds=[instance['ec2InstanceId']]
-                )['Reservations'][0]['Instances'][0]
-            except (IndexError, KeyError):
-                pass
+            if instance.get('ec2InstanceId') in ec2_instances:
+                instance['ec2_instance'] = ec2_instances[instance['ec2InstanceId']]
 
         return container_instances
 
+    def get_ec2_instances(self, instance_ids):
+        """
+        Returns EC2 instances details by their IDs.
+        :param instance_ids: str[] EC2 instance IDs
+        :return: dict EC2 instances details by instance ID
+        """
+        instances = {}
+
+        for ids in utils.chunks(sorted(set(instance_ids)), DESCRIBE_INSTANCES_CHUNK_SIZE):
+            reservations = self.paginate('describe_instances', 'Reservations', client=self.ec2_client, InstanceIds=ids)
+            for reservation in reservations:
+                for instance in reservation.get('Instances', []):
+                    instances[instance['InstanceId']] = instance
+
+        return instances
+
     def get_clusters_info(self, clusters):
         """
         Returns descriptions for specified clusters
@@ -279,20 +407,133 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         :param task_name: str task definition short names
         :return: str[] list of task definition ARNs
         """
-        response = self.client.list_task_definitions(familyPrefix=self.get_task_definition_name(task_name))
-        return response.get('taskDefinitionArns', [])
+        return list(self.paginate(
+            'list_task_definitions', 'taskDefinitionArns',
+            familyPrefix=self.get_task_definition_name(task_name),
+        ))
+
+    def get_revision_cache(self):
+        """
+        Returns permanent cache of task definition revisions or None if it is disabled
+        by the `revision_cache` config key.
+        Stored revisions are ignored (and refreshed) if chops is called with the `--no-cache` flag.
+        :return: RevisionCache | None revision cache
+        """
+        if not self.config.get('revision_cache', True):
+            return None
+
+        with self._revision_cache_lock:
+            if self._revision_cache is None:
+                self._revision_cache = RevisionCache(
+                    os.path.join(self.app.config['build_path'], utils.CHOPS_ECS_REVISIONS_DIR),
+                    logger=self.logger,
+                    refresh=not getattr(self.app, 'use_cache', True),
+                )
+
+        return self._revision_cache
+
+    def describe_task_def(self, arn):
+        """
+        Returns description of the task definition revision.
+        Revisions never change, so they are described once and then taken from the revision cache.
+        Description contains only immutable fields: revision status and tags are omitted.
+        :param arn: str task definition ARN
+        :return: dict description with `taskDefinition` and `definition_hash` (see `register_task`) keys
+        """
+        cache = self.get_revision_cache()
+        description = cache.get(arn) if cache is not None else None
+
+        return description if description is not None else self.fetch_task_def(arn)
+
+    def describe_task_defs(self, arns):
+        """
+        Returns descriptions of task definition revisions.
+        Only revisions which are missing in the revision cache are described, concurrently.
+        :param arns: str[] task definition ARNs
+        :return: dict descriptions (see `describe_task_def`) by ARNs in the order of ARNs
+        """
+        cache = self.get_revision_cache()
+        descriptions = {arn: cache.get(arn) if cache is not None else None for arn in arns}
+        missing = [arn for arn, description in descriptions.items() if description is None]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(DESCRIBE_TASK_DEFS_WORKERS, len(missing))) as executor:
+                descriptions.update(zip(missing, executor.map(self.fetch_task_def, missing)))
+
+        return descriptions
+
+    def fetch_task_def(self, arn):
+        """
+        Describes task definition revision and stores it in the revision cache.
+        :param arn: str task definition ARN
+        :return: dict description (see `describe_task_def`)
+        """
+        response = self.client.describe_task_definition(taskDefinition=arn, include=['TAGS'])
+        description = self.make_task_def_description(response['taskDefinition'], response.get('tags', []))
+
+        cache = self.get_revision_cache()
+        if cache is not None:
+            cache.save(arn, description)
+
+        return description
+
+    @staticmethod
+    def make_task_def_description(task_definition, tags):
+        """
+        Returns immutable description of the task definition revision.
+        Hash tag is set once on registration, so it is kept as a part of description.
+        :param task_definition: dict task definition revision as described by ECS
+        :param tags: dict[] revision tags
+        :return: dict description (see `describe_task_def`)
+        """
+        return {
+            'taskDefinition': get_immutable_task_definition(task_definition),
+            'definition_hash': next((tag['value'] for tag in tags if tag['key'] == DEFINITION_HASH_TAG), None),
+        }
 
-    def register_task(self, task_name):
+    def get_latest_task_def_arn(self, task_name):
         """
-        Registers new task definition for the specified default task family short name
+        Returns ARN of the latest active revision of the task definition.
         :param task_name: str task definition short name
-        :return: dict created task definition
+        :return: str | None task definition ARN or None if there are no active revisions
         """
-        response = self.client.register_task_definition(
-            **self.get_task_definition(task_name),
+        family = self.get_task_definition_name(task_name)
+        arns = self.paginate(
+            'list_task_definitions', 'taskDefinitionArns',
+            familyPrefix=family, status='ACTIVE', sort='DESC',
         )
+        # Family prefix matches other families as well, e.g. `app-worker` for `app`
+        return next((arn for arn in arns if arn.rsplit('/', 1)[-1].rsplit(':', 1)[0] == family), None)
+
+    def register_task(self, task_name, force=False):
+        """
+        Registers new task definition for the specified default task family short name.
+        Registration is skipped if the latest active revision was registered from the same definition
+        (definitions are compared by hashes kept in the `DEFINITION_HASH_TAG` tag of revisions).
+        :param task_name: str task definition short name
+        :param force: bool whether to register new revision even if definition is not changed
+        :return: (dict, bool) task definition and whether new revision was registered
+        """
+        definition = self.get_task_definition(task_name)
+        definition_hash = get_definition_hash(definition)
+
+        if not force:
+            latest_arn = self.get_latest_task_def_arn(task_name)
+            if latest_arn is not None:
+                latest = self.describe_task_def(latest_arn)
+                if latest['definition_hash'] == definition_hash:
+                    return latest['taskDefinition'], False
+
+        tags = list(definition.pop('tags', [])) + [{'key': DEFINITION_HASH_TAG, 'value': definition_hash}]
+        response = self.client.register_task_definition(**definition, tags=tags)
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
-        return response['taskDefinition']
+
+        task_def = response['taskDefinition']
+        cache = self.get_revision_cache()
+        if cache is not None:
+            cache.save(task_def['taskDefinitionArn'], self.make_task_def_description(task_def, tags))
+
+        return task_def, True
 
     def create_service(self, service_name):
         """
@@ -306,16 +547,44 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
             serviceName=self.get_service_name(service_name),
             taskDefinition=self.get_service_task_definition_name(service_name),
             desiredCount=0,
-            deploymentConfiguration={
-                'maximumPercent': 100,
-                'minimumHealthyPercent': 50,
-            },
+            deploymentConfiguration=self.get_deployment_configuration(service_name),
             loadBalancers=self.get_load_balancers(service_name),
             **self.get_service_ecs_config(service_name),
         )
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
         return response['service']
 
+    def update_service(self, service_name, task_definition):
+        """
+        Starts rolling deployment of the service with the specified task definition.
+        New deployment is forced, so tasks are replaced (and pull images again) even if task definition is not changed.
+        Desired tasks count is only changed if `tasks_count` is configured for the service, so manual scaling is kept.
+        :param service_name: str service short name
+        :param task_definition: str task definition ARN or family (for the latest active revision)
+        :return: dict service description
+        """
+        kwargs = {}
+        if 'tasks_count' in self.get_service_config(service_name):
+            kwargs['desiredCount'] = self.get_tasks_count(service_name)
+
+        response = self.client.update_service(
+            cluster=self.get_cluster_name(),
+            service=self.get_service_name(service_name),
+            taskDefinition=task_definition,
+            deploymentConfiguration=self.check_deployment_configuration(service_name),
+            forceNewDeployment=True,
+            **kwargs,
+        )
+        assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+
+        self.logger.info(
+            'Service {service_name} at cluster {cluster_name} update to {task_definition} requested.'.format(
+                service_name=self.get_service_name(service_name),
+                cluster_name=self.get_cluster_name(),
+                task_definition=task_definition,
+            ))
+        return response['service']
+
     def set_service_desired_tasks_count(self, service_name, desired_count):
         """
         Sets the number of desired tasks.
@@ -339,31 +608,68 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
 
     def stop_all_service_tasks(self, service_name):
         """
-        Stops all service tasks.
+        Stops all service tasks, tasks are stopped concurrently.
+        Failures are logged and reported instead of raised, since ECS stops tasks of stopped services anyway.
         :param service_name: str service short name
+        :return: dict `stopped` task ARNs and `failed` task errors by ARNs
         """
+        cluster_name = self.get_cluster_name()
         full_service_name = self.get_service_name(service_name)
+        reason = 'Service {} shutdown.'.format(full_service_name)
 
-        # Get tasks list
-        response = self.client.list_tasks(
-            cluster=self.get_cluster_name(),
+        tasks_arns = list(self.paginate(
+            'list_tasks', 'taskArns',
+            cluster=cluster_name,
             serviceName=full_service_name,
-        )
-        assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+        ))
 
-        tasks_arns = response['taskArns']
-        for task_arn in tasks_arns:
-            response = self.client.stop_task(
-                cluster=self.get_cluster_name(),
-                task=task_arn,
-                reason='Service {} shutdown.'.format(full_service_name)
-            )
-            assert response['ResponseMetadata']['HTTPStatusCode'] == 200
-            self.logger.info('Task {arn} stop requested for service {service} at cluster {cluster}.'.format(
-                arn=task_arn,
-                cluster=self.get_cluster_name(),
-                service=full_service_name,
-            ))
+        def stop(task_arn):
+            try:
+                self.stop_task(cluster_name, task_arn, reason)
+            except ClientError as e:
+                return e
+
+        result = {'stopped': [], 'failed': {}}
+        if not tasks_arns:
+            return result
+
+        with ThreadPoolExecutor(max_workers=min(STOP_TASKS_WORKERS, len(tasks_arns))) as executor:
+            for task_arn, error in zip(tasks_arns, executor.map(stop, tasks_arns)):
+                if error is None:
+                    result['stopped'].append(task_arn)
+                else:
+                    self.logger.warning('Unable to stop task {arn} of service {service}: {error}'.format(
+                        arn=task_arn, service=full_service_name, error=error,
+                    ))
+                    result['failed'][task_arn] = error
+
+        self.logger.info('Stop of {stopped} tasks requested for service {service} at cluster {cluster}{failed}.'.format(
+            stopped=len(result['stopped']),
+            service=full_service_name,
+            cluster=cluster_name,
+            failed=', {} failed'.format(len(result['failed'])) if result['failed'] else '',
+        ))
+        return result
+
+    def stop_task(self, cluster_name, task_arn, reason):
+        """
+        Requests task stop, throttled requests are retried with delays of the waiter (see `get_waiter`).
+        :param cluster_name: str cluster full name
+        :param task_arn: str task ARN
+        :param reason: str stop reason
+        """
+        waiter = self.get_waiter()
+        delays = waiter.delays()
+
+        for attempt in range(1, STOP_TASK_ATTEMPTS + 1):
+            try:
+                self.client.stop_task(cluster=cluster_name, task=task_arn, reason=reason)
+                return
+            except ClientError as e:
+                error_code = e.response.get('Error', {}).get('Code')
+                if error_code not in THROTTLING_ERROR_CODES or attempt == STOP_TASK_ATTEMPTS:
+                    raise
+                waiter.sleep(next(delays))
 
     def stop_service(self, service_name):
         """
@@ -380,22 +686,34 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         """
         self.set_service_desired_tasks_count(service_name, self.get_tasks_count(service_name))
 
+    def get_services_info(self, service_names):
+        """
+        Describes specified services requesting up to 10 services at once.
+        :param service_names: str[] services short names
+        :return: dict service descriptions (or None if service does not exist) by short names
+        """
+        full_names = {self.get_service_name(service_name): service_name for service_name in service_names}
+        services_info = {service_name: None for service_name in service_names}
+
+        for names in utils.chunks(full_names, DESCRIBE_SERVICES_LIMIT):
+            services = self.client.describe_services(
+                cluster=self.get_cluster_name(),
+                services=names
+            ).get('services', [])
+
+            for service in services:
+                if service['serviceName'] in full_names:
+                    services_info[full_names[service['serviceName']]] = service
+
+        return services_info
+
     def get_service_info(self, service_name):
         """
         Describes specified service
         :param service_name: str service short name
         :return: dict|None service description or None if service does not exist
         """
-        full_service_name = self.get_service_name(service_name)
-
-        services = self.client.describe_services(
-            cluster=self.get_cluster_name(),
-            services=[full_service_name]
-        ).get('services', [])
-
-        for service in services:
-            if service['serviceName'] == full_service_name:
-                return service
+        return self.get_services_info([service_name])[service_name]
 
     def service_exists(self, service_name):
         """
@@ -416,32 +734,79 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         if service is not None:
             return service['runningCount']
 
-    def await_service_running_count(self, service_name, count, timeout=1, retries=90):
+    def get_waiter(self):
+        """
+        Returns waiter configured by the `waiter` config section (see `chops.waiter.Waiter`).
+        :return: Waiter waiter
+        """
+        return Waiter.from_config(self.config.get('waiter', {}), self.logger)
+
+    def await_services_running_count(self, counts):
+        """
+        Awaits services running counts became equal to the specified values.
+        All services are checked at once, so waiting takes as long as the slowest service needs.
+        :param counts: dict how many running instances we want by service short names
+        :return: dict whether specified running count was reached by service short names
+        """
+        def check(service_names):
+            states = {}
+            for service_name, service in self.get_services_info(service_names).items():
+                if service is None:
+                    states[service_name] = False
+                elif service['runningCount'] == counts[service_name]:
+                    states[service_name] = True
+            return states
+
+        return self.get_waiter().wait(
+            check, counts,
+            description='services at cluster {} to reach desired running count'.format(self.get_cluster_name()),
+        )
+
+    def await_service_running_count(self, service_name, count):
         """
         Awaits service running count became equal to the specified value
         :param service_name: str service short name
         :param count: int how many running instances we want
-        :param timeout: float timeout between retries in seconds
-        :param retries: int number of retries
         :return: bool whether specified running count was reached or not
         """
-        for i in range(retries):
-            current_count = self.get_service_running_count(service_name)
-            if current_count is None:
-                return False
-            elif current_count == count:
-                return True
+        return self.await_services_running_count({service_name: count})[service_name]
 
-            self.logger.info(
-                'Awaiting service {service_name} at cluster {cluster_name} '
-                'to reach {count} running tasks (retries left: {left})...'.format(
-                    service_name=self.get_service_name(service_name),
-                    cluster_name=self.get_cluster_name(),
-                    count=count, left=retries-i,
-                ))
-            time.sleep(timeout)
+    def await_services_steady(self, service_names):
+        """
+        Awaits services deployments to complete, i.e. only the primary deployment is left
+        and it runs the desired number of tasks.
+        :param service_names: str[] services short names
+        :return: dict whether service reached steady state by service short names
+        """
+        def check(names):
+            states = {}
+            for service_name, service in self.get_services_info(names).items():
+                if service is None or service['status'] == 'INACTIVE':
+                    states[service_name] = False
+                    continue
+
+                # Primary deployment could be missing for a while (e.g. service is draining), service is not settled yet
+                primary = next((d for d in service.get('deployments', []) if d['status'] == 'PRIMARY'), None)
+                if primary is None:
+                    continue
+                elif primary.get('rolloutState') == 'FAILED':
+                    states[service_name] = False
+                elif len(service['deployments']) == 1 and primary['runningCount'] == primary['desiredCount']:
+                    states[service_name] = True
+            return states
+
+        return self.get_waiter().wait(
+            check, service_names,
+            description='services at cluster {} to complete deployment'.format(self.get_cluster_name()),
+        )
 
-        return False
+    def await_service_steady(self, service_name):
+        """
+        Awaits service deployment to complete.
+        :param service_name: str service short name
+        :return: bool whether service reached steady state
+        """
+        return self.await_services_steady([service_name])[service_name]
 
     def delete_service(self, service_name, force=False):
         """
@@ -464,28 +829,161 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
             service_name=full_service_name,
         ))
 
-    def await_service_absence(self, service_name, timeout=1, retries=90):
+    def await_services_absence(self, service_names):
+        """
+        Waits until services become absent.
+        :param service_names: str[] services short names
+        :return: dict whether service is finally absent by service short names
+        """
+        def check(names):
+            return {
+                service_name: True
+                for service_name, service in self.get_services_info(names).items()
+                if service is None or service['status'] == 'INACTIVE'
+            }
+
+        return self.get_waiter().wait(
+            check, service_names,
+            description='services at cluster {} to be deleted'.format(self.get_cluster_name()),
+        )
+
+    def await_service_absence(self, service_name):
         """
         Waits until service become absent.
         :param service_name: str service short name
-        :param timeout: int timeout between retries in seconds
-        :param retries: int number of retries
         :return: bool whether service is finally absent
         """
-        for i in range(retries):
-            if not self.service_exists(service_name):
-                return True
+        return self.await_services_absence([service_name])[service_name]
 
-            self.logger.info(
-                'Awaiting service {service_name} at cluster {cluster_name} '
-                'to be deleted (retries left: {left})...'.format(
-                    service_name=self.get_service_name(service_name),
-                    cluster_name=self.get_cluster_name(),
-                    left=retries-i,
-                ))
-            time.sleep(timeout)
+    def redeploy_service(self, service_name, register, timings: dict, mode='recreate'):
+        """
+        Deploys single service.
+
+        In the `recreate` mode old service is deleted, then task definition is registered,
+        new service is created and started. In the `rolling` mode existing service is updated
+        with the new task definition in place, so it keeps serving traffic.
+
+        Durations of stages are recorded even if deployment fails, so the last recorded stage is the failed one.
+        :param service_name: str service short name
+        :param register: callable function which registers task definition by its short name and returns it
+        :param timings: dict durations of stages in seconds by stage names to fill
+        :param mode: str deployment mode, either 'recreate' or 'rolling'
+        """
+        current = {}
+
+        def stage(name):
+            now = time.time()
+            if current:
+                timings[current['name']] = now - current['started']
+            current.update(name=name, started=now)
+
+        try:
+            if mode == 'recreate':
+                stage('delete')
+                if self.service_exists(service_name):
+                    self.stop_service(service_name)
+                    if not self.await_service_running_count(service_name, 0):
+                        raise DeploymentError('Service {} did not stop.'.format(self.get_service_name(service_name)))
+                    self.delete_service(service_name)
+                    if not self.await_service_absence(service_name):
+                        raise DeploymentError('Service {} was not deleted.'.format(self.get_service_name(service_name)))
+
+            stage('register')
+            task_def = register(self.get_service_config(service_name).get('task_definition', service_name))
+
+            if mode == 'rolling' and self.service_exists(service_name):
+                stage('update')
+                self.update_service(service_name, task_def['taskDefinitionArn'])
+                if not self.await_service_steady(service_name):
+                    raise DeploymentError('Service {} deployment did not complete.'.format(
+                        self.get_service_name(service_name),
+                    ))
+                return
+
+            stage('create')
+            self.create_service(service_name)
+
+            stage('start')
+            self.start_service(service_name)
+            if not self.await_service_running_count(service_name, self.get_tasks_count(service_name)):
+                raise DeploymentError('Service {} did not start.'.format(self.get_service_name(service_name)))
+        finally:
+            stage(None)
+
+    def deploy_services(self, parallel=None, mode=None):
+        """
+        Deploys all services concurrently.
+        Each service passes through its stages independently of the others (see `redeploy_service`)
+        and failure of one service does not affect the rest. Task definitions are registered once.
+        :param parallel: int | None maximum number of services deployed at once
+        :param mode: str | None deployment mode (see `redeploy_service`), defaults to the `deploy_mode` config key
+        :return: dict deployment reports with `timings` of stages and `error` (if any) by service short names
+        """
+        app_env = self.get_current_env()
+        service_names = self.get_services_names()
+        parallel = parallel or self.config.get('parallel', DEFAULT_DEPLOY_PARALLEL)
+        mode = mode or self.config.get('deploy_mode', 'recreate')
+        if mode not in DEPLOY_MODES:
+            raise ValueError('Unknown deployment mode "{}", use one of: {}.'.format(mode, ', '.join(DEPLOY_MODES)))
+
+        task_defs = {}
+        locks = {}
+        locks_lock = threading.Lock()
+
+        def register(task_name):
+            with locks_lock:
+                lock = locks.setdefault(task_name, threading.Lock())
+            with lock:
+                if task_name not in task_defs:
+                    task_defs[task_name], is_registered = self.register_task(task_name)
+                    self.logger.info('Tasks definition {family}:{revision} {state}.'.format(
+                        state='registered' if is_registered else 'is not changed', **task_defs[task_name],
+                    ))
+            return task_defs[task_name]
+
+        def deploy(service_name):
+            report = {'timings': {}, 'error': None}
+            with self.app.plugins['aws_envs'].using(app_env):
+                try:
+                    self.redeploy_service(service_name, register, report['timings'], mode)
+                except Exception as e:
+                    self.logger.error('Deployment of service {service} failed: {error}'.format(
+                        service=self.get_service_name(service_name), error=e,
+                    ))
+                    report['error'] = e
+            return report
+
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(service_names)))) as executor:
+            reports = dict(zip(service_names, executor.map(deploy, service_names)))
 
-        return False
+        # Task definitions which are not used by services are still registered
+        for task_name in self.get_task_def_names():
+            register(task_name)
+
+        return reports
+
+    def format_deploy_summary(self, reports):
+        """
+        Formats deployment reports as a table of stage durations.
+        :param reports: dict deployment reports by service short names (see `deploy_services`)
+        :return: str summary table
+        """
+        stages = [stage for stage in DEPLOY_STAGES if any(stage in report['timings'] for report in reports.values())]
+        header = ['service'] + stages + ['total', 'status']
+        rows = []
+        for service_name, report in reports.items():
+            timings = report['timings']
+            rows.append(
+                [self.get_service_name(service_name)] +
+                ['{:.1f}s'.format(timings[stage]) if stage in timings else '-' for stage in stages] +
+                ['{:.1f}s'.format(sum(timings.values())), 'ok' if report['error'] is None else 'failed']
+            )
+
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+        return '\n'.join(
+            '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+            for row in [header] + rows
+        )
 
     def get_tasks(self):
         @task
@@ -502,12 +1000,14 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
 
         @task
         def describe_task_defs(ctx):
-            """Describes task definitions."""
+            """
+            Describes active task definitions.
+            Revisions are cached locally without their status and tags (use --no-cache to describe them again).
+            """
             for task_name in self.get_task_def_names():
-                for arn in self.get_task_def_arns(task_name):
-                    response = self.client.describe_task_definition(taskDefinition=arn)
+                for arn, description in self.describe_task_defs(self.get_task_def_arns(task_name)).items():
                     ctx.info('Task definition of {}:'.format(arn))
-                    ctx.pp.pprint(response['taskDefinition'])
+                    ctx.pp.pprint(description['taskDefinition'])
 
         @task
         def list_hosts(ctx):
@@ -516,16 +1016,25 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
             ctx.pp.pprint(self.get_access_hosts())
 
         @task
-        def register_tasks(ctx):
-            """Registers main task definition."""
+        def register_tasks(ctx, force=False):
+            """
+            Registers task definitions which are changed since their latest revisions.
+            Use --force to register new revisions of all task definitions.
+            """
+            changed = []
             for task_name in self.get_task_def_names():
-                task_def = self.register_task(task_name)
-                ctx.info('Tasks definition {family}:{revision} successfully created for {env} environment.'.format(
+                task_def, is_registered = self.register_task(task_name, force=force)
+                if is_registered:
+                    changed.append(task_def['family'])
+                ctx.info('Tasks definition {family}:{revision} {state} for {env} environment.'.format(
                     family=task_def['family'],
                     revision=task_def['revision'],
+                    state='successfully created' if is_registered else 'is up to date',
                     env=self.get_current_env(),
                 ))
 
+            ctx.info('Changed task definitions: {}.'.format(', '.join(changed) if changed else 'none'))
+
         @task
         def create_services(ctx):
             """Creates services for the latest task definitions"""
@@ -545,17 +1054,16 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
         @task
         def start_services(ctx):
             """Starts the ECS services"""
+            counts = {}
             for service_name in self.get_services_names():
                 self.start_service(service_name)
+                counts[service_name] = self.get_tasks_count(service_name)
                 ctx.info('Requested service {service_name} start at cluster {cluster_name}.'.format(
                     service_name=self.get_service_name(service_name),
                     cluster_name=self.get_cluster_name(),
                 ))
 
-                is_server_started = self.await_service_running_count(
-                    service_name,
-                    self.get_tasks_count(service_name)
-                )
+            for service_name, is_server_started in self.await_services_running_count(counts).items():
                 ctx.info('Service {service_name} at cluster {cluster_name} started: {started}'.format(
                     service_name=self.get_service_name(service_name),
                     cluster_name=self.get_cluster_name(),
@@ -567,51 +1075,74 @@ class AwsEcsPlugin(AwsEnvBoundServicePlugin,
             """Stops the ECS services"""
             for service_name in self.get_services_names():
                 self.stop_service(service_name)
-                ctx.info('Service {} stopped: {}'.format(
-                    self.get_service_name(service_name),
-                    self.await_service_running_count(service_name, 0),
-                ))
+
+            stopped = self.await_services_running_count({service_name: 0 for service_name in self.get_services_names()})
+            for service_name, is_stopped in stopped.items():
+                ctx.info('Service {} stopped: {}'.format(self.get_service_name(service_name), is_stopped))
 
         @task
         def delete_services(ctx, force=False):
             """Deletes the ECS services"""
-            for service_name in self.get_services_names():
+            services_info = self.get_services_info(self.get_services_names())
+            service_names = []
+
+            for service_name, service in services_info.items():
                 service_full_name = self.get_service_name(service_name)
-                if not self.service_exists(service_name):
+                if service is None or service['status'] == 'INACTIVE':
                     ctx.info('Service {service_name} at {cluster_name} does not exist, nothing to delete.'.format(
                         service_name=service_full_name,
                         cluster_name=self.get_cluster_name(),
                     ))
-                    return
+                    continue
 
                 ctx.info('Stopping service {service_name} at {cluster_name}...'.format(
                     service_name=service_full_name,
                     cluster_name=self.get_cluster_name(),
                 ))
                 self.stop_service(service_name)
+                service_names.append(service_name)
 
-                if not force:
-                    service_stopped = self.await_service_running_count(service_name, 0)
+            if not force:
+                stopped = self.await_services_running_count({service_name: 0 for service_name in service_names})
+                for service_name, service_stopped in stopped.items():
                     ctx.info('Service {} stopped: {}'.format(
-                        service_full_name,
+                        self.get_service_name(service_name),
                         service_stopped,
                     ))
 
+            for service_name in service_names:
                 ctx.info('Deliting service {service_name} at {cluster_name}...'.format(
-                    service_name=service_full_name,
+                    service_name=self.get_service_name(service_name),
                     cluster_name=self.get_cluster_name(),
                 ))
                 self.delete_service(service_name, force)
 
-                self.await_service_absence(service_name)
-                ctx.info('Service {service_name} at {cluster_name} successfully deleted.'.format(
-                    service_name=service_full_name,
+            for service_name, is_deleted in self.await_services_absence(service_names).items():
+                ctx.info('Service {service_name} at {cluster_name} deleted: {deleted}'.format(
+                    service_name=self.get_service_name(service_name),
+                    cluster_name=self.get_cluster_name(),
+                    deleted=is_deleted,
+                ))
+
+        @task
+        def deploy(ctx, parallel=None, mode=None):
+            """
+            Deploys services to the default cluster removing old service if necessary.
+            Services are deployed concurrently, use --parallel to limit the number of services deployed at once.
+            Use --mode=rolling to update existing services in place instead of recreating them.
+            """
+            reports = self.deploy_services(int(parallel) if parallel else None, mode)
+
+            ctx.info('Deployment summary for cluster {}:'.format(self.get_cluster_name()))
+            print(self.format_deploy_summary(reports))
+
+            failed = [self.get_service_name(name) for name, report in reports.items() if report['error'] is not None]
+            if failed:
+                raise DeploymentError('Failed to deploy services {services} to cluster {cluster_name}.'.format(
+                    services=', '.join(failed),
                     cluster_name=self.get_cluster_name(),
                 ))
 
-        @task(delete_services, register_tasks, create_services, start_services)
-        def deploy(ctx):
-            """Deploys services to the default cluster removing old service if necessary"""
             ctx.info('Services {services_names} successfully deployed to cluster {cluster_name}.'.format(
                 services_names=self.get_services_names(),
                 cluster_name=self.get_cluster_name(),
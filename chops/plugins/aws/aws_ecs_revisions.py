@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+
+# Version of stored revisions, revisions of other versions are ignored
+REVISION_CACHE_FORMAT = 1
+# Fields of task definition revisions which change after registration (e.g. once revision is deregistered)
+MUTABLE_TASK_DEFINITION_FIELDS = ['status', 'deregisteredAt']
+
+
+def get_immutable_task_definition(task_definition: dict):
+    """
+    Returns task definition without fields which could change after registration.
+    :param task_definition: dict task definition revision as described by ECS
+    :return: dict task definition
+    """
+    return {key: value for key, value in task_definition.items() if key not in MUTABLE_TASK_DEFINITION_FIELDS}
+
+
+def get_definition_hash(definition: dict):
+    """
+    Returns canonical hash of the task definition, it does not depend on the order of keys.
+    :param definition: dict rendered task definition
+    :return: str SHA-256 hex digest
+    """
+    canonical = json.dumps(definition, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RevisionCache(object):
+    """
+    Permanent local cache of ECS task definition revisions.
+
+    Registered revisions never change, so their descriptions are kept forever and addressed by ARN,
+    every revision is stored in its own JSON file under the cache directory.
+    Only immutable fields are stored: revision status (which changes once revision is deregistered)
+    and resource tags are not.
+    Failed reads and writes are ignored since it is only a cache.
+    """
+
+    def __init__(self, path, logger=None, refresh=False):
+        if logger is None:
+            logger = logging.getLogger('chops.RevisionCache')
+
+        self.path = path
+        self.logger = logger
+        # Whether stored revisions should be ignored (they are still updated with fresh descriptions)
+        self.refresh = refresh
+
+    def get_file_path(self, arn):
+        return os.path.join(self.path, hashlib.sha1(arn.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, arn):
+        """
+        Returns stored revision description.
+        :param arn: str task definition ARN
+        :return: dict | None revision description or None if it is not stored
+        """
+        if self.refresh:
+            return None
+
+        try:
+            with open(self.get_file_path(arn)) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning('Unable to read cached task definition {arn}: {error}'.format(arn=arn, error=e))
+            return None
+
+        # Guards against hash collisions, files written by hand and by older versions
+        if entry.get('arn') != arn or entry.get('format') != REVISION_CACHE_FORMAT:
+            return None
+
+        return entry['description']
+
+    def save(self, arn, description: dict):
+        """
+        Stores revision description, file is replaced atomically so concurrent readers never see partial writes.
+        Mutable fields of the task definition are not stored.
+        :param arn: str task definition ARN
+        :param description: dict revision description with `taskDefinition` key
+        """
+        description = {**description, 'taskDefinition': get_immutable_task_definition(description['taskDefinition'])}
+        file_path = self.get_file_path(arn)
+        tmp_path = '{}.{}.{}.tmp'.format(file_path, os.getpid(), threading.get_ident())
+
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump({'format': REVISION_CACHE_FORMAT, 'arn': arn, 'description': description}, f, default=str)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            self.logger.warning('Unable to cache task definition {arn}: {error}'.format(arn=arn, error=e))
@@ -69,9 +69,20 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
         """
         return self.config['target_groups']
 
-    def get_balancer_info(self):
+    def get_balancer_info(self, use_inventory=True):
         """
         Returns load balancer details for the current environment.
+        Details are cached until balancer is created or deleted.
+        :param use_inventory: bool whether details could be taken from the persistent inventory
+        :return: dict balancer details
+        """
+        return self.describe_cache.get(
+            ('balancer', self.get_current_env()), self.describe_balancer, use_inventory=use_inventory,
+        )
+
+    def describe_balancer(self):
+        """
+        Requests load balancer details for the current environment.
         :return: dict balancer details
         """
         try:
@@ -91,9 +102,10 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
     def balancer_exists(self):
         """
         Returns whether load balancer exists in the current environment.
+        Balancer is always looked up in AWS, since it could be changed elsewhere.
         :return: bool whether balancer exists or not
         """
-        return self.get_balancer_info() is not None
+        return self.get_balancer_info(use_inventory=False) is not None
 
     def get_balancer_arn(self):
         """
@@ -109,9 +121,23 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
         """
         return self.get_balancer_info()['DNSName']
 
-    def get_target_group_info(self, short_name):
+    def get_target_group_info(self, short_name, use_inventory=True):
         """
         Returns specified target group details for the current environment.
+        Details are cached until target group is created or deleted.
+        :param short_name: str target group short name
+        :param use_inventory: bool whether details could be taken from the persistent inventory
+        :return: dict target group details
+        """
+        return self.describe_cache.get(
+            ('target_group', self.get_current_env(), short_name),
+            lambda: self.describe_target_group(short_name),
+            use_inventory=use_inventory,
+        )
+
+    def describe_target_group(self, short_name):
+        """
+        Requests specified target group details for the current environment.
         :param short_name: str target group short name
         :return: dict target group details
         """
@@ -148,10 +174,11 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
     def target_group_exists(self, short_name):
         """
         Returns whether target group exists in the current environment.
+        Target group is always looked up in AWS, since it could be changed elsewhere.
         :param short_name: str target group short name
         :return: bool whether target group exists
         """
-        return self.get_target_group_info(short_name) is not None
+        return self.get_target_group_info(short_name, use_inventory=False) is not None
 
     def get_target_group_arn(self, short_name):
         """
@@ -190,6 +217,7 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
             IpAddressType='ipv4',
         )
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+        self.describe_cache.invalidate('balancer', app_env)
 
         return response['LoadBalancers'][0]
 
@@ -197,10 +225,13 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
         """
         Deletes load balancer in the current environment.
         """
+        balancer_arn = self.get_balancer_arn()
         response = self.client.delete_load_balancer(
-            LoadBalancerArn=self.get_balancer_arn()
+            LoadBalancerArn=balancer_arn
         )
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+        self.describe_cache.invalidate('balancer', self.get_current_env())
+        self.describe_cache.invalidate('listeners', balancer_arn)
 
     def create_target_groups(self):
         """
@@ -224,6 +255,7 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
                 **target_groups_config[short_name],
             )
             assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+            self.describe_cache.invalidate('target_group', self.get_current_env(), short_name)
 
             self.logger.info(f'Target group {target_group_name} created.')
             response_data[target_group_name] = response['TargetGroups']
@@ -247,6 +279,7 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
                 TargetGroupArn=self.get_target_group_arn(short_name)
             )
             assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+            self.describe_cache.invalidate('target_group', self.get_current_env(), short_name)
             self.logger.info('Target group {} deleted.'.format(self.get_target_group_name(short_name)))
 
     def create_listeners(self):
@@ -272,6 +305,7 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
                 **target_groups_config[short_name],
             )
             assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+            self.describe_cache.invalidate('listeners', balancer_arn)
 
             self.logger.info('Target group {group} bound to {balancer} load balancer.'.format(
                 group=target_group_name,
@@ -284,16 +318,15 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
     def describe_listeners(self):
         """
         Describes listeners for the default balancer of the current environment.
+        Listeners are cached until they are created or deleted.
         :return: dict created listeners details
         """
         balancer_arn = self.get_balancer_arn()
 
-        response = self.client.describe_listeners(
-            LoadBalancerArn=balancer_arn,
-        )
-        assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+        def describe():
+            return list(self.paginate('describe_listeners', 'Listeners', LoadBalancerArn=balancer_arn))
 
-        return response['Listeners']
+        return self.describe_cache.get(('listeners', balancer_arn), describe)
 
     def delete_listeners(self):
         """
@@ -306,12 +339,18 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
                 ListenerArn=listener['ListenerArn']
             )
             assert response['ResponseMetadata']['HTTPStatusCode'] == 200
+            self.describe_cache.invalidate('listeners', listener['LoadBalancerArn'])
 
             self.logger.info('Successfully deleted listener {listener_arn} for balancer {balancer}.'.format(
                 listener_arn=listener['ListenerArn'],
                 balancer=self.get_balancer_name(),
             ))
 
+    def prefetch(self):
+        self.get_balancer_info()
+        for short_name in self.get_target_groups_config():
+            self.get_target_group_info(short_name)
+
     def get_tasks(self):
         @task
         def create_balancer(ctx):
@@ -409,37 +448,30 @@ class AwsElbPlugin(AwsServicePlugin, AwsEnvsPluginMixin, AwsEc2PluginMixin):
             ctx.info('Listeners details for load balancer {}:'.format(self.get_balancer_name()))
             ctx.pp.pprint(data)
 
-        @task
+        @task(create_target_groups, create_balancer, create_listeners)
         def create(ctx):
             """Creates fully operational load balancer setup for the current environment."""
-            create_target_groups(ctx)
-            create_balancer(ctx)
-            create_listeners(ctx)
-
             ctx.info('Load balancers setup completed.')
 
-        @task
+        @task(delete_listeners, delete_balancer, delete_target_groups)
         def delete(ctx):
             """Deletes load balancer for current environment and all related resources."""
-            delete_listeners(ctx)
-            delete_balancer(ctx)
-            delete_target_groups(ctx)
-
             ctx.info('Load balancers deletion completed.')
 
-        @task
+        @task(delete, create)
         def reset(ctx):
             """Resets load balancer setup for the current environment."""
-            delete(ctx)
-            create(ctx)
-
             ctx.info('Load balancers reset completed.')
 
-        @task
+        @task(describe_balancer, describe_target_groups, describe_listeners)
         def describe(ctx):
-            describe_balancer(ctx)
-            describe_target_groups(ctx)
-            describe_listeners(ctx)
+            """Describes load balancer with its target groups and listeners for the current environment."""
+
+        # Listeners join the balancer with target groups, so they are created after and deleted before both of them,
+        # the rest is independent and may run concurrently with `--jobs`
+        create.parallel = [(create_target_groups, create_balancer)]
+        delete.parallel = [(delete_balancer, delete_target_groups)]
+        describe.parallel = True
 
         return [
             create_balancer, delete_balancer, describe_balancer,
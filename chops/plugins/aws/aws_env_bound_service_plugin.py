@@ -7,6 +7,7 @@ class AwsEnvBoundServicePlugin(AwsServicePlugin, AwsEnvsPluginMixin):
     This plugin is designed to operate on the fixed environment.
     It overrides the config with the data picked from the '__environments__.<env_name>' key
     and leaves the original config under the '__config'.
+    Resulting config is frozen (see `utils.FrozenDict`), build new values instead of modifying it.
 
     Use this to simplify the plugins which operates only on the current environment.
     """
@@ -1,10 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import os
+import threading
+
+from invoke import task
 
 import chops.core
 from chops.plugins.aws.aws_core import AwsPlugin
 from chops import utils
 
 
+# Default maximum number of environments processed concurrently, could be overridden by the `workers` config key
+DEFAULT_ENV_WORKERS = 8
+
+
 class AwsEnvsPlugin(chops.core.Plugin):
     name = 'aws_envs'
     dependencies = ['aws', 'dotenv']
@@ -15,7 +24,30 @@ class AwsEnvsPlugin(chops.core.Plugin):
 
         self.aws_plugin: AwsPlugin = self.app.plugins['aws']
         self.names = self.config['environments'].keys()
-        self.current = os.getenv('APP_ENV', self.config['default'])
+        self.selected = os.getenv('APP_ENV', self.config['default'])
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        """
+        Returns current environment name.
+        It is the selected one unless the calling thread operates on another environment (see `using`).
+        :return: str environment name
+        """
+        return getattr(self._local, 'env', self.selected)
+
+    @contextmanager
+    def using(self, app_env):
+        """
+        Makes specified environment current for the calling thread.
+        :param app_env: str environment name
+        """
+        previous = self.current
+        self._local.env = app_env
+        try:
+            yield app_env
+        finally:
+            self._local.env = previous
 
     def envs_from_string(self, env):
         environments = set()
@@ -31,23 +63,121 @@ class AwsEnvsPlugin(chops.core.Plugin):
 
         return environments
 
+    def map_envs(self, func, env=None):
+        """
+        Calls function for each of the environments concurrently.
+        Environment is current for the thread which calls the function (see `using`).
+
+        Results are yielded ordered by environment names as soon as they are available,
+        so tasks are able to print them grouped by environment. If some calls fail,
+        the rest are still completed and yielded, then the first error is raised.
+        :param func: callable function which accepts environment name
+        :param env: str[] | None environments (see `envs_from_string`)
+        :return: Iterator (str, Any) environment names and results
+        """
+        environments = sorted(self.envs_from_string(env or []))
+
+        def call(app_env):
+            with self.using(app_env):
+                return func(app_env)
+
+        workers = min(len(environments), self.config.get('workers', DEFAULT_ENV_WORKERS))
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = [(app_env, executor.submit(call, app_env)) for app_env in environments]
+
+            for app_env, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error('Failed for "{env}" environment: {error}'.format(env=app_env, error=e))
+                    errors.append(e)
+                    continue
+
+                yield app_env, result
+
+        if errors:
+            raise errors[0]
+
+    def prefetch(self, app_env):
+        """
+        Fills inventory with resources of all AWS plugins for the specified environment.
+        :param app_env: str environment name
+        """
+        from chops.plugins.aws.aws_service_plugin import AwsServicePlugin
+
+        with self.using(app_env):
+            for plugin in [plugin.materialise() for plugin in self.app.plugins.values()]:
+                if isinstance(plugin, AwsServicePlugin):
+                    self.logger.debug('Prefetching {plugin} resources for {env} environment...'.format(
+                        plugin=plugin.name, env=app_env,
+                    ))
+                    plugin.prefetch()
+
+    def get_tasks(self):
+        @task(iterable=['env'])
+        def prefetch(ctx, env=None):
+            """
+            Discovers stable AWS resources (VPC, subnets, balancers, etc.) and stores them in the inventory.
+            Environments are processed concurrently, all environments are prefetched by default.
+            Use `chops --no-cache aws-envs.prefetch` to refresh resources which are already in the inventory.
+            """
+            environments = [app_env for app_env, _ in self.map_envs(self.prefetch, env or ['*'])]
+
+            inventory = self.aws_plugin.get_inventory()
+            if inventory is not None:
+                inventory.flush()
+            ctx.info('AWS inventory prefetched for environments: {}.'.format(', '.join(environments)))
+
+        return [prefetch]
+
 
 class AwsEnvsPluginMixin:
     def envs_from_string(self, value):
         return self.app.plugins['aws_envs'].envs_from_string(value)
 
+    def map_envs(self, func, env=None):
+        return self.app.plugins['aws_envs'].map_envs(func, env)
+
     def get_current_env(self):
         return self.app.plugins['aws_envs'].current
 
     def env_config(self, app_env=None, from_config=None):
+        """
+        Returns frozen config with the '__environments__.<env_name>' overrides applied.
+        Values which are not overridden are shared with the original config.
+        :param app_env: str | None environment name (defaults to the current one)
+        :param from_config: dict | None config to use instead of the plugin config
+        :return: utils.FrozenDict environment config
+        """
         app_env = app_env or self.get_current_env()
         from_config = from_config or self.config
 
-        env_overrides = from_config.get('__environments__', {}).get(app_env, {})
-        env_specific_config = utils.deep_merge(from_config, env_overrides)
-
-        if '__environments__' in env_specific_config:
-            del env_specific_config['__environments__']
+        # Merged configs are memoised per config object and environment,
+        # config is kept in cache to make sure its id is not reused
+        cache = self.__dict__.setdefault('_env_config_cache', {})
+        key = (id(from_config), app_env)
+        if key in cache and cache[key][0] is from_config:
+            return cache[key][1]
+
+        # Config is frozen once, so values which are not overridden are shared by all environment configs
+        memo = self.__dict__.setdefault('_freeze_memo', {})
+        frozen_config = utils.freeze(from_config, memo)
+
+        # Environment configs for plugin settings are precomputed in the settings snapshot,
+        # they share values with the plugin config, so the same memo makes them share frozen values as well
+        env_specific_config = None
+        if from_config is self.app.config.get(self.name):
+            env_specific_config = self.app.settings_snapshot.get_env_config(self.name, app_env)
+
+        if env_specific_config is not None:
+            env_specific_config = utils.freeze(env_specific_config, memo)
+        else:
+            env_overrides = from_config.get('__environments__', {}).get(app_env, {})
+            env_specific_config = utils.overlay(frozen_config, env_overrides, exclude=['__environments__'])
+
+        cache[key] = (from_config, env_specific_config)
 
         return env_specific_config
 
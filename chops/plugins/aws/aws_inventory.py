@@ -0,0 +1,136 @@
+import os
+import time
+
+import yaml
+
+from chops.store.yaml_store import YamlStore
+
+
+# Seconds to keep discovered resources by kind, could be overridden by the `inventory_ttl` key of the AWS plugin config.
+# Resources of other kinds are never persisted. Only stable resources (VPC, subnets, repositories) are persisted
+# by default, since balancers, target groups and security groups are often recreated, e.g. by other machines.
+DEFAULT_INVENTORY_TTL = {
+    'vpc': 24 * 3600,
+    'subnets': 24 * 3600,
+    'repositories': 24 * 3600,
+}
+
+
+class Inventory(YamlStore):
+    """
+    Persistent inventory of discovered AWS resources (VPC id, subnets, balancer ARNs, etc.).
+
+    Entries are keyed by AWS profile, region and `DescribeCache` key (which includes environment name
+    for environment specific resources) and expire after the TTL of their resource kind.
+    Missing resources are never persisted, so they are always looked up again.
+
+    Unlike regular store, inventory is written once on exit (or on `flush`) and only if something was discovered.
+    """
+
+    def __init__(self, path, ttl: dict = None, logger=None, refresh=False):
+        self.ttl = {**DEFAULT_INVENTORY_TTL, **(ttl or {})}
+        # Whether stored entries should be ignored (they are still updated with fresh values)
+        self.refresh = refresh
+
+        super().__init__(path, logger)
+
+    def _changed(self):
+        with self._lock:
+            self._dirty = True
+
+    def flush(self):
+        """
+        Writes inventory if it has unsaved changes, failed writes are ignored since inventory is only a cache.
+        :return:
+        """
+        try:
+            super().flush()
+        except (OSError, yaml.YAMLError) as e:
+            self.logger.warning('Unable to write AWS inventory {path}: {error}'.format(path=self.path, error=e))
+
+    def load(self):
+        """
+        Loads inventory, broken inventory files are discarded.
+        Missing inventory file is not created until there is something to write.
+        :return:
+        """
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            super().load()
+        except yaml.YAMLError as e:
+            self.logger.warning('Unable to read AWS inventory {path}, discarding it: {error}'.format(
+                path=self.path, error=e,
+            ))
+            self._store = {}
+
+    def get_ttl(self, key: tuple):
+        """
+        Returns TTL for the key (0 if resources of this kind are not persisted).
+        :param key: tuple entry key starting with the resource kind
+        :return: int TTL in seconds
+        """
+        return self.ttl.get(key[0]) or 0
+
+    def get_entries(self, scope: tuple):
+        """
+        Returns entries of the scope.
+        :param scope: tuple (profile, region) scope
+        :return: dict entries by key
+        """
+        node = self._store
+        for part in scope:
+            node = node.setdefault(str(part), {})
+        return node
+
+    @staticmethod
+    def format_key(key: tuple):
+        return '/'.join(str(part) for part in key)
+
+    def lookup(self, scope: tuple, key: tuple):
+        """
+        Returns whether the key has a fresh entry and its value.
+        :param scope: tuple (profile, region) scope
+        :param key: tuple entry key
+        :return: (bool, Any) whether entry was found and its value
+        """
+        if self.refresh or not self.get_ttl(key):
+            return False, None
+
+        with self._lock:
+            entry = self.get_entries(scope).get(self.format_key(key))
+
+        if entry is None or entry['expires'] < time.time():
+            return False, None
+
+        return True, entry['value']
+
+    def save(self, scope: tuple, key: tuple, value):
+        """
+        Saves value if resources of its kind are persisted.
+        :param scope: tuple (profile, region) scope
+        :param key: tuple entry key
+        :param value: Any value to save, `None` values are not saved
+        """
+        ttl = self.get_ttl(key)
+        if not ttl or value is None:
+            return
+
+        with self._lock:
+            self.get_entries(scope)[self.format_key(key)] = {'value': value, 'expires': time.time() + ttl}
+            self._changed()
+
+    def discard(self, scope: tuple, *key):
+        """
+        Removes entries which keys start with the given parts.
+        :param scope: tuple (profile, region) scope
+        :param key: key parts, e.g. ('target_group', 'prod')
+        """
+        prefix = self.format_key(key)
+
+        with self._lock:
+            entries = self.get_entries(scope)
+            for entry_key in [k for k in entries if k == prefix or k.startswith(prefix + '/') or not prefix]:
+                del entries[entry_key]
+                self._changed()
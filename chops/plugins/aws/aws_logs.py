@@ -50,9 +50,12 @@ class AwsLogsPlugin(AwsServicePlugin, AwsEnvsPluginMixin):
             Creates log group for current or specified environment[s].
             Use --env=* for all environments
             """
-            for app_env in self.envs_from_string(env):
+            def create_for_env(app_env):
                 log_group_name = self.get_log_group_name(app_env)
                 self.create_log_group(log_group_name)
+                return log_group_name
+
+            for _, log_group_name in self.map_envs(create_for_env, env):
                 ctx.info('Log group "{}" successfully created.'.format(log_group_name))
 
         @task(iterable=['env'])
@@ -61,9 +64,12 @@ class AwsLogsPlugin(AwsServicePlugin, AwsEnvsPluginMixin):
             Delete log group for current or specified environment[s].
             Use --env=* for all environments
             """
-            for app_env in self.envs_from_string(env):
+            def delete_for_env(app_env):
                 log_group_name = self.get_log_group_name(app_env)
                 self.delete_log_group(log_group_name)
+                return log_group_name
+
+            for _, log_group_name in self.map_envs(delete_for_env, env):
                 ctx.info('Log group "{}" successfully deleted.'.format(log_group_name))
 
         return [create_group, delete_group]
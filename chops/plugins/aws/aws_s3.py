@@ -5,6 +5,16 @@ from chops.plugins.aws.aws_envs import AwsEnvsPluginMixin
 from chops.plugins.aws.aws_service_plugin import AwsServicePlugin
 
 
+def make_bucket_name(namespace, app_env):
+    """
+    Returns bucket name for the namespace and environment.
+    :param namespace: str `aws_s3` namespace
+    :param app_env: str application environment
+    :return: str bucket name
+    """
+    return '{namespace}-{env_name}'.format(namespace=namespace, env_name=app_env)
+
+
 class AwsS3Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
     name = 'aws_s3'
     dependencies = ['aws', 'aws_envs']
@@ -17,19 +27,14 @@ class AwsS3Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
         :param app_env: str | None application environment
         :return: str bucket name
         """
-        return '{namespace}-{env_name}'.format(
-            namespace=self.config['namespace'],
-            env_name=app_env or self.get_current_env(),
-        )
+        return make_bucket_name(self.config['namespace'], app_env or self.get_current_env())
 
     def get_bucket_names(self):
         """
         Lists S3 buckets
         :return: str[] bucket names list
         """
-        response = self.client.list_buckets()
-        assert response['ResponseMetadata']['HTTPStatusCode'] == 200
-        return [b['Name'] for b in response['Buckets']]
+        return [b['Name'] for b in self.paginate('list_buckets', 'Buckets')]
 
     def get_bucket_details(self, name):
         """
@@ -101,9 +106,12 @@ class AwsS3Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
             Creates S3 bucket for current or specified environment[s].
             Use --env=* for all environments
             """
-            for app_env in self.envs_from_string(env):
+            def create_for_env(app_env):
                 bucket_name = self.get_bucket_name(app_env)
                 self.create_bucket(bucket_name)
+                return bucket_name
+
+            for _, bucket_name in self.map_envs(create_for_env, env):
                 ctx.info('Bucket "{}" successfully created.'.format(bucket_name))
 
         @task(iterable=['env'])
@@ -112,9 +120,12 @@ class AwsS3Plugin(AwsServicePlugin, AwsEnvsPluginMixin):
             Delete S3 bucket for current or specified environment[s].
             Use --env=* for all environments
             """
-            for app_env in self.envs_from_string(env):
+            def delete_for_env(app_env):
                 bucket_name = self.get_bucket_name(app_env)
                 self.delete_bucket(bucket_name)
+                return bucket_name
+
+            for _, bucket_name in self.map_envs(delete_for_env, env):
                 ctx.info('Bucket "{}" successfully deleted.'.format(bucket_name))
 
         @task(name='list')
@@ -1,7 +1,97 @@
+import threading
+
 import chops.core
 from chops.plugins.aws.aws_core import AwsPlugin
 
 
+class DescribeCache(object):
+    """
+    Caches results of describe calls for the lifetime of the chops invocation.
+
+    Entries are keyed by tuples starting with the resource kind, e.g. `('balancer', <env>)`.
+    Plugins should invalidate entries once they create or delete the corresponding resources.
+    Missing resources (`None` results) are cached as well.
+
+    Cache is backed by the persistent inventory (see `aws_inventory.Inventory`) when `inventory` is provided.
+    It is a callable returning `(inventory, scope)` pair or `None` if inventory is not available.
+    Checks which decide whether to create or delete resources should not trust the inventory
+    (it does not know about changes made elsewhere), so they pass `use_inventory=False`.
+    """
+
+    def __init__(self, name, logger, inventory=None):
+        self.name = name
+        self.logger = logger
+        self.inventory = inventory
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        # Keys of entries taken from the inventory rather than loaded during this invocation
+        self._stored = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, loader, use_inventory=True):
+        """
+        Returns cached value or loads and caches it.
+        :param key: tuple cache key
+        :param loader: callable function which loads value
+        :param use_inventory: bool whether value could be taken from the inventory, otherwise it is loaded
+                              unless it was already loaded during this invocation
+        :return: cached value
+        """
+        with self._lock:
+            is_hit = key in self._entries and (use_inventory or key not in self._stored)
+            if is_hit:
+                self.hits += 1
+                value = self._entries[key]
+            else:
+                self.misses += 1
+            self.log('hit' if is_hit else 'miss', key)
+
+        if is_hit:
+            return value
+
+        inventory, scope = (self.inventory and self.inventory()) or (None, None)
+        if inventory is not None and use_inventory:
+            is_stored, value = inventory.lookup(scope, key)
+            self.log('inventory hit' if is_stored else 'inventory miss', key)
+        else:
+            is_stored = False
+
+        if not is_stored:
+            value = loader()
+            if inventory is not None:
+                inventory.save(scope, key, value)
+
+        with self._lock:
+            self._entries[key] = value
+            if is_stored:
+                self._stored.add(key)
+            else:
+                self._stored.discard(key)
+
+        return value
+
+    def invalidate(self, *key):
+        """
+        Removes entries which keys start with the given parts (all entries if no parts given).
+        :param key: key parts, e.g. ('target_group', 'prod')
+        """
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[:len(key)] == key]:
+                del self._entries[entry_key]
+                self._stored.discard(entry_key)
+            self.log('invalidate', key)
+
+        inventory, scope = (self.inventory and self.inventory()) or (None, None)
+        if inventory is not None:
+            inventory.discard(scope, *key)
+
+    def log(self, event, key):
+        self.logger.debug('{name} describe cache {event}: {key} (hits: {hits}, misses: {misses}).'.format(
+            name=self.name, event=event, key='/'.join(str(k) for k in key) or '*', hits=self.hits, misses=self.misses,
+        ))
+
+
 class AwsServicePlugin(chops.core.Plugin):
     name = 'aws_service_plugin'
     dependencies = ['aws']
@@ -10,7 +100,47 @@ class AwsServicePlugin(chops.core.Plugin):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.aws_plugin: AwsPlugin = self.app.plugins['aws']
-        self.client = self.aws_plugin.boto_session.client(self.service_name)
+        self.describe_cache = DescribeCache(self.name, self.logger, inventory=self.get_inventory)
+
+    @property
+    def client(self):
+        """
+        Returns service client from the shared client registry of the AWS plugin.
+        :return: botocore.client.BaseClient service client
+        """
+        return self.aws_plugin.get_client(self.service_name)
+
+    def paginate(self, operation_name, result_key, client=None, **kwargs):
+        """
+        Yields items of all result pages of the operation.
+        Pages are requested lazily as items are consumed, so it is safe to stop iteration early.
+        :param operation_name: str client method name, e.g. 'list_tasks'
+        :param result_key: str response key which contains items, e.g. 'taskArns'
+        :param client: botocore.client.BaseClient | None client to use instead of the plugin client
+        :param kwargs: operation parameters
+        :return: Iterator items
+        """
+        client = client or self.client
+
+        for page in client.get_paginator(operation_name).paginate(**kwargs):
+            yield from page.get(result_key, [])
+
+    def get_inventory(self):
+        """
+        Returns persistent inventory and the scope of the current profile and region.
+        :return: (Inventory, tuple) | None inventory and scope or None if inventory is disabled
+        """
+        inventory = self.aws_plugin.get_inventory()
+        if inventory is None:
+            return None
+
+        return inventory, (self.get_profile(), self.get_aws_region())
+
+    def prefetch(self):
+        """
+        Discovers stable resources of the current environment filling the inventory.
+        """
+        pass
 
     def get_profile(self):
         return self.app.plugins['aws'].config['profile']
@@ -16,6 +16,9 @@ class AwsSsmPlugin(AwsServicePlugin, AwsEnvsPluginMixin):
             env_name=env_name
         )
 
+    def get_parameter_path(self, name, env_name):
+        return '{path}{name}'.format(path=self.get_path_for_env(env_name), name=name)
+
     def get_tasks(self):
         @task(iterable=['env'], name='list')
         def list_parameters(ctx, decrypt=True, env=None):
@@ -23,39 +26,47 @@ class AwsSsmPlugin(AwsServicePlugin, AwsEnvsPluginMixin):
             Retrieves all AWS SSM parameters for the current (or specified) environment[s].
             Use --env=* to show all environments
             """
-            for app_env in self.envs_from_string(env):
-                ctx.info('AWS SSM parameters for environment "{app_env}":'.format(app_env=app_env))
-                ctx.pp.pprint(self.client.get_parameters_by_path(
+            def list_for_env(app_env):
+                return list(self.paginate(
+                    'get_parameters_by_path', 'Parameters',
                     Path=self.get_path_for_env(app_env),
                     WithDecryption=decrypt
-                ).get('Parameters', {}))
+                ))
+
+            for app_env, parameters in self.map_envs(list_for_env, env):
+                ctx.info('AWS SSM parameters for environment "{app_env}":'.format(app_env=app_env))
+                ctx.pp.pprint(parameters)
 
         @task(iterable=['env'])
         def get(ctx, name, decrypt=True, env=None):
             """Retrieves AWS SSM parameter by name for the current (or specified) environment[s]."""
-            for app_env in self.envs_from_string(env):
-                path = '{path}{name}'.format(path=self.get_path_for_env(app_env), name=name)
-
-                ctx.info('AWS SSM parameter "{path}".'.format(path=path))
-                ctx.pp.pprint(self.client.get_parameter(
-                    Name=path,
+            def get_for_env(app_env):
+                return self.client.get_parameter(
+                    Name=self.get_parameter_path(name, app_env),
                     WithDecryption=decrypt
-                ).get('Parameter', {}))
+                ).get('Parameter', {})
+
+            for app_env, parameter in self.map_envs(get_for_env, env):
+                ctx.info('AWS SSM parameter "{path}".'.format(path=self.get_parameter_path(name, app_env)))
+                ctx.pp.pprint(parameter)
 
         @task
         def get_by_path(ctx, path, decrypt=True):
             """Retrieves AWS SSM parameters by path."""
             ctx.info('AWS SSM parameters by path="{path}".'.format(path=path))
-            ctx.pp.pprint(ctx.boto()['ssm'].get_parameters_by_path(
+            ctx.pp.pprint(list(self.paginate(
+                'get_parameters_by_path', 'Parameters',
                 Path=path,
                 WithDecryption=decrypt
-            ).get('Parameters', {}))
+            )))
 
         @task(iterable=['env'])
         def put(ctx, name, value, param_type='String', description=None, env=None):
             """Puts AWS SSM parameter for the current (or specified) environment[s]."""
-            for app_env in self.envs_from_string(env):
-                path = '{path}{name}'.format(path=self.get_path_for_env(app_env), name=name)
+            def put_for_env(app_env):
+                path = self.get_parameter_path(name, app_env)
+                env_param_type = param_type
+                env_description = description
 
                 try:
                     param = self.client.get_parameter(
@@ -63,10 +74,10 @@ class AwsSsmPlugin(AwsServicePlugin, AwsEnvsPluginMixin):
                         WithDecryption=True
                     ).get('Parameter')
 
-                    param_type = param['Type']
+                    env_param_type = param['Type']
                 except:
-                    if description is None:
-                        description = '"{project_name}" parameter "{name}" for "{app_env}" environment'.format(
+                    if env_description is None:
+                        env_description = '"{project_name}" parameter "{name}" for "{app_env}" environment'.format(
                             project_name=self.app.config['project_name'],
                             name=name, app_env=app_env
                         )
@@ -75,24 +86,29 @@ class AwsSsmPlugin(AwsServicePlugin, AwsEnvsPluginMixin):
                     'Name': path,
                     'Value': value,
                     'Overwrite': True,
-                    'Type': param_type
+                    'Type': env_param_type
                 }
 
-                if description is not None:
-                    opts['Description'] = description
+                if env_description is not None:
+                    opts['Description'] = env_description
 
+                return env_param_type, self.client.put_parameter(**opts)
+
+            for app_env, (env_param_type, response) in self.map_envs(put_for_env, env):
                 ctx.info('Set AWS SSM parameter "{path}"="{value}" of type "{param_type}".'.format(
-                    path=path, value=value, param_type=param_type
+                    path=self.get_parameter_path(name, app_env), value=value, param_type=env_param_type
                 ))
-                ctx.pp.pprint(self.client.put_parameter(**opts))
+                ctx.pp.pprint(response)
 
         @task(iterable=['env'])
         def delete(ctx, name, env=None):
             """Deletes AWS SSM parameter by name for the current (or specified) environment[s]."""
-            for app_env in self.envs_from_string(env):
-                path = '{path}{name}'.format(path=self.get_path_for_env(app_env), name=name)
-                ctx.info('AWS SSM parameter by name="{path}".'.format(path=path))
-                ctx.pp.pprint(self.client.delete_parameter(Name=path))
+            def delete_for_env(app_env):
+                return self.client.delete_parameter(Name=self.get_parameter_path(name, app_env))
+
+            for app_env, response in self.map_envs(delete_for_env, env):
+                ctx.info('AWS SSM parameter by name="{path}".'.format(path=self.get_parameter_path(name, app_env)))
+                ctx.pp.pprint(response)
 
         return [list_parameters, get, get_by_path, put, delete]
 
@@ -0,0 +1,196 @@
+from collections import OrderedDict
+
+from invoke import Call, Context, Executor, Task
+
+from chops import utils
+
+
+class TaskNode(object):
+    """
+    A single task call within the task graph.
+    """
+
+    def __init__(self, call: Call):
+        self.call = call
+        self.dependencies = []
+        # Nodes which complete the call: the call itself or its post-tasks
+        self.ends = [self]
+
+    def depend_on(self, nodes):
+        for node in nodes:
+            if node is not self and node not in self.dependencies:
+                self.dependencies.append(node)
+
+    def __repr__(self):
+        return '<TaskNode {}>'.format(self.call.task.name)
+
+
+class TaskGraph(object):
+    """
+    Task calls expanded with their pre- and post-tasks.
+
+    Every call is executed only once even if it is required by several tasks (unless deduplication is disabled).
+    Pre-tasks run one after another in the declared order unless the task is marked
+    as `parallel`, in which case they are independent and may run concurrently.
+    The same applies to post-tasks, which always run after the task itself.
+
+    To mark task as parallel set its `parallel` attribute:
+
+        ```
+        @task(describe_balancer, describe_target_groups)
+        def describe(ctx):
+            pass
+
+        describe.parallel = True
+        ```
+
+    Only some of the pre- and post-tasks could be independent, then `parallel` lists groups of them instead.
+    Consecutive tasks of the same group run concurrently, while the rest keep the declared order:
+
+        ```
+        @task(create_target_groups, create_balancer, create_listeners)
+        def create(ctx):
+            pass
+
+        # Listeners are created once both the target groups and the balancer exist
+        create.parallel = [(create_target_groups, create_balancer)]
+        ```
+    """
+
+    def __init__(self, inherit_arguments=False, dedupe=True):
+        """
+        :param inherit_arguments: bool whether pre- and post-tasks receive arguments of the task which requires them
+        :param dedupe: bool whether calls required several times are executed only once
+        """
+        self.inherit_arguments = inherit_arguments
+        self.dedupe = dedupe
+        self.nodes = OrderedDict()
+
+    def get_key(self, call: Call):
+        if not self.dedupe:
+            return len(self.nodes)
+        return id(call.task), repr(call.args), repr(sorted(call.kwargs.items()))
+
+    @staticmethod
+    def get_group(task: Task, sub_task):
+        """
+        Returns group of the pre- or post-task, sub-tasks of the same group do not depend on each other.
+        :param task: Task task which requires the sub-task
+        :param sub_task: Task | Call pre- or post-task
+        :return: int | None group index or None if the sub-task depends on the preceding ones
+        """
+        parallel = getattr(task, 'parallel', False)
+        if parallel is True:
+            return 0
+
+        sub_task = sub_task.task if isinstance(sub_task, Call) else sub_task
+        for index, group in enumerate(parallel or ()):
+            if any(sub_task is (member.task if isinstance(member, Call) else member) for member in group):
+                return index
+        return None
+
+    def make_call(self, sub_task, parent: Call):
+        if isinstance(sub_task, Call):
+            return Call(task=sub_task.task, args=sub_task.args, kwargs=sub_task.kwargs)
+        elif self.inherit_arguments:
+            return Call(task=sub_task, args=parent.args, kwargs=parent.kwargs)
+        else:
+            return Call(task=sub_task)
+
+    def add_chain(self, sub_tasks, parent: Call, after):
+        """
+        Adds pre- or post-tasks of the call, each of them runs after the preceding ones unless they share a group.
+        :param sub_tasks: list pre- or post-tasks
+        :param parent: Call call which requires the sub-tasks
+        :param after: TaskNode[] nodes which should complete before the sub-tasks
+        :return: tuple (TaskNode[] nodes which complete the chain, TaskNode[] nodes which complete every sub-task)
+        """
+        stage_after, stage_ends, all_ends = list(after), [], []
+        group = None
+        for sub_task in sub_tasks:
+            sub_group = self.get_group(parent.task, sub_task)
+            if sub_group is None or sub_group != group:
+                # Sub-task starts a new stage, which waits for the previous one
+                stage_after, stage_ends = stage_ends or stage_after, []
+            group = sub_group
+
+            ends = self.add(self.make_call(sub_task, parent), after=stage_after)
+            stage_ends.extend(end for end in ends if end not in stage_ends)
+            all_ends.extend(end for end in ends if end not in all_ends)
+
+        return stage_ends or stage_after, all_ends
+
+    def add(self, call: Call, after=()):
+        """
+        Adds call with all its pre- and post-tasks to the graph.
+        :param call: Call task call
+        :param after: TaskNode[] nodes which should complete before the call and its pre-tasks
+        :return: TaskNode[] nodes which complete the call
+        """
+        key = self.get_key(call)
+        if key in self.nodes:
+            # The first occurrence of the call wins, same as invoke deduplication
+            return self.nodes[key].ends
+
+        node = TaskNode(call)
+        node.depend_on(after)
+        self.nodes[key] = node
+
+        task: Task = call.task
+        _, pre_ends = self.add_chain(task.pre, call, after)
+        node.depend_on(pre_ends)
+
+        node.ends, _ = self.add_chain(task.post, call, [node])
+        return node.ends
+
+    def run(self, runner, jobs=1):
+        """
+        Runs all calls of the graph.
+        :param runner: callable function which executes a single call
+        :param jobs: int maximum number of concurrently running calls
+        :return: list (call, result) pairs in the order calls were added
+        """
+        results = utils.run_graph(
+            {node: node.dependencies for node in self.nodes.values()},
+            lambda node: runner(node.call),
+            max_workers=jobs,
+        )
+        return [(node.call, results[node]) for node in self.nodes.values()]
+
+
+class ChopsExecutor(Executor):
+    """
+    Executes tasks requested from the command line as a task graph.
+
+    Requested tasks run in the order they were specified,
+    number of concurrently running pre- and post-tasks is limited by the `--jobs` core flag.
+    Calls are deduplicated according to the `tasks.dedupe` config key, same as by the invoke executor.
+    """
+
+    def get_jobs(self):
+        try:
+            return self.core[0].args.jobs.value or 1
+        except (TypeError, IndexError, KeyError, AttributeError):
+            return 1
+
+    def execute(self, *tasks):
+        calls = self.normalize(tasks)
+        direct = set(id(call) for call in calls)
+
+        self.config.load_collection(self.collection.configuration())
+        self.config.load_shell_env()
+
+        graph = TaskGraph(dedupe=self.config.tasks.dedupe)
+        previous = []
+        for call in calls:
+            previous = graph.add(call, after=previous)
+
+        def run_call(call: Call):
+            context = Context(config=self.config)
+            result = call.task(context, *call.args, **call.kwargs)
+            if id(call) in direct and call.autoprint:
+                print(result)
+            return result
+
+        results = graph.run(run_call, jobs=self.get_jobs())
+        return {call.task: result for call, result in results}
@@ -1,4 +1,8 @@
+import collections.abc
+import hashlib
+import logging
 import os
+import pickle
 import sys
 
 from dotenv import load_dotenv
@@ -6,6 +10,11 @@ from dotenv import load_dotenv
 from chops import utils
 
 
+logger = logging.getLogger('chops.settings')
+
+SNAPSHOT_FORMAT = 2
+
+
 def get_chops_settings_path():
     def chop_settings_path(path: str):
         return os.path.join(path, utils.CHOPS_SETTINGS_FILE)
@@ -23,32 +32,343 @@ def get_chops_settings_path():
         return None
 
 
-def load_chops_settings(config):
-    settings_path = get_chops_settings_path()
+def get_file_signature(path):
+    """
+    Returns file signature used to detect file changes.
+    :param path: str file path
+    :return: dict | None file modification time, size and content hash or None if file does not exist
+    """
+    if not os.path.isfile(path):
+        return None
 
-    if settings_path is not None:
-        config['is_initialised'] = True
-        project_root = os.path.dirname(settings_path)
-        dotenv_path = os.path.join(project_root, '.env')
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': content_hash}
+
+
+def is_file_unchanged(path, signature):
+    """
+    Returns whether file matches the signature.
+    Content hash is checked only if modification time or size differs.
+    :param path: str file path
+    :param signature: dict | None file signature
+    :return: bool whether file is unchanged
+    """
+    if not os.path.isfile(path):
+        return signature is None
+    if signature is None:
+        return False
+
+    stat = os.stat(path)
+    if stat.st_mtime_ns == signature['mtime'] and stat.st_size == signature['size']:
+        return True
+
+    return get_file_signature(path)['hash'] == signature['hash']
+
+
+class EnvironRecorder(collections.abc.MutableMapping):
+    """
+    Wraps `os.environ` and records values of the accessed environment variables.
+    Variables set or deleted by the settings are recorded as well, so they could be replayed with the snapshot.
+
+    Settings which enumerate or copy the environment depend on all variables (including missing ones),
+    so recorder marks itself as `enumerated` and such settings are not cached.
+    """
+
+    def __init__(self, environ):
+        self.environ = environ
+        self.accessed = {}
+        # Values written by the settings, `None` stands for deleted variables
+        self.written = {}
+        self.enumerated = False
+
+    def __getitem__(self, key):
+        try:
+            value = self.environ[key]
+        except KeyError:
+            if key not in self.written:
+                self.accessed[key] = None
+            raise
+        # Variables written by the settings themselves do not depend on the environment
+        if key not in self.written:
+            self.accessed[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self.environ[key] = value
+        self.written[key] = value
+
+    def __delitem__(self, key):
+        del self.environ[key]
+        self.written[key] = None
+
+    def __iter__(self):
+        self.enumerated = True
+        return iter(self.environ)
+
+    def __len__(self):
+        self.enumerated = True
+        return len(self.environ)
+
+    def copy(self):
+        self.enumerated = True
+        return dict(self.environ)
+
+
+def get_env_configs(settings: dict):
+    """
+    Returns per-environment configs for all settings sections with '__environments__' overrides.
+    :param settings: dict chops settings
+    :return: dict environment configs in a form of {<section>: {<env>: <config>}}
+    """
+    env_configs = {}
+
+    for section, section_config in settings.items():
+        if not isinstance(section_config, dict) or '__environments__' not in section_config:
+            continue
+
+        env_configs[section] = {}
+        for app_env, env_overrides in section_config['__environments__'].items():
+            env_config = utils.deep_merge(section_config, env_overrides)
+            env_config.pop('__environments__', None)
+            env_configs[section][app_env] = env_config
+
+    return env_configs
+
+
+class SettingsSnapshot(object):
+    """
+    Resolved chops settings together with per-environment plugin configs.
+
+    Snapshot is stored at the project root and reused while settings file, `.env` file,
+    project modules imported by the settings and environment variables accessed by the settings remain unchanged.
+    Snapshots which are not `cacheable` (e.g. settings enumerate environment variables or remove import paths)
+    are never stored.
+
+    Side effects of the settings file (environment variables it writes and import paths it adds)
+    are recorded too and replayed by `apply` whenever the snapshot is reused instead of executing settings.
+    """
+
+    def __init__(self, settings: dict, env_configs=None, settings_path=None, sources=None, environ=None,
+                 cacheable=True, written_environ=None, added_sys_path=None):
+        self.settings = settings
+        self.env_configs = env_configs if env_configs is not None else get_env_configs(settings)
+        self.settings_path = settings_path
+        self.sources = sources or {}
+        self.environ = environ or {}
+        self.cacheable = cacheable
+        self.written_environ = written_environ or {}
+        # Import paths added by the settings as (index, path) pairs
+        self.added_sys_path = added_sys_path or []
+
+    @staticmethod
+    def get_snapshot_path(settings_path):
+        return os.path.join(os.path.dirname(settings_path), utils.CHOPS_SETTINGS_SNAPSHOT_FILE)
+
+    def get_env_config(self, section, app_env):
+        """
+        Returns precomputed config for the settings section and environment.
+        :param section: str settings section (plugin name)
+        :param app_env: str environment name
+        :return: dict | None environment config or None if it was not precomputed
+        """
+        return self.env_configs.get(section, {}).get(app_env)
+
+    def is_fresh(self):
+        """
+        Returns whether snapshot still matches its sources and environment.
+        :return: bool whether snapshot is fresh
+        """
+        for path, signature in self.sources.items():
+            if not is_file_unchanged(path, signature):
+                return False
 
-        # Add settings path directory to the system path,
-        # so, it will be able to import modules correctly
-        sys.path.insert(-1, project_root)
+        return all(os.environ.get(key) == value for key, value in self.environ.items())
 
-        # Load .env file at the root of the project
-        if os.path.exists(dotenv_path):
-            load_dotenv(dotenv_path)
+    def apply(self):
+        """
+        Replays side effects of the settings file: writes its environment variables and adds its import paths.
+        """
+        for key, value in self.written_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
 
-        from importlib.machinery import SourceFileLoader
+        for index, path in self.added_sys_path:
+            if path not in sys.path:
+                sys.path.insert(index, path)
+
+    @classmethod
+    def load(cls, settings_path):
+        """
+        Loads snapshot for the specified settings file.
+        :param settings_path: str settings file path
+        :return: SettingsSnapshot | None snapshot or None if snapshot is missing or unreadable
+        """
+        snapshot_path = cls.get_snapshot_path(settings_path)
+        if not os.path.isfile(snapshot_path):
+            return None
+
+        try:
+            with open(snapshot_path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            logger.debug('Unable to read settings snapshot {path}: {error}'.format(path=snapshot_path, error=e))
+            return None
+
+        if data.get('format') != SNAPSHOT_FORMAT or data.get('settings_path') != settings_path:
+            return None
+
+        return cls(
+            data['settings'], data['env_configs'],
+            settings_path=settings_path, sources=data['sources'], environ=data['environ'],
+            written_environ=data['written_environ'], added_sys_path=data['added_sys_path'],
+        )
+
+    def dump(self):
+        """
+        Writes snapshot next to the settings file.
+        Settings which can not be pickled (e.g. containing functions) are not cached.
+        """
+        snapshot_path = self.get_snapshot_path(self.settings_path)
+        if not self.cacheable:
+            logger.debug('Settings snapshot {path} is not written since it could not be replayed.'.format(
+                path=snapshot_path,
+            ))
+            if os.path.exists(snapshot_path):
+                os.unlink(snapshot_path)
+            return
+        tmp_path = '{}.tmp'.format(snapshot_path)
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'format': SNAPSHOT_FORMAT,
+                    'settings_path': self.settings_path,
+                    'settings': self.settings,
+                    'env_configs': self.env_configs,
+                    'sources': self.sources,
+                    'environ': self.environ,
+                    'written_environ': self.written_environ,
+                    'added_sys_path': self.added_sys_path,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path)
+        except (pickle.PicklingError, AttributeError, TypeError, OSError) as e:
+            logger.debug('Unable to write settings snapshot {path}: {error}'.format(path=snapshot_path, error=e))
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+def get_project_module_paths(module_names, project_root):
+    """
+    Returns source files of the modules which belong to the project.
+    :param module_names: Iterable[str] names of imported modules
+    :param project_root: str project root path
+    :return: str[] module file paths
+    """
+    project_root = os.path.join(os.path.realpath(project_root), '')
+    package_path = os.path.join(utils.PACKAGE_PATH, '')
+    paths = []
+
+    for name in module_names:
+        path = getattr(sys.modules.get(name), '__file__', None)
+        if path is None:
+            continue
+        path = os.path.realpath(path)
+        if path.startswith(project_root) and not path.startswith(package_path):
+            paths.append(path)
+
+    return sorted(paths)
+
+
+def execute_chops_settings(settings_path, dotenv_path):
+    """
+    Executes settings file and returns a snapshot of resolved settings.
+    :param settings_path: str settings file path
+    :param dotenv_path: str `.env` file path
+    :return: SettingsSnapshot settings snapshot
+    """
+    from importlib.machinery import SourceFileLoader
+
+    imported_modules = set(sys.modules)
+    sys_path = list(sys.path)
+    recorder = EnvironRecorder(os.environ)
+    environ, os.environ = os.environ, recorder
+    try:
         mod = SourceFileLoader('chops.settings', settings_path).load_module()
-        settings = mod.SETTINGS
+    finally:
+        os.environ = environ
+
+    # Project modules imported by the settings invalidate snapshot as well
+    module_paths = [
+        path for path in get_project_module_paths(set(sys.modules) - imported_modules, os.path.dirname(settings_path))
+        if path != os.path.realpath(settings_path)
+    ]
+
+    # Settings which remove import paths could not be replayed
+    removed_sys_path = [path for path in sys_path if path not in sys.path]
+
+    return SettingsSnapshot(
+        mod.SETTINGS,
+        settings_path=settings_path,
+        sources={path: get_file_signature(path) for path in [settings_path, dotenv_path] + module_paths},
+        environ=recorder.accessed,
+        cacheable=not recorder.enumerated and not removed_sys_path,
+        written_environ=recorder.written,
+        added_sys_path=[(index, path) for index, path in enumerate(sys.path) if path not in sys_path],
+    )
+
+
+def load_settings_snapshot():
+    """
+    Returns resolved settings snapshot for the current project.
+    Reuses snapshot stored at the project root if it is still fresh.
+    :return: SettingsSnapshot settings snapshot
+    """
+    settings_path = get_chops_settings_path()
+
+    if settings_path is None:
+        from chops.templates.chops_settings_default import SETTINGS
+        return SettingsSnapshot(SETTINGS)
+
+    project_root = os.path.dirname(settings_path)
+    dotenv_path = os.path.join(project_root, '.env')
+
+    # Add settings path directory to the system path,
+    # so, it will be able to import modules correctly
+    sys.path.insert(-1, project_root)
+
+    # Load .env file at the root of the project
+    if os.path.exists(dotenv_path):
+        load_dotenv(dotenv_path)
+
+    snapshot = SettingsSnapshot.load(settings_path)
+    if snapshot is not None and snapshot.is_fresh():
+        logger.debug('Using settings snapshot for {}.'.format(settings_path))
+        snapshot.apply()
+        return snapshot
+
+    snapshot = execute_chops_settings(settings_path, dotenv_path)
+    snapshot.dump()
+
+    return snapshot
+
+
+def load_chops_settings(config, snapshot: SettingsSnapshot = None):
+    if snapshot is None:
+        snapshot = load_settings_snapshot()
+
+    if snapshot.settings_path is not None:
+        config['is_initialised'] = True
+        config['settings_path'] = snapshot.settings_path
     else:
         config['project_path'] = os.getcwd()
         config['is_initialised'] = False
+        config['settings_path'] = None
 
-        from chops.templates.chops_settings_default import SETTINGS
-        settings = SETTINGS
-
-    config = {**config, **settings}
+    config = {**config, **snapshot.settings}
 
     return config
@@ -0,0 +1,37 @@
+import importlib
+
+from chops.store.base import BaseStore
+from chops.store.yaml_store import YamlStore
+
+
+# Kept for backward compatibility
+Store = YamlStore
+
+STORE_BACKENDS = {
+    'yaml': 'chops.store.yaml_store',
+    'sqlite': 'chops.store.sqlite_store',
+    's3': 'chops.store.s3_store',
+}
+
+
+def get_store_class(backend: str):
+    """
+    Returns store class of the backend.
+    :param backend: str name of the bundled backend or a module defining `STORE_CLASS`
+    :return: type store class
+    """
+    return importlib.import_module(STORE_BACKENDS.get(backend, backend)).STORE_CLASS
+
+
+def create_store(config: dict, logger=None, app=None) -> BaseStore:
+    """
+    Creates store configured by `SETTINGS['store']` (YAML store by default).
+    :param config: dict chops config
+    :param logger: Logger
+    :param app: ChopsApplication | None application which owns the store
+    :return: BaseStore store
+    """
+    store_config = config.get('store', {})
+    store_class = get_store_class(store_config.get('backend', 'yaml'))
+
+    return store_class.from_config(store_config, config, logger, app)
@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+import logging
+
+
+class BaseStore(object):
+    """
+    Key-value store addressed by dotted paths (e.g. `aws_ebt.environments.prod`).
+
+    Store backends are selected by `SETTINGS['store']['backend']`,
+    which is either a name of a bundled backend or a module defining `STORE_CLASS`.
+    """
+
+    def __init__(self, logger=None):
+        if logger is None:
+            logger = logging.getLogger('chops.Store')
+
+        self.logger = logger
+
+    @classmethod
+    def from_config(cls, store_config: dict, config: dict, logger=None, app=None):
+        """
+        Creates store from settings.
+        :param store_config: dict `SETTINGS['store']` section
+        :param config: dict chops config
+        :param logger: Logger
+        :param app: ChopsApplication | None application which owns the store
+        :return: BaseStore store
+        """
+        raise NotImplementedError()
+
+    def has(self, path):
+        """
+        Returns whether path exists in the store.
+        :param path:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def get(self, path: str, default=None):
+        """
+        Returns value of the given path or default value if path does not exist.
+        :param path:
+        :param default:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def set(self, key: str, value):
+        """
+        Set's value of the given path.
+        If parent nodes does not exist the function will create dictionaries for them.
+        :param key:
+        :param value:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def delete(self, path):
+        """
+        Deletes path from the storage.
+        :param path:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def init(self, path, value=None):
+        """
+        Initialize store item at the given path with a given value if path does not exist.
+        :param path:
+        :param value:
+        :return:
+        """
+        with self.batch():
+            if not self.has(path):
+                self.set(path, value)
+
+    def append(self, path, value):
+        """
+        Appends value to the iterable at the path.
+        If necessary, creates a list at the path.
+        :param path:
+        :param value:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def include(self, path, value):
+        """
+        Includes value to the iterable at the path treating it as a set.
+        If necessary, creates a list at the path.
+        :param path:
+        :param value:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def has_item(self, path, item):
+        """
+        Returns whether item exists in the iterable of the given path.
+        :param path:
+        :param item:
+        :return:
+        """
+        return self.has(path) and item in self.get(path)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups mutations into a single write.
+        :return:
+        """
+        yield self
+
+    def flush(self):
+        """
+        Persists pending changes.
+        :return:
+        """
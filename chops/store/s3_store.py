@@ -0,0 +1,284 @@
+import functools
+import json
+import os
+import threading
+import time
+
+from botocore.exceptions import ClientError
+import yaml
+
+from chops.store.yaml_store import YamlDumper, YamlLoader, YamlStore
+
+
+DEFAULT_KEY = 'chops/chops_store.yml'
+DEFAULT_CACHE_TTL = 30
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Errors returned by S3 when conditional request does not match the current object
+NOT_MODIFIED_CODES = {'304', 'NotModified'}
+CONFLICT_CODES = {'412', 'PreconditionFailed', '409', 'ConditionalRequestConflict'}
+
+
+class StoreConflictError(RuntimeError):
+    pass
+
+
+def get_error_code(error: ClientError):
+    return str(error.response.get('Error', {}).get('Code'))
+
+
+def recorded(method):
+    """
+    Records store mutation, so it could be replayed on top of a newer remote store.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        if self.is_replaying:
+            return method(self, *args)
+
+        with self.batch():
+            self._replaying.active = True
+            try:
+                result = method(self, *args)
+            finally:
+                self._replaying.active = False
+            self._pending.append((method.__name__, args))
+
+        return result
+
+    return wrapper
+
+
+def refreshed(method):
+    """
+    Refreshes store from S3 before reading if local cache is stale.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.refresh()
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class S3Store(YamlStore):
+    """
+    Store kept as a YAML object in S3 and shared by everyone who uses the same bucket (e.g. CI runners).
+
+    Object is cached locally and revalidated by a conditional GET once the cache is older than `cache_ttl`.
+    Writes are conditional on the ETag of the object they are based on.
+    If somebody else has updated the object meanwhile, the latest version is fetched,
+    pending mutations are replayed on top of it and the write is retried.
+
+    Settings:
+
+        ```
+        SETTINGS['store'] = {
+            'backend': 's3',
+            'bucket': 'my-bucket',         # defaults to the `aws_s3` bucket of the default environment
+            'key': 'chops/chops_store.yml',
+            'cache_ttl': 30,               # seconds to trust the local copy without asking S3
+        }
+        ```
+    """
+
+    def __init__(self, bucket, cache_path, client_factory, key=DEFAULT_KEY, logger=None,
+                 cache_ttl=DEFAULT_CACHE_TTL, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        :param bucket: str S3 bucket
+        :param cache_path: str local cache file
+        :param client_factory: callable function which returns S3 client
+        :param key: str S3 object key
+        :param logger: Logger
+        :param cache_ttl: int seconds to use local cache without revalidation
+        :param max_attempts: int attempts to write store in case of concurrent updates
+        """
+        self.bucket = bucket
+        self.key = key
+        self.client_factory = client_factory
+        self.cache_ttl = cache_ttl
+        self.max_attempts = max_attempts
+        self.etag = None
+        self.validated_at = 0
+        self._client = None
+        self._pending = []
+        self._replaying = threading.local()
+
+        super().__init__(cache_path, logger)
+
+    @classmethod
+    def from_config(cls, store_config: dict, config: dict, logger=None, app=None):
+        from chops.plugins.aws.aws_core import AwsPlugin
+        from chops.plugins.aws.aws_s3 import make_bucket_name
+
+        bucket = store_config.get('bucket')
+        if bucket is None:
+            bucket = make_bucket_name(
+                config['aws_s3']['namespace'],
+                store_config.get('env', config['aws_envs']['default']),
+            )
+
+        # Store is used before plugins are loaded, so it has its own AWS session
+        def client_factory():
+            aws_plugin = AwsPlugin(config['aws'], app, logger)
+            return aws_plugin.get_client('s3', store_config.get('region'))
+
+        return cls(
+            bucket,
+            os.path.join(config['build_path'], 'chops_store.s3.yml'),
+            client_factory,
+            key=store_config.get('key', DEFAULT_KEY),
+            logger=logger,
+            cache_ttl=store_config.get('cache_ttl', DEFAULT_CACHE_TTL),
+            max_attempts=store_config.get('max_attempts', DEFAULT_MAX_ATTEMPTS),
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    @property
+    def is_replaying(self):
+        """
+        Returns whether mutations of the current thread are applied without recording.
+        """
+        return getattr(self._replaying, 'active', False)
+
+    @property
+    def meta_path(self):
+        return '{}.meta'.format(self.path)
+
+    def load(self):
+        """
+        Loads local copy of the store without accessing S3.
+        :return:
+        """
+        if os.path.isfile(self.path) and os.path.isfile(self.meta_path):
+            with open(self.path) as f:
+                self._store = yaml.load(f, Loader=YamlLoader) or {}
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.etag = meta['etag']
+            self.validated_at = meta['validated_at']
+
+    def dump_cache(self):
+        """
+        Writes local copy of the store.
+        :return:
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        super().dump()
+        with open(self.meta_path, 'w') as f:
+            json.dump({'etag': self.etag, 'validated_at': self.validated_at}, f)
+
+    def fetch(self):
+        """
+        Fetches store from S3 unless it matches the local copy.
+        :return: bool whether store has changed
+        """
+        kwargs = {'IfNoneMatch': self.etag} if self.etag is not None else {}
+
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.key, **kwargs)
+        except ClientError as e:
+            code = get_error_code(e)
+            if code in NOT_MODIFIED_CODES:
+                return False
+            if code not in {'NoSuchKey', '404'}:
+                raise
+            data, etag = {}, None
+        else:
+            data, etag = yaml.load(response['Body'].read(), Loader=YamlLoader) or {}, response['ETag']
+
+        self.logger.debug('Fetched store from s3://{}/{}.'.format(self.bucket, self.key))
+        self.rebase(data, etag)
+        return True
+
+    def rebase(self, data, etag):
+        """
+        Replaces store with the remote version and replays pending mutations on top of it.
+        :param data: dict remote store
+        :param etag: str | None remote store ETag
+        :return:
+        """
+        with self._lock:
+            self._store = data
+            self.etag = etag
+
+            # Replayed mutations are written by the caller
+            self._replaying.active = True
+            self._batch_depth += 1
+            try:
+                for name, args in self._pending:
+                    try:
+                        getattr(self, name)(*args)
+                    except KeyError:
+                        # Path was already deleted by someone else
+                        pass
+            finally:
+                self._batch_depth -= 1
+                self._replaying.active = False
+
+    def refresh(self, force=False):
+        """
+        Revalidates local copy of the store if it is older than cache TTL.
+        :param force: bool whether to revalidate regardless of cache TTL
+        :return:
+        """
+        with self._lock:
+            if self.is_replaying or (not force and time.time() - self.validated_at < self.cache_ttl):
+                return
+
+            self.fetch()
+            self.validated_at = time.time()
+            if not self._pending:
+                self.dump_cache()
+
+    def dump(self):
+        """
+        Writes store to S3 if it was not changed by anyone else since it was fetched.
+        Otherwise, replays pending mutations on top of the newer version and retries.
+        :return:
+        """
+        with self._lock:
+            for attempt in range(self.max_attempts):
+                kwargs = {'IfMatch': self.etag} if self.etag is not None else {'IfNoneMatch': '*'}
+                body = yaml.dump(self._store, Dumper=YamlDumper, default_flow_style=False)
+
+                self.logger.debug('Writing store to s3://{}/{}...'.format(self.bucket, self.key))
+                try:
+                    response = self.client.put_object(Bucket=self.bucket, Key=self.key, Body=body.encode(), **kwargs)
+                except ClientError as e:
+                    if get_error_code(e) not in CONFLICT_CODES:
+                        raise
+                    self.logger.debug('Store was updated concurrently, replaying {} changes...'.format(
+                        len(self._pending))
+                    )
+                    self.fetch()
+                    continue
+
+                self.etag = response['ETag']
+                self.validated_at = time.time()
+                self._pending = []
+                self.dump_cache()
+                return
+
+            raise StoreConflictError('Unable to write store to s3://{}/{} after {} attempts.'.format(
+                self.bucket, self.key, self.max_attempts,
+            ))
+
+    has = refreshed(YamlStore.has)
+    get = refreshed(YamlStore.get)
+    has_item = refreshed(YamlStore.has_item)
+
+    # Initialization is recorded on its own, so it is conditional on the remote store it is replayed on top of
+    init = recorded(YamlStore.init)
+    set = recorded(YamlStore.set)
+    delete = recorded(YamlStore.delete)
+    append = recorded(YamlStore.append)
+    include = recorded(YamlStore.include)
+
+
+STORE_CLASS = S3Store
@@ -0,0 +1,311 @@
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+import threading
+
+import yaml
+
+from chops.store.base import BaseStore
+from chops.store.yaml_store import YamlLoader
+from chops import utils
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    path TEXT NOT NULL,
+    item TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (path, item)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+# Entry kinds: plain JSON value or a set-typed collection stored in `items`
+VALUE = 'value'
+SET = 'set'
+
+DEFAULT_BUSY_TIMEOUT = 30000
+
+
+def encode(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def decode(value):
+    return json.loads(value)
+
+
+def descendants_range(path):
+    """
+    Returns bounds of the paths nested into the given one.
+    All nested paths start with '<path>.' and '/' is the character right after '.'.
+    :param path: str dotted path
+    :return: tuple lower and upper bounds (exclusive)
+    """
+    return '{}.'.format(path), '{}/'.format(path)
+
+
+def flatten(path, value):
+    """
+    Splits value into rows: non-empty dictionaries are stored as their leaf paths.
+    :param path: str dotted path
+    :param value: value to store
+    :return: list (path, encoded value) pairs
+    """
+    if isinstance(value, dict) and value:
+        rows = []
+        for key, nested_value in value.items():
+            rows.extend(flatten('{}.{}'.format(path, key), nested_value))
+        return rows
+
+    return [(path, encode(value))]
+
+
+class SqliteStore(BaseStore):
+    """
+    SQLite backed store which keeps each dotted path in its own row.
+
+    Mutations update only affected rows within `BEGIN IMMEDIATE` transactions,
+    so several chops processes can safely share the same store.
+    WAL journal allows readers to proceed while another process writes.
+    Collections populated by `include` are stored as sets with constant time `has_item` checks.
+
+    Settings:
+
+        ```
+        SETTINGS['store'] = {
+            'backend': 'sqlite',
+            'path': os.path.join(HERE, 'chops_store.sqlite3'),
+            'busy_timeout': 30000,  # milliseconds to wait for other writers
+        }
+        ```
+
+    Existing `chops_store.yml` is imported when the database is created.
+    """
+
+    def __init__(self, path, logger=None, busy_timeout=DEFAULT_BUSY_TIMEOUT, migrate_from=None):
+        super().__init__(logger)
+
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        self.create_schema()
+        if migrate_from is not None:
+            self.migrate(migrate_from)
+
+    @classmethod
+    def from_config(cls, store_config: dict, config: dict, logger=None, app=None):
+        return cls(
+            store_config.get('path', os.path.join(config['project_path'], utils.CHOPS_STORE_SQLITE_FILE)),
+            logger,
+            busy_timeout=store_config.get('busy_timeout', DEFAULT_BUSY_TIMEOUT),
+            migrate_from=store_config.get('migrate_from', os.path.join(config['project_path'], utils.CHOPS_STORE_FILE)),
+        )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Returns connection of the current thread.
+        :return: sqlite3.Connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None)
+            connection.execute('PRAGMA busy_timeout = {:d}'.format(self.busy_timeout))
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._local.connection = connection
+            self._local.depth = 0
+        return connection
+
+    @contextmanager
+    def transaction(self, immediate=True, commit_on_error=False):
+        """
+        Runs statements within a transaction of the current thread.
+        Nested transactions are merged into the outermost one.
+        :param immediate: bool whether to acquire write lock right away
+        :param commit_on_error: bool whether to commit changes if transaction fails
+        :return:
+        """
+        connection = self.connection
+        is_outermost = self._local.depth == 0
+
+        if is_outermost:
+            connection.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        self._local.depth += 1
+
+        try:
+            yield connection
+        except BaseException:
+            self._local.depth -= 1
+            if is_outermost:
+                connection.execute('COMMIT' if commit_on_error else 'ROLLBACK')
+            raise
+
+        self._local.depth -= 1
+        if is_outermost:
+            connection.execute('COMMIT')
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups mutations of the current thread into a single transaction.
+        Same as for YAML store, changes are committed even if the batch fails.
+        :return:
+        """
+        with self.transaction(commit_on_error=True):
+            yield self
+
+    def create_schema(self):
+        self.connection.executescript(SCHEMA)
+
+    def migrate(self, yaml_path):
+        """
+        Imports YAML store if it exists and this store was never populated.
+        :param yaml_path: str path to `chops_store.yml`
+        :return:
+        """
+        with self.transaction() as connection:
+            if connection.execute('SELECT 1 FROM meta WHERE key = ?', ('migrated',)).fetchone() is not None:
+                return
+
+            if os.path.isfile(yaml_path) and connection.execute('SELECT 1 FROM entries LIMIT 1').fetchone() is None:
+                self.logger.info('Migrating store from {}...'.format(yaml_path))
+                with open(yaml_path) as f:
+                    data = yaml.load(f, Loader=YamlLoader) or {}
+                for key, value in data.items():
+                    self.set(str(key), value)
+
+            connection.execute('INSERT INTO meta (key, value) VALUES (?, ?)', ('migrated', yaml_path))
+
+    def _get_entry(self, connection, path):
+        return connection.execute('SELECT kind, value FROM entries WHERE path = ?', (path,)).fetchone()
+
+    def _load_entry(self, connection, path, kind, value):
+        if kind == SET:
+            rows = connection.execute('SELECT item FROM items WHERE path = ? ORDER BY position', (path,))
+            return [decode(item) for item, in rows]
+        return decode(value)
+
+    def _clear(self, connection, path):
+        """
+        Removes path, nested paths and parent leaves which are about to become dictionaries.
+        """
+        parts = path.split('.')
+        paths = [(p,) for p in [path] + ['.'.join(parts[:i]) for i in range(1, len(parts))]]
+        lower, upper = descendants_range(path)
+
+        for table in ['entries', 'items']:
+            connection.executemany('DELETE FROM {} WHERE path = ?'.format(table), paths)
+            connection.execute('DELETE FROM {} WHERE path > ? AND path < ?'.format(table), (lower, upper))
+
+    def has(self, path):
+        lower, upper = descendants_range(path)
+        with self.transaction(immediate=False) as connection:
+            return connection.execute(
+                'SELECT 1 FROM entries WHERE path = ? OR (path > ? AND path < ?) LIMIT 1', (path, lower, upper)
+            ).fetchone() is not None
+
+    def get(self, path: str, default=None):
+        with self.transaction(immediate=False) as connection:
+            entry = self._get_entry(connection, path)
+            if entry is not None:
+                return self._load_entry(connection, path, *entry)
+
+            lower, upper = descendants_range(path)
+            rows = connection.execute(
+                'SELECT path, kind, value FROM entries WHERE path > ? AND path < ? ORDER BY path', (lower, upper)
+            ).fetchall()
+            if not rows:
+                return default
+
+            result = {}
+            for row_path, kind, value in rows:
+                node = result
+                parts = row_path[len(lower):].split('.')
+                for p in parts[:-1]:
+                    node = node.setdefault(p, {})
+                node[parts[-1]] = self._load_entry(connection, row_path, kind, value)
+
+            return result
+
+    def set(self, key: str, value):
+        rows = flatten(key, value)
+
+        with self.transaction() as connection:
+            self._clear(connection, key)
+            connection.executemany(
+                'INSERT INTO entries (path, kind, value) VALUES (?, ?, ?)',
+                [(path, VALUE, encoded) for path, encoded in rows]
+            )
+
+    def delete(self, path):
+        parts = path.split('.')
+
+        with self.transaction() as connection:
+            if not self.has(path):
+                raise KeyError('Path "{}" does not belong to storage.'.format(path))
+
+            self._clear(connection, path)
+
+            # Keep parent dictionary even if it became empty
+            parent = '.'.join(parts[:-1])
+            if parent and not self.has(parent):
+                self.set(parent, {})
+
+    def append(self, path, value):
+        with self.transaction():
+            self.set(path, self.get(path, []) + [value])
+
+    def include(self, path, value):
+        item = encode(value)
+
+        with self.transaction() as connection:
+            entry = self._get_entry(connection, path)
+
+            if entry is None or entry[0] != SET:
+                items = []
+                for existing in self.get(path, []) if entry is not None else []:
+                    if encode(existing) not in items:
+                        items.append(encode(existing))
+
+                self._clear(connection, path)
+                connection.execute('INSERT INTO entries (path, kind) VALUES (?, ?)', (path, SET))
+                connection.executemany(
+                    'INSERT INTO items (path, item, position) VALUES (?, ?, ?)',
+                    [(path, existing, position) for position, existing in enumerate(items)]
+                )
+
+            connection.execute(
+                'INSERT OR IGNORE INTO items (path, item, position) '
+                'SELECT ?, ?, COALESCE(MAX(position), -1) + 1 FROM items WHERE path = ?',
+                (path, item, path)
+            )
+
+    def has_item(self, path, item):
+        with self.transaction(immediate=False) as connection:
+            entry = self._get_entry(connection, path)
+            if entry is None:
+                return super().has_item(path, item)
+            if entry[0] == SET:
+                return connection.execute(
+                    'SELECT 1 FROM items WHERE path = ? AND item = ?', (path, encode(item))
+                ).fetchone() is not None
+
+            value = decode(entry[1])
+            return isinstance(value, (list, dict, str)) and item in value
+
+
+STORE_CLASS = SqliteStore
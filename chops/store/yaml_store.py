@@ -0,0 +1,223 @@
+import atexit
+from contextlib import contextmanager
+import os
+import threading
+from typing import Dict, Optional
+import yaml
+
+from chops.store.base import BaseStore
+from chops import utils
+
+# Prefer libyaml bindings when PyYAML is built with them
+try:
+    from yaml import CSafeDumper as YamlDumper, CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper, SafeLoader as YamlLoader
+
+
+class YamlStore(BaseStore):
+    """
+    YAML backed key-value store addressed by dotted paths.
+
+    Every mutation is written to the filesystem immediately unless it happens within a batch:
+
+        ```
+        with store.batch():
+            store.set('a.b', 1)
+            store.include('installed_plugins', 'aws')
+        ```
+
+    Batched mutations are written once when the outermost batch exits, even if it fails,
+    since they usually reflect side effects which already took place.
+    Pending changes are flushed on exit.
+    """
+
+    def __init__(self, path, logger=None):
+        super().__init__(logger)
+
+        self.path = path
+        self._store = {}
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+
+        self.load()
+
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_config(cls, store_config: dict, config: dict, logger=None, app=None):
+        return cls(store_config.get('path', os.path.join(config['project_path'], utils.CHOPS_STORE_FILE)), logger)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups mutations into a single write.
+        Nested batches are merged into the outermost one.
+        :return:
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def _changed(self):
+        """
+        Marks store as modified and writes it unless a batch is in progress.
+        :return:
+        """
+        with self._lock:
+            self._dirty = True
+            if self._batch_depth == 0:
+                self.flush()
+
+    def flush(self):
+        """
+        Dumps store if it has unsaved changes.
+        :return:
+        """
+        with self._lock:
+            if self._dirty:
+                self.dump()
+
+    def has(self, path):
+        """
+        Returns whether path exists in the store.
+        :param path:
+        :return:
+        """
+        parts = path.split('.')
+        node: Optional[Dict] = self._store
+
+        for p in parts[:-1]:
+            if p not in node:
+                return False
+            node = node[p]
+
+        return parts[-1] in node
+
+    def get(self, path: str, default=None):
+        """
+        Returns value of the given path or default value if path does not exist.
+        :param path:
+        :param default:
+        :return:
+        """
+        parts = path.split('.')
+        node: Optional[Dict] = self._store
+
+        for p in parts[:-1]:
+            node = node.get(p)
+            if node is None:
+                return default
+
+        return node.get(parts[-1], default)
+
+    def set(self, key: str, value):
+        """
+        Set's value of the given path.
+        If parent nodes does not exist the function will create dictionaries for them.
+        Dumps store when operation completed.
+        :param key:
+        :param value:
+        :return:
+        """
+        parts = key.split('.')
+
+        with self._lock:
+            node: Optional[Dict] = self._store
+
+            for p in parts[:-1]:
+                if p in node:
+                    node = node.get(p)
+                else:
+                    node[p] = {}
+                    node = node[p]
+
+            node[parts[-1]] = value
+
+            self._changed()
+
+    def delete(self, path):
+        """
+        Deletes path from the storage.
+        Dumps store when operation completed.
+        :param path:
+        :return:
+        """
+        if not self.has(path):
+            raise KeyError('Path "{}" does not belong to storage.'.format(path))
+
+        parts = path.split('.')
+
+        with self._lock:
+            parent = self.get('.'.join(parts[:-1])) if len(parts) > 1 else self._store
+            del parent[parts[-1]]
+
+            self._changed()
+
+    def append(self, path, value):
+        """
+        Appends value to the iterable at the path.
+        If necessary, creates a list at the path.
+        Dumps store when operation completed.
+        :param path:
+        :param value:
+        :return:
+        """
+        with self.batch():
+            self.init(path, [])
+            self.get(path).append(value)
+            self._changed()
+
+    def include(self, path, value):
+        """
+        Includes value to the iterable at the path treating it as a set.
+        If necessary, creates a list at the path.
+        Dumps store when operation completed.
+        :param path:
+        :param value:
+        :return:
+        """
+        with self.batch():
+            self.init(path, [])
+            node = self.get(path)
+
+            if value not in node:
+                node.append(value)
+                self._changed()
+
+    def load(self):
+        """
+        Loads store from the filesystem.
+        Dumps current store if store file does not exist.
+        :return:
+        """
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                self._store = yaml.load(f, Loader=YamlLoader) or {}
+        else:
+            self.dump()
+
+    def dump(self):
+        """
+        Dumps store to the filesystem.
+        The file is replaced atomically, so readers never see a partially written store.
+        :return:
+        """
+        self.logger.debug('Writing store to {path}...'.format(path=self.path))
+        tmp_path = '{}.tmp'.format(self.path)
+
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                yaml.dump(self._store, f, Dumper=YamlDumper, default_flow_style=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+STORE_CLASS = YamlStore
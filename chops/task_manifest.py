@@ -0,0 +1,237 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+from importlib.machinery import PathFinder
+
+from invoke import Collection, Task
+
+
+MANIFEST_FORMAT = 1
+
+
+def find_module_files(name: str, paths=None):
+    """
+    Returns source files of the module (all files of the package for packages) without importing it.
+    :param name: str dotted module name
+    :param paths: str[] | None paths to search top-level module in (defaults to `sys.path`)
+    :return: str[] module source files
+    """
+    search_paths = list(paths or sys.path)
+    spec = None
+
+    for part in name.split('.'):
+        spec = PathFinder.find_spec(part, search_paths)
+        if spec is None:
+            return []
+        search_paths = list(spec.submodule_search_locations or [])
+
+    if spec.submodule_search_locations:
+        return sorted(
+            os.path.join(root, filename)
+            for location in spec.submodule_search_locations
+            for root, _, filenames in os.walk(location)
+            for filename in filenames if filename.endswith('.py')
+        )
+    elif spec.origin and os.path.isfile(spec.origin):
+        return [spec.origin]
+
+    return []
+
+
+def get_fingerprint(config: dict, version: str, installed_plugins=()):
+    """
+    Returns fingerprint of everything the task list depends on:
+    chops version, settings file, plugin modules and installed plugins.
+    :param config: dict chops config
+    :param version: str chops version
+    :param installed_plugins: str[] installed plugin names
+    :return: str fingerprint
+    """
+    digest = hashlib.sha256()
+    digest.update(version.encode())
+    digest.update(json.dumps(sorted(installed_plugins)).encode())
+
+    modules = list(config['plugins'])
+    # Local tasks are defined outside of the plugin module
+    if 'local' in config and 'module' in config['local']:
+        modules.append(config['local']['module'])
+
+    search_paths = [config['project_path']] + config.get('plugin_paths', []) + sys.path
+
+    files = [config['settings_path']] if config.get('settings_path') else []
+    for module in modules:
+        digest.update(module.encode())
+        files.extend(find_module_files(module, search_paths))
+
+    for path in files:
+        digest.update(path.encode())
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+
+    return digest.hexdigest()
+
+
+def _is_serializable(value):
+    try:
+        json.dumps(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def describe_task(name: str, t: Task):
+    """
+    Returns serializable description of the task sufficient for listing, help and completion.
+    :param name: str task name within its collection
+    :param t: Task task to describe
+    :return: dict task description
+    """
+    params = list(inspect.signature(t.body).parameters.values())[1:]
+    args = []
+    for param in params:
+        has_default = param.default is not inspect.Parameter.empty
+        default = param.default if has_default and _is_serializable(param.default) else None
+        args.append([param.name, has_default, default])
+
+    return {
+        'name': name,
+        'doc': t.__doc__,
+        'aliases': list(t.aliases),
+        'args': args,
+        'positional': list(t.positional),
+        'optional': list(t.optional),
+        'iterable': list(t.iterable),
+        'incrementable': list(t.incrementable),
+        'help': dict(t.help),
+        'auto_shortflags': t.auto_shortflags,
+    }
+
+
+def describe_collection(collection: Collection):
+    """
+    Returns serializable description of the tasks of the collection (without sub-collections).
+    :param collection: Collection collection to describe
+    :return: dict collection description
+    """
+    return {
+        'name': collection.name,
+        'default': collection.default,
+        'tasks': [describe_task(name, collection.tasks[name]) for name in collection.tasks.keys()],
+    }
+
+
+def make_stub_task(description: dict) -> Task:
+    """
+    Creates a task which looks like the described one but can not be executed.
+    :param description: dict task description
+    :return: Task stub task
+    """
+    def stub(ctx, *args, **kwargs):
+        raise RuntimeError('Task "{}" is loaded from the task manifest and can not be executed.'.format(
+            description['name']
+        ))
+
+    parameters = [inspect.Parameter('ctx', inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+    for arg_name, has_default, default in description['args']:
+        parameters.append(inspect.Parameter(
+            arg_name, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            default=default if has_default else inspect.Parameter.empty,
+        ))
+
+    stub.__name__ = description['name']
+    stub.__doc__ = description['doc']
+    stub.__signature__ = inspect.Signature(parameters)
+
+    return Task(
+        stub,
+        name=description['name'],
+        aliases=tuple(description['aliases']),
+        positional=description['positional'],
+        optional=description['optional'],
+        iterable=description['iterable'],
+        incrementable=description['incrementable'],
+        help=description['help'],
+        auto_shortflags=description['auto_shortflags'],
+    )
+
+
+class TaskManifest(object):
+    """
+    Serialized description of plugin tasks.
+
+    Allows to list tasks, show task help and provide shell completion
+    without loading plugins while the fingerprint stays the same.
+    """
+
+    def __init__(self, path, fingerprint, logger=None):
+        if logger is None:
+            logger = logging.getLogger('chops.TaskManifest')
+
+        self.path = path
+        self.fingerprint = fingerprint
+        self.logger = logger
+
+    def load(self):
+        """
+        Returns manifest data if manifest exists and matches the fingerprint.
+        :return: dict | None manifest data
+        """
+        if not os.path.isfile(self.path):
+            return None
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            self.logger.debug('Task manifest at {} is corrupted.'.format(self.path))
+            return None
+
+        if data.get('format') != MANIFEST_FORMAT or data.get('fingerprint') != self.fingerprint:
+            self.logger.debug('Task manifest at {} is outdated.'.format(self.path))
+            return None
+
+        return data
+
+    def is_fresh(self):
+        return self.load() is not None
+
+    def dump(self, collections):
+        """
+        Writes manifest for the given plugin collections.
+        :param collections: Collection[] plugin collections
+        """
+        data = {
+            'format': MANIFEST_FORMAT,
+            'fingerprint': self.fingerprint,
+            'collections': [describe_collection(collection) for collection in collections],
+        }
+
+        self.logger.debug('Writing task manifest to {}...'.format(self.path))
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def register_tasks(self, ns: Collection):
+        """
+        Adds stub plugin collections from manifest to the namespace.
+        :param ns: Collection root namespace
+        :return: bool whether manifest was fresh and collections were added
+        """
+        data = self.load()
+        if data is None:
+            return False
+
+        for description in data['collections']:
+            plugin_ns = Collection(description['name'])
+            for task_description in description['tasks']:
+                plugin_ns.add_task(
+                    make_stub_task(task_description),
+                    default=task_description['name'] == description['default'],
+                )
+            ns.add_collection(plugin_ns)
+
+        return True
@@ -23,6 +23,13 @@ SETTINGS['build_path'] = os.path.join(HERE, '.build')
 # This path will be used for logs:
 SETTINGS['log_dir'] = os.path.join(HERE, '.logs')
 
+# Store backend: 'yaml' (chops_store.yml, default), 'sqlite' (safe for concurrent chops runs)
+# or 's3' (shared by everyone using `aws_s3` bucket of the default environment, e.g. CI runners):
+# SETTINGS['store'] = {
+#     'backend': 'sqlite',
+#     'path': os.path.join(HERE, 'chops_store.sqlite3'),
+# }
+
 
 SETTINGS['plugins'] = [
     'chops.plugins.dotenv',
@@ -113,6 +120,15 @@ SETTINGS['docker'] = {
 SETTINGS['aws'] = {
     'profile': 'specify AWS profile here',
     'project_name': SETTINGS['project_name'],
+    # Uncomment to tune AWS clients (see `botocore.config.Config` for available options)
+    # 'client_config': {
+    #     'max_pool_connections': 32,
+    #     'retries': {'mode': 'adaptive', 'max_attempts': 10},
+    # },
+    # Discovered resources (VPC, subnets, repositories) are kept in the inventory under `build_path`,
+    # uncomment to tune how long resources are kept (in seconds) or set `inventory` to `False` to disable it.
+    # Balancers, target groups and security groups could be kept as well, existence checks always ask AWS.
+    # 'inventory_ttl': {'vpc': 24 * 3600, 'balancer': 3600},
 }
 
 SETTINGS['aws_envs'] = {
@@ -120,6 +136,8 @@ SETTINGS['aws_envs'] = {
         'prod': {}
     },
     'default': 'prod',
+    # Uncomment to limit the number of environments processed concurrently by `--env=*` tasks
+    # 'workers': 8,
 }
 
 SETTINGS['aws_ssm'] = {
@@ -132,6 +150,8 @@ SETTINGS['aws_s3'] = {
 
 SETTINGS['aws_ecr'] = {
     'services': [],
+    # Uncomment to change the number of images tagged, pushed or pulled at once (could be overridden by `--parallel`)
+    # 'parallel': 4,
 }
 
 SETTINGS['aws_logs'] = {
@@ -162,6 +182,17 @@ SETTINGS['aws_ecs'] = {
     'namespace': SETTINGS['aws']['project_name'],
     'task_definitions': {},
     'services': {},
+    # Uncomment to tune how services are awaited (seconds), delays grow exponentially up to `max_delay`
+    # 'waiter': {'timeout': 180, 'delay': 1, 'max_delay': 15, 'factor': 2, 'jitter': 0.5},
+    # Uncomment to change the number of services deployed concurrently (could be overridden by `deploy --parallel`)
+    # 'parallel': 4,
+    # Uncomment to update existing services in place (could be overridden by `deploy --mode`)
+    # 'deploy_mode': 'rolling',
+    # Uncomment to let rolling deployments stop old tasks before new ones are started (needs 2+ tasks per service)
+    # 'deployment_configuration': {'maximumPercent': 100, 'minimumHealthyPercent': 50},
+    # Registered task definitions are cached under `build_path` to skip registration of unchanged definitions,
+    # uncomment to disable the cache
+    # 'revision_cache': False,
 }
 
 SETTINGS['aws_app_scale'] = {
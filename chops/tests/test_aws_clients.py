@@ -0,0 +1,72 @@
+import os
+import threading
+from unittest import TestCase, mock
+
+from chops.plugins.aws.aws_core import DEFAULT_CLIENT_CONFIG, AwsPlugin
+
+
+class AwsClientRegistryTestCase(TestCase):
+    def setUp(self):
+        env = {
+            'AWS_ACCESS_KEY_ID': 'testing',
+            'AWS_SECRET_ACCESS_KEY': 'testing',
+            'AWS_DEFAULT_REGION': 'eu-west-1',
+        }
+        self.env_patcher = mock.patch.dict(os.environ, env)
+        self.env_patcher.start()
+
+        self.plugin = AwsPlugin({
+            'profile': None,
+            'project_name': 'test',
+            'client_config': {'max_pool_connections': 64},
+        }, app=None)
+
+    def tearDown(self):
+        self.env_patcher.stop()
+
+    def test_reuses_clients_within_thread(self):
+        client = self.plugin.get_client('ecs')
+
+        assert self.plugin.get_client('ecs') is client
+        assert self.plugin.get_client('ecs', 'eu-west-1') is client
+        assert self.plugin.get_client('ecs', 'us-east-1') is not client
+        assert self.plugin.get_client('ec2') is not client
+
+    def test_creates_client_per_thread(self):
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(self.plugin.get_client('ecs')))
+        thread.start()
+        thread.join()
+
+        assert clients[0] is not self.plugin.get_client('ecs')
+
+    def test_applies_client_config(self):
+        config = self.plugin.get_client('ecs').meta.config
+
+        assert config.max_pool_connections == 64
+        assert config.retries['mode'] == 'adaptive'
+        assert config.tcp_keepalive
+
+    def test_keeps_default_client_config_intact(self):
+        self.plugin.get_client('ecs')
+        AwsPlugin({'profile': None, 'project_name': 'test'}, app=None).get_client('ecs')
+
+        # Botocore replaces `max_attempts` of the config it was given with `total_max_attempts`
+        assert DEFAULT_CLIENT_CONFIG['retries'] == {'mode': 'adaptive', 'max_attempts': 10}
+
+    def test_resolves_credentials_once(self):
+        results = []
+        session = self.plugin.boto_session
+        with mock.patch.object(session, 'get_credentials', wraps=session.get_credentials) as get_credentials:
+            threads = [
+                threading.Thread(target=lambda: results.append(self.plugin.get_credentials())) for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert get_credentials.call_count == 1
+        assert all(credentials is results[0] for credentials in results)
+        assert results[0].access_key == 'testing'
+        assert self.plugin.get_aws_region() == 'eu-west-1'
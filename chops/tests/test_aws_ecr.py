@@ -0,0 +1,182 @@
+import json
+import logging
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from botocore.exceptions import ClientError
+from invoke import Result
+from invoke.exceptions import UnexpectedExit
+
+from chops.plugins.aws.aws_ecr import AwsEcrPlugin, ImageOperationError
+
+
+class FakeContext(object):
+    def __init__(self, missing=(), registry=None):
+        self.commands = []
+        self.missing = missing
+        self.registry = registry
+
+    def run(self, command, in_stream, out_stream=None, err_stream=None, hide=False, warn=False):
+        self.commands.append(command)
+        image = command.split()[-1]
+        if image in self.missing:
+            result = Result(command=command, exited=1)
+            if warn:
+                return result
+            raise UnexpectedExit(result)
+
+        if command.startswith('docker image inspect'):
+            assert hide and out_stream is None
+            stdout = 'sha256:' + image.split('/')[-1].split(':')[0] if '.Id' in command else '1048576'
+            return Result(stdout=stdout + '\n', command=command, exited=0)
+
+        if command.startswith('docker push') and self.registry is not None:
+            self.registry.push(image, 'sha256:' + image.split('/')[-1].split(':')[0])
+
+        out_stream.write('{} done\n'.format(command))
+        return Result(command=command, exited=0)
+
+    @staticmethod
+    def info(message):
+        pass
+
+
+class FakeEcrClient(object):
+    """Registry which keeps image config digests by repository and tag."""
+
+    def __init__(self):
+        self.calls = []
+        self.images = {}
+
+    def push(self, image, digest):
+        repository, tag = image.split('/', 1)[1].rsplit(':', 1)
+        self.images.setdefault(repository, {})[tag] = digest
+
+    def batch_get_image(self, repositoryName, imageIds, acceptedMediaTypes):
+        self.calls.append('batch_get_image')
+        tags = self.images.get(repositoryName, {})
+        return {'images': [
+            {
+                'imageId': image_id,
+                'imageManifest': json.dumps({'config': {'digest': tags[image_id['imageTag']]}}),
+                'imageManifestMediaType': acceptedMediaTypes[0],
+            }
+            for image_id in imageIds if image_id['imageTag'] in tags
+        ]}
+
+    def put_image(self, repositoryName, imageManifest, imageTag, imageManifestMediaType):
+        self.calls.append('put_image')
+        digest = json.loads(imageManifest)['config']['digest']
+        if self.images[repositoryName].get(imageTag) == digest:
+            raise ClientError({'Error': {'Code': 'ImageAlreadyExistsException'}}, 'PutImage')
+        self.images[repositoryName][imageTag] = digest
+
+
+def make_ecr_plugin(services, client=None):
+    app = SimpleNamespace(plugins={
+        'aws': SimpleNamespace(
+            get_client=lambda service_name: client,
+            get_inventory=lambda: None,
+            config={'project_name': 'test', 'profile': 'default'},
+        ),
+        'docker': SimpleNamespace(config={'project_name': 'test'}, get_tag=lambda: 'v1'),
+    })
+    plugin = AwsEcrPlugin({'services': services, 'parallel': 3}, app, logging.getLogger('test'))
+    mock.patch.object(plugin, 'describe_repositories', return_value={
+        f'test/{service_name}': {'repositoryUri': f'ecr/test/{service_name}'} for service_name in services
+    }).start()
+    return plugin
+
+
+class ProcessImagesTestCase(TestCase):
+    def setUp(self):
+        self.plugin = make_ecr_plugin(['web', 'worker'])
+        self.addCleanup(mock.patch.stopall)
+
+    def push(self, ctx):
+        return self.plugin.process_images(ctx, lambda service_name, image, run: run(f'docker push {image}'))
+
+    def test_reports_all_images(self):
+        ctx = FakeContext()
+
+        with mock.patch('sys.stdout') as stdout:
+            reports = self.push(ctx)
+
+        assert list(reports) == [
+            'ecr/test/web:v1', 'ecr/test/web:latest', 'ecr/test/worker:v1', 'ecr/test/worker:latest',
+        ]
+        assert reports['ecr/test/worker:v1']['service'] == 'worker'
+        assert all(report['bytes'] == 1048576 and report['error'] is None for report in reports.values())
+        pushes = [command for command in ctx.commands if command.startswith('docker push')]
+        assert sorted(pushes) == sorted(f'docker push {image}' for image in reports)
+
+        lines = ''.join(call.args[0] for call in stdout.write.call_args_list).splitlines()
+        assert '[worker:latest] docker push ecr/test/worker:latest done' in lines
+        assert '[web:v1]        docker push ecr/test/web:v1 done' in lines
+
+    def test_reports_failed_images(self):
+        reports = self.push(FakeContext(missing={'ecr/test/web:latest'}))
+
+        assert isinstance(reports['ecr/test/web:latest']['error'], UnexpectedExit)
+        assert reports['ecr/test/web:latest']['bytes'] is None
+        assert reports['ecr/test/web:v1']['error'] is None
+
+        with mock.patch('builtins.print'), self.assertRaises(ImageOperationError):
+            self.plugin.report_images(FakeContext(), reports, 'push')
+
+    def test_formats_summary(self):
+        summary = self.plugin.format_images_summary({
+            'ecr/test/web:v1': {'duration': 12.34, 'bytes': 150 * 1024 ** 2, 'error': None},
+            'ecr/test/web:latest': {'duration': 0.5, 'bytes': None, 'error': RuntimeError()},
+            'ecr/test/worker:v1': {'duration': 0.25, 'bytes': 1024 ** 2, 'skipped': True, 'error': None},
+        })
+
+        assert summary.splitlines() == [
+            'image                duration  size      status',
+            'ecr/test/web:v1      12.3s     150.0 MB  ok',
+            'ecr/test/web:latest  0.5s      -         failed',
+            'ecr/test/worker:v1   0.2s      1.0 MB    skipped',
+        ]
+
+
+class PushTestCase(TestCase):
+    def setUp(self):
+        self.ecr = FakeEcrClient()
+        self.plugin = make_ecr_plugin(['web', 'worker'], client=self.ecr)
+        self.addCleanup(mock.patch.stopall)
+
+    def push(self):
+        ctx = FakeContext(registry=self.ecr)
+        reports = self.plugin.process_images(
+            ctx, lambda service_name, image, run: self.plugin.push_service_image(ctx, service_name, image, run),
+            images=[('web', 'ecr/test/web:v1'), ('worker', 'ecr/test/worker:v1')],
+        )
+        return reports, [command for command in ctx.commands if command.startswith('docker push')]
+
+    def test_pushes_new_images_and_tags_them_as_latest(self):
+        reports, pushes = self.push()
+
+        assert sorted(pushes) == ['docker push ecr/test/web:v1', 'docker push ecr/test/worker:v1']
+        assert self.ecr.images['test/web'] == {'v1': 'sha256:web', 'latest': 'sha256:web'}
+        assert self.ecr.calls.count('put_image') == 2
+        assert not any(report['skipped'] for report in reports.values())
+
+    def test_skips_pushed_images(self):
+        self.push()
+        self.ecr.calls = []
+
+        reports, pushes = self.push()
+
+        assert pushes == []
+        assert self.ecr.calls == ['batch_get_image'] * 2
+        assert all(report['skipped'] and report['error'] is None for report in reports.values())
+
+    def test_only_tags_pushed_images_as_latest(self):
+        self.ecr.push('ecr/test/web:v1', 'sha256:web')
+        self.ecr.push('ecr/test/web:latest', 'sha256:old')
+
+        reports, pushes = self.push()
+
+        assert pushes == ['docker push ecr/test/worker:v1']
+        assert self.ecr.images['test/web']['latest'] == 'sha256:web'
+        assert reports['ecr/test/web:v1']['skipped'] is False
@@ -0,0 +1,554 @@
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from botocore.exceptions import ClientError
+
+from chops.plugins.aws.aws_envs import AwsEnvsPlugin
+from chops.plugins.aws.aws_ecs import AwsEcsPlugin, DeploymentError
+from chops.tests.test_waiter import FakeClock
+from chops.waiter import Waiter
+
+
+class FakePaginator(object):
+    def __init__(self, client, operation, page_size):
+        self.client = client
+        self.operation = operation
+        self.page_size = page_size
+
+    def paginate(self, **kwargs):
+        items_key, items = getattr(self.client, 'all_' + self.operation)(**kwargs)
+        for start in range(0, max(len(items), 1), self.page_size):
+            self.client.calls.append(self.operation)
+            yield {items_key: items[start:start + self.page_size]}
+
+
+class FakeEcsClient(object):
+    def __init__(self, instances_count=0):
+        self.calls = []
+        self.container_instances = {
+            f'arn:instance-{i}': {'containerInstanceArn': f'arn:instance-{i}', 'ec2InstanceId': f'i-{i}'}
+            for i in range(instances_count)
+        }
+
+        self.services = {}
+        self.task_defs = {}
+        self.tasks = []
+        # Number of throttled stop requests or error code by task ARN
+        self.stop_errors = {}
+
+    def get_paginator(self, operation):
+        return FakePaginator(self, operation, page_size=100)
+
+    def update_service(self, cluster, service, **kwargs):
+        self.calls.append('update_service')
+        self.services[service].update(kwargs)
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}, 'service': self.services[service]}
+
+    def describe_services(self, cluster, services):
+        self.calls.append('describe_services')
+        assert len(services) <= 10
+
+        described = []
+        for name in services:
+            if name not in self.services:
+                continue
+            service = self.services[name]
+            # Each service needs a few checks to converge to the desired count
+            service['checks'] = service.get('checks', 0) + 1
+            running = service['desiredCount'] if service['checks'] >= service['delay'] else 0
+            described.append({'serviceName': name, 'status': 'ACTIVE', 'runningCount': running})
+
+        return {'services': described}
+
+    def all_list_tasks(self, cluster, serviceName):
+        return 'taskArns', list(self.tasks)
+
+    def stop_task(self, cluster, task, reason):
+        self.calls.append('stop_task')
+        error = self.stop_errors.get(task)
+        if isinstance(error, int) and error > 0:
+            self.stop_errors[task] -= 1
+            error = 'ThrottlingException'
+        if isinstance(error, str):
+            raise ClientError({'Error': {'Code': error}}, 'StopTask')
+        self.tasks.remove(task)
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def all_list_task_definitions(self, familyPrefix, status='ACTIVE', sort='ASC'):
+        arns = [arn for arn in self.task_defs if arn.split('/')[1].startswith(familyPrefix)]
+        return 'taskDefinitionArns', sorted(
+            arns, key=lambda arn: (arn.split('/')[1].split(':')[0], int(arn.split(':')[-1])), reverse=sort == 'DESC',
+        )
+
+    def describe_task_definition(self, taskDefinition, include):
+        self.calls.append('describe_task_definition')
+        return dict(self.task_defs[taskDefinition])
+
+    def register_task_definition(self, family, tags, **kwargs):
+        self.calls.append('register_task_definition')
+        revision = 1 + sum(1 for arn in self.task_defs if arn.split('/')[1].split(':')[0] == family)
+        arn = f'arn:task-definition/{family}:{revision}'
+        task_def = {'family': family, 'revision': revision, 'taskDefinitionArn': arn, 'status': 'ACTIVE', **kwargs}
+        self.task_defs[arn] = {'taskDefinition': task_def, 'tags': tags}
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}, 'taskDefinition': task_def, 'tags': tags}
+
+    def all_list_container_instances(self, cluster):
+        return 'containerInstanceArns', list(self.container_instances)
+
+    def describe_container_instances(self, cluster, containerInstances):
+        self.calls.append('describe_container_instances')
+        assert len(containerInstances) <= 100
+        return {'containerInstances': [dict(self.container_instances[arn]) for arn in containerInstances]}
+
+
+class FakeEc2Client(object):
+    def __init__(self):
+        self.calls = []
+
+    def get_paginator(self, operation):
+        return FakePaginator(self, operation, page_size=1000)
+
+    def all_describe_instances(self, InstanceIds):
+        return 'Reservations', [
+            {'Instances': [{'InstanceId': instance_id, 'NetworkInterfaces': []}]} for instance_id in InstanceIds
+        ]
+
+
+def make_ecs_plugin(clients, config=None, env='prod', build_path=None):
+    """Creates ECS plugin which talks to the fake clients."""
+    app = SimpleNamespace(
+        config={'build_path': build_path},
+        plugins={
+            'aws': SimpleNamespace(
+                get_client=lambda service_name, region_name=None: clients[service_name],
+                get_inventory=lambda: None,
+                config={'project_name': 'test', 'profile': 'default'},
+            ),
+            'aws_envs': AwsEnvsPlugin(
+                {'environments': {env: {}}, 'default': env}, SimpleNamespace(plugins={'aws': None}),
+            ),
+        },
+    )
+
+    return AwsEcsPlugin({
+        'namespace': 'test',
+        'services': {},
+        'task_definitions': {},
+        **(config or {}),
+    }, app, logging.getLogger('test'))
+
+
+class ContainerInstancesTestCase(TestCase):
+    def setUp(self):
+        self.ecs = FakeEcsClient(instances_count=250)
+        self.ec2 = FakeEc2Client()
+        self.plugin = make_ecs_plugin({'ecs': self.ecs, 'ec2': self.ec2})
+
+    def test_describes_instances_in_batches(self):
+        instances = self.plugin.get_container_instances('test-prod')
+
+        assert len(instances) == 250
+        assert all(instance['ec2_instance']['InstanceId'] == instance['ec2InstanceId'] for instance in instances)
+        assert self.ecs.calls.count('list_container_instances') == 3
+        assert self.ecs.calls.count('describe_container_instances') == 3
+        assert self.ec2.calls == ['describe_instances'] * 2
+
+    def test_empty_cluster(self):
+        self.ecs.container_instances = {}
+
+        assert self.plugin.get_container_instances('test-prod') == []
+        assert self.ecs.calls == ['list_container_instances']
+        assert self.ec2.calls == []
+
+
+class ServicesWaitTestCase(TestCase):
+    def setUp(self):
+        self.ecs = FakeEcsClient()
+        self.plugin = make_ecs_plugin({'ecs': self.ecs}, config={
+            'services': {f'service-{i}': {'tasks_count': 2} for i in range(12)},
+        })
+        for i in range(12):
+            self.ecs.services[f'test-service-{i}'] = {'desiredCount': 0, 'delay': 2 + i % 3}
+
+        self.clock = FakeClock()
+        waiter = Waiter(delay=1, factor=2, jitter=0, sleep=self.clock.sleep, clock=self.clock)
+        mock.patch.object(self.plugin, 'get_waiter', return_value=waiter).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_waits_for_all_services_at_once(self):
+        for service_name in self.plugin.get_services_names():
+            self.plugin.start_service(service_name)
+
+        counts = {service_name: 2 for service_name in self.plugin.get_services_names()}
+        started = self.plugin.await_services_running_count(counts)
+
+        assert started == {service_name: True for service_name in counts}
+        # Services are described in batches of 10 and only until they are settled
+        assert self.ecs.calls.count('describe_services') == 2 + 2 + 1 + 1
+        assert self.clock.sleeps == [1, 2, 4]
+
+    def test_awaits_rolling_deployments(self):
+        def service(*deployments):
+            return {'status': 'ACTIVE', 'deployments': [
+                {'status': status, 'runningCount': running, 'desiredCount': 2, 'rolloutState': state}
+                for status, running, state in deployments
+            ]}
+
+        states = iter([
+            {'web': service(('PRIMARY', 1, 'IN_PROGRESS'), ('ACTIVE', 2, 'COMPLETED')),
+             'worker': service(('PRIMARY', 0, 'IN_PROGRESS'), ('ACTIVE', 2, 'COMPLETED'))},
+            {'web': service(('ACTIVE', 2, 'COMPLETED')),
+             'worker': service(('PRIMARY', 0, 'IN_PROGRESS'), ('ACTIVE', 2, 'COMPLETED'))},
+            {'web': service(('PRIMARY', 2, 'COMPLETED')),
+             'worker': service(('PRIMARY', 0, 'FAILED'), ('ACTIVE', 2, 'COMPLETED'))},
+        ])
+
+        with mock.patch.object(self.plugin, 'get_services_info', side_effect=lambda names: next(states)):
+            assert self.plugin.await_services_steady(['web', 'worker']) == {'web': True, 'worker': False}
+        assert self.clock.sleeps == [1, 2]
+
+    def test_does_not_wait_for_missing_services(self):
+        self.ecs.services = {}
+
+        assert self.plugin.await_service_running_count('service-0', 2) is False
+        assert self.clock.sleeps == []
+
+
+class DeployTestCase(TestCase):
+    def setUp(self):
+        self.plugin = make_ecs_plugin({}, config={
+            'services': {
+                'web': {'task_definition': 'app'},
+                'worker': {'task_definition': 'app'},
+                'broken': {},
+            },
+            'task_definitions': {'app': {}, 'broken': {}, 'migrate': {}},
+            'parallel': 3,
+        })
+        self.registered = []
+        self.created = []
+
+        self.updated = []
+        self.existing = set()
+
+        def register_task(task_name):
+            self.registered.append(task_name)
+            return {'family': task_name, 'revision': 1, 'taskDefinitionArn': f'arn:{task_name}:1'}, True
+
+        def create_service(service_name):
+            if service_name == 'broken':
+                raise DeploymentError('Unable to create service.')
+            self.created.append(service_name)
+
+        for name, value in {
+            'service_exists': lambda service_name: service_name in self.existing,
+            'update_service': lambda service_name, arn: self.updated.append((service_name, arn)),
+            'await_service_steady': lambda service_name: True,
+            'register_task': register_task,
+            'create_service': create_service,
+            'start_service': lambda service_name: None,
+            'await_service_running_count': lambda service_name, count: True,
+        }.items():
+            mock.patch.object(self.plugin, name, side_effect=value).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_isolates_failed_services(self):
+        reports = self.plugin.deploy_services()
+
+        assert sorted(self.created) == ['web', 'worker']
+        assert reports['web']['error'] is None and reports['worker']['error'] is None
+        assert isinstance(reports['broken']['error'], DeploymentError)
+        assert list(reports['web']['timings']) == ['delete', 'register', 'create', 'start']
+        assert list(reports['broken']['timings']) == ['delete', 'register', 'create']
+
+    def test_registers_task_definitions_once(self):
+        self.plugin.deploy_services()
+
+        assert sorted(self.registered) == ['app', 'broken', 'migrate']
+
+    def test_updates_existing_services_in_rolling_mode(self):
+        self.existing = {'web', 'broken'}
+
+        reports = self.plugin.deploy_services(mode='rolling')
+
+        assert sorted(self.updated) == [('broken', 'arn:broken:1'), ('web', 'arn:app:1')]
+        assert self.created == ['worker']
+        assert all(report['error'] is None for report in reports.values())
+        assert list(reports['web']['timings']) == ['register', 'update']
+        assert list(reports['worker']['timings']) == ['register', 'create', 'start']
+
+    def test_formats_summary(self):
+        summary = self.plugin.format_deploy_summary({
+            'web': {'timings': {'delete': 1.0, 'register': 0.25, 'create': 0.5, 'start': 30.0}, 'error': None},
+            'broken': {'timings': {'delete': 0.5, 'register': 0.25, 'create': 0.05}, 'error': DeploymentError()},
+        })
+
+        assert summary.splitlines() == [
+            'service      delete  register  create  start  total  status',
+            'test-web     1.0s    0.2s      0.5s    30.0s  31.8s  ok',
+            'test-broken  0.5s    0.2s      0.1s    -      0.8s   failed',
+        ]
+
+
+class UpdateServiceTestCase(TestCase):
+    def setUp(self):
+        self.ecs = FakeEcsClient()
+        self.ecs.services['test-web'] = {'desiredCount': 3}
+
+    def test_keeps_desired_count_unless_configured(self):
+        plugin = make_ecs_plugin({'ecs': self.ecs}, config={'services': {'web': {}}})
+
+        service = plugin.update_service('web', 'arn:app:2')
+
+        assert service['desiredCount'] == 3
+        assert service['taskDefinition'] == 'arn:app:2'
+
+    def test_rolls_single_task_service_with_default_configuration(self):
+        plugin = make_ecs_plugin({'ecs': self.ecs}, config={'services': {'web': {'tasks_count': 1}}})
+
+        service = plugin.update_service('web', 'arn:app:2')
+
+        assert service['desiredCount'] == 1
+        assert service['deploymentConfiguration'] == {'maximumPercent': 200, 'minimumHealthyPercent': 100}
+
+    def test_rejects_configuration_which_can_not_replace_tasks(self):
+        plugin = make_ecs_plugin({'ecs': self.ecs}, config={
+            'services': {'web': {'tasks_count': 1}},
+            'deployment_configuration': {'maximumPercent': 100, 'minimumHealthyPercent': 50},
+        })
+
+        with self.assertRaises(DeploymentError):
+            plugin.update_service('web', 'arn:app:2')
+        assert 'update_service' not in self.ecs.calls
+
+
+class RegisterTaskTestCase(TestCase):
+    def setUp(self):
+        self.build_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.build_dir.cleanup)
+        self.ecs = FakeEcsClient()
+        self.definitions = {'app': {'cpu': '256', 'containerDefinitions': [{'name': 'web', 'image': 'web:1'}]}}
+        self.plugin = self.make_plugin()
+
+    def make_plugin(self):
+        plugin = make_ecs_plugin({'ecs': self.ecs}, build_path=self.build_dir.name, config={
+            'task_definitions': {'app': {}},
+        })
+        mock.patch.object(plugin, 'get_task_definition', side_effect=lambda task_name: {
+            **self.definitions[task_name], 'family': plugin.get_task_definition_name(task_name),
+        }).start()
+        self.addCleanup(mock.patch.stopall)
+        return plugin
+
+    def test_skips_unchanged_definitions(self):
+        task_def, is_registered = self.plugin.register_task('app')
+        assert is_registered and task_def['revision'] == 1
+
+        # Key order does not matter
+        self.definitions['app'] = dict(reversed(list(self.definitions['app'].items())))
+        task_def, is_registered = self.plugin.register_task('app')
+        assert not is_registered and task_def['taskDefinitionArn'] == 'arn:task-definition/test-app:1'
+
+        self.definitions['app']['cpu'] = '512'
+        task_def, is_registered = self.plugin.register_task('app')
+        assert is_registered and task_def['revision'] == 2
+
+        task_def, is_registered = self.plugin.register_task('app', force=True)
+        assert is_registered and task_def['revision'] == 3
+        assert self.ecs.calls.count('register_task_definition') == 3
+
+    def test_reuses_cached_revisions(self):
+        self.plugin.register_task('app')
+        self.plugin = self.make_plugin()
+        self.plugin.register_task('app')
+
+        assert 'describe_task_definition' not in self.ecs.calls
+
+        # Revisions registered elsewhere are described once
+        self.ecs.register_task_definition(family='test-app', tags=[], cpu='256')
+        self.plugin = self.make_plugin()
+        task_def, is_registered = self.plugin.register_task('app')
+
+        assert is_registered and task_def['revision'] == 3
+        assert self.ecs.calls.count('describe_task_definition') == 1
+
+    def test_ignores_other_families_with_the_same_prefix(self):
+        self.plugin.register_task('app')
+        self.ecs.register_task_definition(family='test-app-worker', tags=[], cpu='256')
+
+        assert self.plugin.get_latest_task_def_arn('app') == 'arn:task-definition/test-app:1'
+        assert self.plugin.register_task('app')[1] is False
+
+
+    def test_describes_only_uncached_revisions(self):
+        for cpu in ['256', '512']:
+            self.definitions['app']['cpu'] = cpu
+            self.plugin.register_task('app')
+        for _ in range(3):
+            self.ecs.register_task_definition(family='test-app', tags=[], cpu='1024')
+
+        arns = self.plugin.get_task_def_arns('app')
+        descriptions = self.plugin.describe_task_defs(arns)
+
+        assert list(descriptions) == arns
+        assert [d['taskDefinition']['revision'] for d in descriptions.values()] == [1, 2, 3, 4, 5]
+        assert self.ecs.calls.count('describe_task_definition') == 3
+
+        self.plugin = self.make_plugin()
+        assert self.plugin.describe_task_defs(arns) == descriptions
+        assert self.ecs.calls.count('describe_task_definition') == 3
+
+    def test_does_not_cache_mutable_fields(self):
+        self.ecs.register_task_definition(family='test-app', tags=[{'key': 'team', 'value': 'web'}], cpu='256')
+        arn = 'arn:task-definition/test-app:1'
+        self.ecs.task_defs[arn]['taskDefinition'].update(status='INACTIVE', deregisteredAt='2026-01-01')
+
+        for plugin in [self.plugin, self.make_plugin()]:
+            description = plugin.describe_task_defs([arn])[arn]
+
+            assert description == {
+                'taskDefinition': {'family': 'test-app', 'revision': 1, 'taskDefinitionArn': arn, 'cpu': '256'},
+                'definition_hash': None,
+            }
+        assert self.ecs.calls.count('describe_task_definition') == 1
+
+
+class ContainerDefinitionsTestCase(TestCase):
+    def setUp(self):
+        self.plugin = make_ecs_plugin({})
+        self.hosts_envs = []
+
+        def get_access_hosts():
+            self.hosts_envs.append(self.plugin.get_current_env())
+            return ['test.elb']
+
+        for name, value in {
+            'get_access_hosts': get_access_hosts,
+            'get_credentials': lambda: SimpleNamespace(access_key='key', secret_key='secret'),
+            'get_aws_region': lambda: 'eu-west-1',
+            'get_bucket_name': lambda env: f'test-{env}',
+        }.items():
+            mock.patch.object(self.plugin, name, side_effect=value).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_discovers_aws_env_setup_once(self):
+        containers = {
+            name: {'image': name, 'logConfiguration': {}, '__requires_aws_env_setup__': True}
+            for name in ['web', 'worker', 'beat']
+        }
+        containers['proxy'] = {'image': 'nginx', 'logConfiguration': {}}
+        containers['web']['environment'] = [{'name': 'DEBUG', 'value': '0'}]
+
+        definitions = {d['name']: d for d in self.plugin.process_container_definitions(containers)}
+
+        assert self.hosts_envs == ['prod']
+        assert self.plugin.get_credentials.call_count == 1
+        assert 'environment' not in definitions['proxy']
+        assert definitions['web']['environment'][0] == {'name': 'DEBUG', 'value': '0'}
+        assert definitions['web']['environment'][1:] == definitions['worker']['environment']
+        assert {'name': 'ALLOW_HOSTS', 'value': 'test.elb'} in definitions['beat']['environment']
+
+    def test_reuses_aws_env_setup_across_task_definitions(self):
+        containers = {'web': {'image': 'web', 'logConfiguration': {}, '__requires_aws_env_setup__': True}}
+
+        for _ in range(3):
+            self.plugin.process_container_definitions(containers)
+        with self.plugin.app.plugins['aws_envs'].using('dev'):
+            definitions = self.plugin.process_container_definitions(containers)
+
+        assert self.hosts_envs == ['prod', 'dev']
+        assert self.plugin.get_credentials.call_count == 2
+        assert {'name': 'APP_ENV', 'value': 'dev'} in definitions[0]['environment']
+
+    def test_hashes_definitions_independently_of_hash_seed(self):
+        # Hosts are collected into a set, so their order depends on the hash seed of the process
+        script = textwrap.dedent("""
+            from types import SimpleNamespace
+            from unittest import mock
+            from chops.plugins.aws.aws_ecs_revisions import get_definition_hash
+            from chops.tests.test_aws_ecs import make_ecs_plugin
+
+            plugin = make_ecs_plugin({})
+            instances = [{'ec2_instance': {'NetworkInterfaces': [{'Association': {
+                'PublicDnsName': f'host-{i}.example.com', 'PublicIp': f'10.0.0.{i}',
+            }}]}} for i in range(20)]
+            mock.patch.object(plugin, 'balancer_exists', return_value=False).start()
+            mock.patch.object(plugin, 'get_container_instances', return_value=instances).start()
+            credentials = SimpleNamespace(access_key='key', secret_key='secret')
+            mock.patch.object(plugin, 'get_credentials', return_value=credentials).start()
+            mock.patch.object(plugin, 'get_aws_region', return_value='eu-west-1').start()
+            mock.patch.object(plugin, 'get_bucket_name', return_value='test-prod').start()
+
+            print(get_definition_hash({'containerDefinitions': plugin.process_container_definitions({
+                'web': {'image': 'web', 'logConfiguration': {}, '__requires_aws_env_setup__': True},
+            })}))
+        """)
+
+        hashes = set()
+        for seed in ['1', '2']:
+            hashes.add(subprocess.run(
+                [sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                env={**os.environ, 'PYTHONHASHSEED': seed},
+                cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            ).stdout.strip())
+
+        assert len(hashes) == 1
+
+    def test_skips_discovery_without_aws_env_setup(self):
+        self.plugin.process_container_definitions({'proxy': {'image': 'nginx', 'logConfiguration': {}}})
+
+        assert self.hosts_envs == []
+        assert self.plugin.get_credentials.call_count == 0
+
+
+class StopTasksTestCase(TestCase):
+    def setUp(self):
+        self.ecs = FakeEcsClient()
+        self.ecs.tasks = [f'arn:task-{i}' for i in range(150)]
+        self.plugin = make_ecs_plugin({'ecs': self.ecs})
+
+        self.clock = FakeClock()
+        waiter = Waiter(delay=1, factor=2, jitter=0, sleep=self.clock.sleep, clock=self.clock)
+        mock.patch.object(self.plugin, 'get_waiter', return_value=waiter).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_stops_tasks_of_all_pages(self):
+        result = self.plugin.stop_all_service_tasks('web')
+
+        assert len(result['stopped']) == 150 and result['failed'] == {}
+        assert self.ecs.tasks == []
+        assert self.ecs.calls.count('list_tasks') == 2
+
+    def test_retries_throttled_requests(self):
+        self.ecs.stop_errors = {'arn:task-1': 2, 'arn:task-2': 10, 'arn:task-3': 'AccessDeniedException'}
+
+        result = self.plugin.stop_all_service_tasks('web')
+
+        assert len(result['stopped']) == 148 and 'arn:task-1' in result['stopped']
+        assert sorted(result['failed']) == ['arn:task-2', 'arn:task-3']
+        assert self.ecs.calls.count('stop_task') == 150 + 2 + 4
+        assert sorted(self.clock.sleeps) == [1, 1, 2, 2, 4, 8]
+
+
+class PaginateTestCase(TestCase):
+    def setUp(self):
+        self.ecs = FakeEcsClient(instances_count=250)
+        self.plugin = make_ecs_plugin({'ecs': self.ecs})
+
+    def test_yields_items_of_all_pages(self):
+        arns = list(self.plugin.paginate('list_container_instances', 'containerInstanceArns', cluster='test-prod'))
+
+        assert arns == list(self.ecs.container_instances)
+        assert self.ecs.calls == ['list_container_instances'] * 3
+
+    def test_requests_pages_lazily(self):
+        arns = self.plugin.paginate('list_container_instances', 'containerInstanceArns', cluster='test-prod')
+
+        assert next(arns) == 'arn:instance-0'
+        assert self.ecs.calls == ['list_container_instances']
@@ -0,0 +1,116 @@
+import logging
+import pickle
+import threading
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from chops.plugins.aws.aws_envs import AwsEnvsPlugin, AwsEnvsPluginMixin
+from chops.plugins.aws.aws_service_plugin import AwsServicePlugin
+from chops.settings_loader import SettingsSnapshot, get_env_configs
+
+
+class AwsEnvsTestCase(TestCase):
+    def setUp(self):
+        self.plugin = AwsEnvsPlugin({
+            'environments': {'prod': {}, 'staging': {}, 'dev': {}},
+            'default': 'prod',
+        }, SimpleNamespace(plugins={'aws': None}), logging.getLogger('test'))
+
+    def test_switches_environment_per_thread(self):
+        seen = {}
+
+        with self.plugin.using('dev'):
+            thread = threading.Thread(target=lambda: seen.setdefault('other', self.plugin.current))
+            thread.start()
+            thread.join()
+            seen['inside'] = self.plugin.current
+
+        assert seen == {'other': 'prod', 'inside': 'dev'}
+        assert self.plugin.current == 'prod'
+
+    def test_maps_environments_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def describe(app_env):
+            barrier.wait()
+            return self.plugin.current
+
+        results = list(self.plugin.map_envs(describe, ['*']))
+
+        assert results == [('dev', 'dev'), ('prod', 'prod'), ('staging', 'staging')]
+
+    def test_completes_other_environments_on_failure(self):
+        completed = []
+
+        def create(app_env):
+            if app_env == 'dev':
+                raise RuntimeError(app_env)
+            completed.append(app_env)
+            return app_env
+
+        results = []
+        with self.assertRaises(RuntimeError):
+            for app_env, result in self.plugin.map_envs(create, ['*']):
+                results.append(result)
+
+        assert results == ['prod', 'staging']
+        assert sorted(completed) == ['prod', 'staging']
+
+    def test_maps_current_environment_by_default(self):
+        assert list(self.plugin.map_envs(lambda app_env: app_env.upper())) == [('prod', 'PROD')]
+
+    def test_prefetches_specified_environment(self):
+        seen = []
+        service_plugin = mock.Mock(spec=AwsServicePlugin)
+        service_plugin.prefetch.side_effect = lambda: seen.append(self.plugin.current)
+        # Plugins are lazy proxies in the application
+        self.plugin.app.plugins = {
+            'aws_envs': SimpleNamespace(materialise=lambda: self.plugin),
+            'aws_ssm': SimpleNamespace(materialise=lambda: service_plugin),
+        }
+
+        self.plugin.prefetch('staging')
+
+        assert seen == ['staging']
+        assert self.plugin.current == 'prod'
+
+
+class EnvConfigPlugin(AwsEnvsPluginMixin):
+    name = 'example'
+
+    def __init__(self, settings, env_configs=None):
+        self.app = SimpleNamespace(
+            config=settings,
+            settings_snapshot=SettingsSnapshot(settings, env_configs if env_configs is not None else {}),
+            plugins={'aws_envs': SimpleNamespace(current='prod')},
+        )
+        self.config = settings[self.name]
+
+
+class EnvConfigTestCase(TestCase):
+    def setUp(self):
+        self.settings = {'example': {
+            'services': {'web': {'tasks_count': 1}},
+            'task_definitions': {'web': {'cpu': 256}},
+            '__environments__': {
+                'prod': {'services': {'web': {'tasks_count': 3}}},
+                'dev': {'services': {'web': {'tasks_count': 0}}},
+            },
+        }}
+
+    def assert_shares_values(self, plugin):
+        prod, dev = plugin.env_config('prod'), plugin.env_config('dev')
+
+        assert (prod['services']['web']['tasks_count'], dev['services']['web']['tasks_count']) == (3, 0)
+        assert prod['task_definitions'] is dev['task_definitions']
+        assert plugin.env_config('prod') is prod
+
+    def test_shares_values_which_are_not_overridden(self):
+        self.assert_shares_values(EnvConfigPlugin(self.settings))
+
+    def test_shares_values_of_snapshot_configs(self):
+        # Snapshot is pickled with settings, so environment configs still share values with them
+        settings, env_configs = pickle.loads(pickle.dumps((self.settings, get_env_configs(self.settings))))
+        plugin = EnvConfigPlugin(settings, env_configs)
+
+        self.assert_shares_values(plugin)
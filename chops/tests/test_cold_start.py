@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from unittest import TestCase
+
+from chops import utils
+
+
+# Generous enough for slow CI runners, but way below what eager boto3 sessions and clients used to cost
+COLD_START_BUDGET = float(os.environ.get('CHOPS_COLD_START_BUDGET', 1.5))
+
+SETTINGS = textwrap.dedent("""
+    import os
+
+    HERE = os.path.abspath(os.path.dirname(__file__))
+    SETTINGS = dict()
+
+    SETTINGS['project_name'] = 'coldstart'
+    SETTINGS['project_path'] = HERE
+    SETTINGS['plugin_paths'] = []
+    SETTINGS['build_path'] = os.path.join(HERE, '.build')
+    SETTINGS['log_dir'] = os.path.join(HERE, '.logs')
+
+    SETTINGS['plugins'] = [
+        'chops.plugins.dotenv',
+        'chops.plugins.aws',
+        'chops.plugins.aws.aws_envs',
+        'chops.plugins.aws.aws_s3',
+        'chops.plugins.aws.aws_logs',
+        'chops.plugins.aws.aws_ssm',
+    ]
+
+    SETTINGS['dotenv'] = {
+        'dotenv_file': os.path.join(HERE, '.env'),
+        'template': os.path.join(HERE, 'env.template'),
+        'template_lock': os.path.join(HERE, 'env.template.lock'),
+    }
+    SETTINGS['aws'] = {'profile': 'chops-cold-start-missing-profile', 'project_name': 'coldstart'}
+    SETTINGS['aws_envs'] = {'environments': {'prod': {}}, 'default': 'prod'}
+    SETTINGS['aws_s3'] = {'namespace': 'coldstart'}
+    SETTINGS['aws_logs'] = {'namespace': '/coldstart'}
+    SETTINGS['aws_ssm'] = {'namespace': '/coldstart'}
+""")
+
+SCRIPT = textwrap.dedent("""
+    import sys
+    import time
+
+    started = time.time()
+
+    from chops.core import ChopsApplication
+
+    app = ChopsApplication()
+    constructed = sorted(name for name, plugin in app.plugins.items() if plugin.is_materialised)
+    app.program.run(['chops'] + sys.argv[1:], exit=False)
+
+    elapsed = time.time() - started
+    loaded = sorted(m for m in ('boto3', 'botocore.session', 'botocore.client') if m in sys.modules)
+    print('COLD_START', elapsed, ','.join(loaded))
+    print('CONSTRUCTED', ','.join(constructed))
+""")
+
+
+class ColdStartTestCase(TestCase):
+    def setUp(self):
+        self.project_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.project_dir.name, utils.CHOPS_SETTINGS_FILE), 'w') as f:
+            f.write(SETTINGS)
+
+    def tearDown(self):
+        self.project_dir.cleanup()
+
+    def run_chops(self, *args):
+        env = {
+            **os.environ,
+            'PYTHONPATH': os.pathsep.join([os.path.dirname(utils.PACKAGE_PATH), os.environ.get('PYTHONPATH', '')]),
+        }
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT] + list(args),
+            cwd=self.project_dir.name, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+        self.output = result.stdout
+        report = [line for line in result.stdout.splitlines() if line.startswith('COLD_START')][-1].split(' ')
+        return float(report[1]), report[2] if len(report) > 2 else ''
+
+    def get_constructed_plugins(self):
+        report = [line for line in self.output.splitlines() if line.startswith('CONSTRUCTED')][-1].split(' ')
+        return report[1].split(',') if len(report) > 1 and report[1] else []
+
+    def test_version_does_not_touch_boto3(self):
+        elapsed, loaded = self.run_chops('version')
+        assert loaded == '', f'AWS SDK modules loaded during "chops version": {loaded}'
+        assert elapsed < COLD_START_BUDGET, f'"chops version" took {elapsed:.2f}s'
+
+    def test_list_does_not_touch_boto3(self):
+        elapsed, loaded = self.run_chops('--list')
+        assert loaded == '', f'AWS SDK modules loaded during "chops --list": {loaded}'
+        assert elapsed < COLD_START_BUDGET, f'"chops --list" took {elapsed:.2f}s'
+
+    def test_constructs_only_invoked_plugins(self):
+        self.run_chops('aws-ssm.info')
+        # aws_logs and aws_s3 are neither invoked nor required by aws_ssm
+        assert self.get_constructed_plugins() == ['aws', 'aws_envs', 'aws_ssm', 'dotenv']
+        assert "'namespace': '/coldstart'" in self.output
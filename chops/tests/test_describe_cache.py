@@ -0,0 +1,215 @@
+import logging
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from botocore.exceptions import ClientError
+
+from chops.plugins.aws.aws_elb import AwsElbPlugin
+from chops.plugins.aws.aws_inventory import Inventory
+
+OK = {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+class FakeElbClient(object):
+    def __init__(self):
+        self.calls = []
+        self.balancers = []
+        self.target_groups = {}
+
+    def describe_load_balancers(self, Names):
+        self.calls.append('describe_load_balancers')
+        balancers = [b for b in self.balancers if b['LoadBalancerName'] in Names]
+        if not balancers:
+            raise ClientError({'Error': {'Code': 'LoadBalancerNotFound'}}, 'DescribeLoadBalancers')
+        return {**OK, 'LoadBalancers': balancers}
+
+    def create_load_balancer(self, Name, **kwargs):
+        self.calls.append('create_load_balancer')
+        balancer = {
+            'LoadBalancerName': Name, 'LoadBalancerArn': f'arn:{Name}', 'DNSName': f'{Name}.elb', 'VpcId': 'vpc-1',
+        }
+        self.balancers.append(balancer)
+        return {**OK, 'LoadBalancers': [balancer]}
+
+    def describe_target_groups(self, Names):
+        self.calls.append('describe_target_groups')
+        if Names[0] not in self.target_groups:
+            raise ClientError({'Error': {'Code': 'TargetGroupNotFound'}}, 'DescribeTargetGroups')
+        return {**OK, 'TargetGroups': [self.target_groups[Names[0]]]}
+
+    def create_target_group(self, Name, VpcId, **kwargs):
+        self.calls.append('create_target_group')
+        self.target_groups[Name] = {'TargetGroupName': Name, 'TargetGroupArn': f'arn:{Name}'}
+        return {**OK, 'TargetGroups': [self.target_groups[Name]]}
+
+
+class ElbDescribeCacheTestCase(TestCase):
+    inventory = None
+
+    def setUp(self):
+        self.client = FakeElbClient()
+        self.plugin = self.make_plugin()
+
+    def make_plugin(self):
+        self.envs = SimpleNamespace(current='prod')
+        app = SimpleNamespace(plugins={
+            'aws': SimpleNamespace(
+                get_client=lambda service_name: self.client,
+                get_inventory=lambda: self.inventory,
+                get_aws_region=lambda: 'eu-west-1',
+                config={'project_name': 'test', 'profile': 'default'},
+            ),
+            'aws_envs': self.envs,
+            'aws_ec2': SimpleNamespace(
+                get_vpc_id=lambda: 'vpc-1',
+                get_subnet_ids=lambda: ['subnet-1'],
+                get_security_group_id=lambda name: 'sg-1',
+            ),
+        })
+        return AwsElbPlugin({
+            'namespace': 'test',
+            'target_groups': {'web': {'Protocol': 'HTTP', 'Port': 80}},
+            'security_group': 'balancer',
+        }, app, logging.getLogger('test'))
+
+    def test_reuses_balancer_details(self):
+        assert not self.plugin.balancer_exists()
+
+        with mock.patch.object(self.plugin, 'get_aws_project_name', return_value='test'):
+            self.plugin.create_balancer()
+
+        assert self.plugin.balancer_exists()
+        assert self.plugin.get_balancer_arn() == 'arn:test-prod'
+        assert self.plugin.get_balancer_dns() == 'test-prod.elb'
+        assert self.client.calls.count('describe_load_balancers') == 2
+
+        cache = self.plugin.describe_cache
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_invalidates_target_groups_on_creation(self):
+        self.plugin.create_target_groups()
+
+        assert self.plugin.get_target_group_arn('web') == 'arn:test-prod-web'
+        assert self.plugin.target_group_exists('web')
+        assert self.client.calls.count('describe_target_groups') == 2
+
+    def test_caches_per_environment(self):
+        self.plugin.balancer_exists()
+        self.envs.current = 'dev'
+        self.plugin.balancer_exists()
+        self.plugin.balancer_exists()
+
+        assert self.client.calls.count('describe_load_balancers') == 2
+
+
+class ElbInventoryTestCase(ElbDescribeCacheTestCase):
+    def setUp(self):
+        self.build_dir = tempfile.TemporaryDirectory()
+        self.inventory = self.make_inventory()
+        super().setUp()
+
+    def tearDown(self):
+        self.inventory.flush()
+        self.build_dir.cleanup()
+
+    def make_inventory(self, **kwargs):
+        # Balancers and target groups are persisted only if configured
+        kwargs.setdefault('ttl', {'balancer': 3600, 'target_group': 3600})
+        return Inventory(os.path.join(self.build_dir.name, 'inventory.yml'), **kwargs)
+
+    def create_balancer(self):
+        with mock.patch.object(self.plugin, 'get_aws_project_name', return_value='test'):
+            self.plugin.create_balancer()
+
+    def test_persists_between_invocations(self):
+        self.create_balancer()
+        self.plugin.create_target_groups()
+        self.plugin.prefetch()
+        self.inventory.flush()
+
+        self.inventory = self.make_inventory()
+        self.plugin = self.make_plugin()
+        self.client.calls = []
+
+        assert self.plugin.get_balancer_arn() == 'arn:test-prod'
+        assert self.plugin.get_target_group_arn('web') == 'arn:test-prod-web'
+        assert self.client.calls == []
+
+        # Other environments and regions are still discovered
+        self.envs.current = 'dev'
+        assert not self.plugin.balancer_exists()
+        assert self.client.calls == ['describe_load_balancers']
+
+    def test_checks_existence_in_aws(self):
+        self.create_balancer()
+        self.plugin.get_balancer_info()
+        self.inventory.flush()
+
+        # Balancer is deleted elsewhere
+        self.client.balancers = []
+        self.inventory = self.make_inventory()
+        self.plugin = self.make_plugin()
+
+        assert self.plugin.get_balancer_arn() == 'arn:test-prod'
+        assert not self.plugin.balancer_exists()
+        assert self.plugin.get_balancer_info() is None
+
+    def test_persists_only_stable_resources_by_default(self):
+        self.inventory = self.make_inventory(ttl={})
+        self.plugin = self.make_plugin()
+        self.create_balancer()
+        self.plugin.get_balancer_info()
+
+        assert self.inventory.lookup(('default', 'eu-west-1'), ('balancer', 'prod')) == (False, None)
+
+    def test_does_not_persist_missing_resources(self):
+        assert not self.plugin.balancer_exists()
+        assert self.inventory.lookup(('default', 'eu-west-1'), ('balancer', 'prod')) == (False, None)
+
+    def test_writes_inventory_only_when_changed(self):
+        path = os.path.join(self.build_dir.name, 'inventory.yml')
+        self.inventory.flush()
+        assert not os.path.exists(path)
+
+        self.create_balancer()
+        self.plugin.get_balancer_info()
+        self.inventory.flush()
+        assert os.path.isfile(path)
+
+    def test_ignores_unserializable_entries(self):
+        self.inventory.save(('default', 'eu-west-1'), ('balancer', 'prod'), object())
+
+        with self.assertLogs(self.inventory.logger, 'WARNING'):
+            self.inventory.flush()
+
+        # Inventory is still dirty, so it is written once the broken entry is gone
+        self.inventory.discard(('default', 'eu-west-1'))
+
+    def test_expires_entries(self):
+        self.inventory.ttl['balancer'] = 60
+        self.create_balancer()
+        self.plugin.get_balancer_info()
+
+        self.plugin = self.make_plugin()
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.plugin.get_balancer_info()
+
+        assert self.client.calls.count('describe_load_balancers') == 2
+
+    def test_refreshes_entries(self):
+        self.create_balancer()
+        self.plugin.get_balancer_info()
+
+        self.inventory.refresh = True
+        self.plugin = self.make_plugin()
+        self.plugin.get_balancer_info()
+
+        assert self.client.calls.count('describe_load_balancers') == 2
+        assert self.inventory.lookup(('default', 'eu-west-1'), ('balancer', 'prod')) == (False, None)
+
+        self.inventory.refresh = False
+        found, info = self.inventory.lookup(('default', 'eu-west-1'), ('balancer', 'prod'))
+        assert found and info['LoadBalancerArn'] == 'arn:test-prod'
@@ -0,0 +1,137 @@
+import collections.abc
+import copy
+import os
+import timeit
+from unittest import TestCase, skipUnless
+
+from chops.utils import deep_merge, is_dict_like_list
+
+# Timing comparisons depend on the machine load, so they run only if requested
+RUN_BENCHMARKS = os.environ.get('CHOPS_BENCHMARKS', '') not in ('', '0')
+
+
+def legacy_deep_merge(dct: dict, merge_dct: dict, add_keys=True, merge_list_maps=True):
+    """The original implementation of `deep_merge` kept as a reference for the benchmark."""
+    dct = dct.copy()
+
+    if merge_list_maps and is_dict_like_list(dct) and is_dict_like_list(merge_dct):
+        as_dict = legacy_deep_merge(
+            {item['name']: item for item in dct},
+            {item['name']: item for item in merge_dct},
+            add_keys=add_keys,
+            merge_list_maps=merge_list_maps
+        )
+        return list(as_dict.values())
+
+    if not add_keys:
+        merge_dct = {
+            k: merge_dct[k]
+            for k in set(dct).intersection(set(merge_dct))
+        }
+
+    for k, v in merge_dct.items():
+        if (k in dct and isinstance(dct[k], dict)
+                and isinstance(merge_dct[k], collections.abc.Mapping)):
+            dct[k] = legacy_deep_merge(dct[k], merge_dct[k], add_keys=add_keys)
+        elif merge_list_maps and is_dict_like_list(merge_dct[k]) and (is_dict_like_list(dct[k]) or k not in dict):
+            dct[k] = legacy_deep_merge(dct[k], merge_dct[k], add_keys=add_keys)
+        else:
+            dct[k] = merge_dct[k]
+
+    return dct
+
+
+def make_container(i):
+    return {
+        'name': f'container-{i}',
+        'image': f'registry.example.com/app/container-{i}:latest',
+        'memoryReservation': 128,
+        'essential': i == 0,
+        'portMappings': [{'containerPort': 8000 + i, 'protocol': 'tcp'}],
+        'environment': [{'name': f'VAR_{j}', 'value': f'value-{i}-{j}'} for j in range(30)],
+        'logConfiguration': {
+            'logDriver': 'awslogs',
+            'options': {'awslogs-group': '/example/app', 'awslogs-stream-prefix': f'container-{i}'},
+        },
+    }
+
+
+def make_config(containers=200, environments=5):
+    """Synthetic `aws_ecs`-like plugin config with per-environment overrides."""
+    config = {
+        'cluster': 'example',
+        'task_definitions': {
+            f'service-{t}': {
+                'family': f'service-{t}',
+                'containers': {f'container-{i}': make_container(i) for i in range(containers // 4)},
+            }
+            for t in range(4)
+        },
+        'services': {f'service-{t}': {'desiredCount': 1, 'tags': [f'tag-{k}' for k in range(20)]} for t in range(4)},
+    }
+
+    config['__environments__'] = {
+        f'env-{e}': {
+            'cluster': f'example-{e}',
+            'task_definitions': {
+                'service-0': {
+                    'containers': {
+                        'container-0': {
+                            'memoryReservation': 256,
+                            'environment': [
+                                {'name': 'VAR_0', 'value': f'override-{e}'},
+                                {'name': 'EXTRA', 'value': 'extra'},
+                            ],
+                        },
+                    },
+                },
+            },
+            'services': {'service-1': {'desiredCount': e + 2}},
+        }
+        for e in range(environments)
+    }
+
+    return config
+
+
+def best_time(func, number=3, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+class MergeBenchmarkTestCase(TestCase):
+    def setUp(self):
+        self.config = make_config()
+        self.overrides = [self.config['__environments__'][name] for name in sorted(self.config['__environments__'])]
+
+    def test_matches_legacy_results(self):
+        for overrides in self.overrides:
+            assert deep_merge(self.config, overrides) == legacy_deep_merge(self.config, overrides)
+            assert deep_merge(self.config, overrides, add_keys=False) == \
+                legacy_deep_merge(self.config, overrides, add_keys=False)
+
+    def test_does_not_modify_arguments(self):
+        original = copy.deepcopy(self.config)
+
+        for overrides in self.overrides:
+            deep_merge(self.config, overrides)
+
+        assert self.config == original
+
+    def test_shares_unchanged_subtrees(self):
+        merged = deep_merge(self.config, self.overrides[0])
+
+        assert merged is not self.config
+        assert merged['task_definitions']['service-1'] is self.config['task_definitions']['service-1']
+        assert merged['task_definitions']['service-0'] is not self.config['task_definitions']['service-0']
+
+    @skipUnless(RUN_BENCHMARKS, 'set CHOPS_BENCHMARKS=1 to run benchmarks')
+    def test_is_faster_than_legacy(self):
+        def merge_all(merge):
+            return lambda: [merge(self.config, overrides) for overrides in self.overrides]
+
+        legacy = best_time(merge_all(legacy_deep_merge))
+        current = best_time(merge_all(deep_merge))
+
+        print(f'\ndeep_merge: legacy {legacy * 1000:.2f}ms, current {current * 1000:.2f}ms '
+              f'({legacy / current:.1f}x)')
+        assert current < legacy, f'deep_merge took {current:.4f}s while legacy one took {legacy:.4f}s'
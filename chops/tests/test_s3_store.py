@@ -0,0 +1,139 @@
+import hashlib
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+from botocore.exceptions import ClientError
+
+from chops.store import create_store
+from chops.store.s3_store import S3Store
+
+
+class FakeS3Client(object):
+    """
+    In-memory stand-in for S3 supporting conditional requests.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.requests = []
+
+    @staticmethod
+    def error(code, operation):
+        return ClientError({'Error': {'Code': code}}, operation)
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.requests.append(('get_object', Key))
+        if (Bucket, Key) not in self.objects:
+            raise self.error('NoSuchKey', 'GetObject')
+
+        body, etag = self.objects[(Bucket, Key)]
+        if IfNoneMatch == etag:
+            raise self.error('304', 'GetObject')
+
+        return {'Body': io.BytesIO(body), 'ETag': etag}
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None):
+        self.requests.append(('put_object', Key))
+        current = self.objects.get((Bucket, Key))
+
+        if IfNoneMatch == '*' and current is not None:
+            raise self.error('PreconditionFailed', 'PutObject')
+        if IfMatch is not None and (current is None or current[1] != IfMatch):
+            raise self.error('PreconditionFailed', 'PutObject')
+
+        etag = '"{}"'.format(hashlib.md5(Body).hexdigest())
+        self.objects[(Bucket, Key)] = (Body, etag)
+        return {'ETag': etag}
+
+
+class S3StoreTestCase(TestCase):
+    def setUp(self):
+        self.build_dir = tempfile.TemporaryDirectory()
+        self.client = FakeS3Client()
+
+    def tearDown(self):
+        self.build_dir.cleanup()
+
+    def make_store(self, runner='runner', cache_ttl=0):
+        return S3Store(
+            'bucket', os.path.join(self.build_dir.name, runner, 'chops_store.s3.yml'),
+            lambda: self.client, cache_ttl=cache_ttl,
+        )
+
+    def test_shares_state_between_runners(self):
+        store = self.make_store('first')
+        store.init('installed_plugins', [])
+        store.include('installed_plugins', 'aws')
+        store.set('aws_ebt.app_bucket', 'bucket')
+
+        other = self.make_store('second')
+        assert other.get('installed_plugins') == ['aws']
+        assert other.get('aws_ebt.app_bucket') == 'bucket'
+
+    def test_replays_changes_on_concurrent_update(self):
+        first = self.make_store('first')
+        second = self.make_store('second', cache_ttl=3600)
+        first.init('installed_plugins', [])
+        second.get('installed_plugins')
+
+        first.include('installed_plugins', 'aws')
+        with second.batch():
+            second.include('installed_plugins', 'aws_ecs')
+            second.set('aws_ebt.app_bucket', 'bucket')
+
+        restored = self.make_store('third')
+        assert restored.get('installed_plugins') == ['aws', 'aws_ecs']
+        assert restored.get('aws_ebt.app_bucket') == 'bucket'
+
+    def test_replays_init_only_if_path_is_missing(self):
+        first = self.make_store('first')
+        second = self.make_store('second', cache_ttl=3600)
+        second.get('installed_plugins')
+
+        first.init('installed_plugins', [])
+        first.include('installed_plugins', 'aws')
+        # Second runner does not see the path yet, its init conflicts with the first one
+        second.init('installed_plugins', [])
+
+        assert second.get('installed_plugins') == ['aws']
+        assert self.make_store('third').get('installed_plugins') == ['aws']
+
+    def test_batch_writes_once(self):
+        store = self.make_store()
+        with store.batch():
+            for name in ['aws', 'aws_ecs', 'aws_ecr']:
+                store.include('installed_plugins', name)
+
+        assert [r for r in self.client.requests if r[0] == 'put_object'] == [('put_object', 'chops/chops_store.yml')]
+
+    def test_reads_through_local_cache(self):
+        self.make_store('first').set('installed_plugins', ['aws'])
+
+        store = self.make_store('second', cache_ttl=3600)
+        assert store.get('installed_plugins') == ['aws']
+
+        self.client.requests = []
+        cached = self.make_store('second', cache_ttl=3600)
+        assert cached.get('installed_plugins') == ['aws']
+        assert self.client.requests == []
+
+        # Stale cache is revalidated without downloading unchanged store
+        revalidated = self.make_store('second', cache_ttl=0)
+        revalidated.refresh()
+        assert revalidated.get('installed_plugins') == ['aws']
+        assert len(self.client.requests) == 2
+
+    def test_created_from_settings(self):
+        config = {
+            'build_path': self.build_dir.name,
+            'store': {'backend': 's3'},
+            'aws': {'profile': 'default', 'project_name': 'example'},
+            'aws_envs': {'environments': {'prod': {}}, 'default': 'prod'},
+            'aws_s3': {'namespace': 'example'},
+        }
+
+        store = create_store(config)
+        assert isinstance(store, S3Store)
+        assert store.bucket == 'example-prod'
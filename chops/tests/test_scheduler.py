@@ -0,0 +1,138 @@
+import threading
+import time
+from unittest import TestCase
+
+from invoke import Call, Collection, Context, task
+
+from chops.scheduler import ChopsExecutor, TaskGraph
+
+
+class TaskGraphTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def make_task(self, name, *pre, post=None, delay=0.0):
+        def body(ctx, *args, **kwargs):
+            time.sleep(delay)
+            with self.lock:
+                self.calls.append((name, args, kwargs))
+            return name
+
+        body.__name__ = name
+        return task(body, pre=list(pre), post=post or [])
+
+    def run_graph(self, *calls, jobs=1, inherit_arguments=False):
+        graph = TaskGraph(inherit_arguments=inherit_arguments)
+        previous = []
+        for call in calls:
+            previous = graph.add(call, after=previous)
+        return graph.run(lambda call: call.task(Context(), *call.args, **call.kwargs), jobs=jobs)
+
+    def test_runs_shared_pre_tasks_once(self):
+        login = self.make_task('login')
+        tag = self.make_task('tag', login)
+        push = self.make_task('push', login)
+        publish = self.make_task('publish', tag, push)
+
+        self.run_graph(Call(publish))
+
+        assert [name for name, _, _ in self.calls] == ['login', 'tag', 'push', 'publish']
+
+    def test_keeps_order_of_sequential_pre_tasks(self):
+        first = self.make_task('first', delay=0.05)
+        second = self.make_task('second')
+        main = self.make_task('main', first, second, post=[self.make_task('cleanup')])
+
+        self.run_graph(Call(main), jobs=4)
+
+        assert [name for name, _, _ in self.calls] == ['first', 'second', 'main', 'cleanup']
+
+    def test_runs_parallel_pre_tasks_concurrently(self):
+        pre_tasks = [self.make_task(f'describe_{i}', delay=0.2) for i in range(4)]
+        describe = self.make_task('describe', *pre_tasks)
+        describe.parallel = True
+
+        started = time.time()
+        self.run_graph(Call(describe), jobs=4)
+        elapsed = time.time() - started
+
+        assert elapsed < 0.6, elapsed
+        assert self.calls[-1][0] == 'describe'
+
+    def test_runs_grouped_pre_tasks_concurrently(self):
+        target_groups = self.make_task('target_groups', delay=0.2)
+        balancer = self.make_task('balancer', delay=0.2)
+        listeners = self.make_task('listeners')
+        create = self.make_task('create', target_groups, balancer, listeners)
+        create.parallel = [(target_groups, balancer)]
+
+        started = time.time()
+        self.run_graph(Call(create), jobs=4)
+        elapsed = time.time() - started
+
+        assert elapsed < 0.35, elapsed
+        assert [name for name, _, _ in self.calls[-2:]] == ['listeners', 'create']
+
+    def test_runs_pre_tasks_after_preceding_calls(self):
+        delete = self.make_task('delete', delay=0.1)
+        create = self.make_task('create', self.make_task('create_balancer'))
+
+        self.run_graph(Call(delete), Call(create), jobs=4)
+
+        assert [name for name, _, _ in self.calls] == ['delete', 'create_balancer', 'create']
+
+    def test_calls_with_different_arguments_are_distinct(self):
+        show = self.make_task('show')
+
+        self.run_graph(Call(show, args=(1,)), Call(show, args=(2,)), Call(show, args=(1,)))
+
+        assert self.calls == [('show', (1,), {}), ('show', (2,), {})]
+
+    def test_inherits_arguments(self):
+        pre = self.make_task('pre')
+        main = self.make_task('main', pre)
+
+        self.run_graph(Call(main, kwargs={'env': 'prod'}), inherit_arguments=True)
+
+        assert self.calls == [('pre', (), {'env': 'prod'}), ('main', (), {'env': 'prod'})]
+
+
+class ChopsExecutorTestCase(TestCase):
+    def test_executes_tasks_in_requested_order(self):
+        calls = []
+
+        @task
+        def login(ctx):
+            calls.append('login')
+
+        @task(login)
+        def pull(ctx):
+            calls.append('pull')
+
+        @task(login)
+        def push(ctx):
+            calls.append('push')
+
+        ns = Collection(login, pull, push)
+        results = ChopsExecutor(ns).execute('push', 'pull')
+
+        assert calls == ['login', 'push', 'pull']
+        assert set(results.keys()) == {login, pull, push}
+
+    def test_honours_dedupe_config(self):
+        calls = []
+
+        @task
+        def login(ctx):
+            calls.append('login')
+
+        @task(login)
+        def pull(ctx):
+            calls.append('pull')
+
+        ns = Collection(login, pull)
+        ns.configure({'tasks': {'dedupe': False}})
+        ChopsExecutor(ns).execute('pull', 'pull')
+
+        assert calls == ['login', 'pull', 'login', 'pull']
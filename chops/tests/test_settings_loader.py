@@ -0,0 +1,134 @@
+import os
+import sys
+import tempfile
+import textwrap
+from unittest import TestCase
+
+from chops import utils
+from chops.settings_loader import SettingsSnapshot, execute_chops_settings
+
+
+SETTINGS = textwrap.dedent("""
+    import os
+
+    SETTINGS = dict()
+    SETTINGS['project_name'] = os.getenv('CHOPS_TEST_PROJECT_NAME', 'default')
+    SETTINGS['aws_ecs'] = {
+        'services': {'Web': {'tasks_count': 1}},
+        '__environments__': {
+            'prod': {'services': {'Web': {'tasks_count': 3}}},
+        },
+    }
+""")
+
+
+class SettingsSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.project_dir = tempfile.TemporaryDirectory()
+        self.settings_path = os.path.join(self.project_dir.name, utils.CHOPS_SETTINGS_FILE)
+        self.dotenv_path = os.path.join(self.project_dir.name, '.env')
+        with open(self.settings_path, 'w') as f:
+            f.write(SETTINGS)
+        os.environ['CHOPS_TEST_PROJECT_NAME'] = 'snapshot'
+
+    def tearDown(self):
+        os.environ.pop('CHOPS_TEST_PROJECT_NAME', None)
+        self.project_dir.cleanup()
+
+    def create_snapshot(self):
+        execute_chops_settings(self.settings_path, self.dotenv_path).dump()
+        return SettingsSnapshot.load(self.settings_path)
+
+    def test_restores_settings_and_env_configs(self):
+        snapshot = self.create_snapshot()
+
+        assert snapshot.is_fresh()
+        assert snapshot.settings['project_name'] == 'snapshot'
+        assert snapshot.get_env_config('aws_ecs', 'prod')['services']['Web']['tasks_count'] == 3
+        assert '__environments__' not in snapshot.get_env_config('aws_ecs', 'prod')
+        assert snapshot.get_env_config('aws_ecs', 'stage') is None
+
+    def test_invalidated_by_referenced_env_vars(self):
+        snapshot = self.create_snapshot()
+
+        os.environ['CHOPS_TEST_PROJECT_NAME'] = 'changed'
+        assert not snapshot.is_fresh()
+
+    def test_invalidated_by_settings_and_dotenv_changes(self):
+        snapshot = self.create_snapshot()
+
+        with open(self.dotenv_path, 'w') as f:
+            f.write('APP_ENV=prod\n')
+        assert not snapshot.is_fresh()
+
+        snapshot = self.create_snapshot()
+        with open(self.settings_path, 'a') as f:
+            f.write('\nSETTINGS["extra"] = True\n')
+        assert not snapshot.is_fresh()
+
+    def test_survives_touch_without_changes(self):
+        snapshot = self.create_snapshot()
+
+        stat = os.stat(self.settings_path)
+        os.utime(self.settings_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert snapshot.is_fresh()
+
+    def write_settings(self, settings):
+        with open(self.settings_path, 'w') as f:
+            f.write(textwrap.dedent(settings))
+
+    def test_invalidated_by_imported_project_modules(self):
+        with open(os.path.join(self.project_dir.name, 'chops_test_services.py'), 'w') as f:
+            f.write('SERVICES = {"Web": {"tasks_count": 1}}\n')
+        self.write_settings("""
+            from chops_test_services import SERVICES
+
+            SETTINGS = {'aws_ecs': {'services': SERVICES}}
+        """)
+        sys.path.insert(0, self.project_dir.name)
+        self.addCleanup(sys.path.remove, self.project_dir.name)
+        self.addCleanup(sys.modules.pop, 'chops_test_services', None)
+
+        snapshot = self.create_snapshot()
+        assert snapshot.is_fresh()
+
+        with open(os.path.join(self.project_dir.name, 'chops_test_services.py'), 'a') as f:
+            f.write('SERVICES["Worker"] = {"tasks_count": 1}\n')
+        assert not snapshot.is_fresh()
+
+    def test_does_not_store_settings_which_enumerate_environment(self):
+        for settings in [
+            "import os\nSETTINGS = {'vars': dict(os.environ)}\n",
+            "import os\nSETTINGS = {'name': os.environ.copy().get('CHOPS_TEST_PROJECT_NAME')}\n",
+        ]:
+            self.write_settings(settings)
+
+            assert self.create_snapshot() is None
+
+    def test_replays_settings_side_effects(self):
+        self.write_settings("""
+            import os
+            import sys
+
+            os.environ.setdefault('CHOPS_TEST_REGION', 'eu-west-1')
+            os.environ.pop('CHOPS_TEST_REMOVED', None)
+            sys.path.append(os.path.join(os.path.dirname(__file__), 'vendor'))
+
+            SETTINGS = {'region': os.environ['CHOPS_TEST_REGION']}
+        """)
+        vendor_path = os.path.join(self.project_dir.name, 'vendor')
+        self.addCleanup(lambda: sys.path.remove(vendor_path) if vendor_path in sys.path else None)
+        self.addCleanup(os.environ.pop, 'CHOPS_TEST_REGION', None)
+        os.environ['CHOPS_TEST_REMOVED'] = 'yes'
+
+        snapshot = self.create_snapshot()
+        os.environ.pop('CHOPS_TEST_REGION')
+        os.environ['CHOPS_TEST_REMOVED'] = 'yes'
+        sys.path.remove(vendor_path)
+
+        assert snapshot.is_fresh()
+        snapshot.apply()
+
+        assert os.environ['CHOPS_TEST_REGION'] == 'eu-west-1'
+        assert 'CHOPS_TEST_REMOVED' not in os.environ
+        assert vendor_path in sys.path
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from chops.store import YamlStore, create_store
+from chops.store.sqlite_store import SqliteStore
+
+
+class StoreTestMixin(object):
+    def setUp(self):
+        self.store_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.store_dir.cleanup()
+
+    def make_store(self):
+        raise NotImplementedError()
+
+    def test_persists_mutations(self):
+        store = self.make_store()
+        store.set('aws_ebt.app_bucket', 'bucket')
+        store.include('installed_plugins', 'aws')
+        store.include('installed_plugins', 'aws')
+        store.append('history', 1)
+
+        restored = self.make_store()
+        assert restored.get('aws_ebt.app_bucket') == 'bucket'
+        assert restored.get('installed_plugins') == ['aws']
+        assert restored.has_item('installed_plugins', 'aws')
+        assert not restored.has_item('installed_plugins', 'aws_ecs')
+        assert restored.get('history') == [1]
+
+    def test_nested_values(self):
+        store = self.make_store()
+        store.init('aws_ebt.environments', {})
+        store.set('aws_ebt.environments.prod', {'name': 'prod', 'tags': ['a', 'b']})
+        store.init('aws_ebt.environments.prod', {'name': 'ignored'})
+
+        assert store.has('aws_ebt.environments')
+        assert store.get('aws_ebt') == {'environments': {'prod': {'name': 'prod', 'tags': ['a', 'b']}}}
+        assert store.get('aws_ebt.missing.path', 'default') == 'default'
+
+        store.set('aws_ebt', 'replaced')
+        assert store.get('aws_ebt') == 'replaced'
+        assert not store.has('aws_ebt.environments')
+
+    def test_delete(self):
+        store = self.make_store()
+        store.set('aws_ebt.app_bucket', 'bucket')
+        store.set('top', 1)
+
+        store.delete('aws_ebt.app_bucket')
+        store.delete('top')
+
+        restored = self.make_store()
+        assert restored.get('aws_ebt') == {}
+        assert not restored.has('top')
+        with self.assertRaises(KeyError):
+            store.delete('missing.path')
+
+    def test_failed_batch_keeps_applied_mutations(self):
+        store = self.make_store()
+
+        with self.assertRaises(RuntimeError):
+            with store.batch():
+                store.include('installed_plugins', 'aws')
+                raise RuntimeError('Installation failed')
+
+        assert self.make_store().get('installed_plugins') == ['aws']
+
+
+class YamlStoreTestCase(StoreTestMixin, TestCase):
+    def make_store(self):
+        return YamlStore(os.path.join(self.store_dir.name, 'chops_store.yml'))
+
+    def test_batch_writes_once(self):
+        store = self.make_store()
+
+        with patch.object(store, 'dump', wraps=store.dump) as dump:
+            with store.batch():
+                for name in ['aws', 'aws_ecs', 'aws_ecr']:
+                    store.include('installed_plugins', name)
+                with store.batch():
+                    store.set('aws_ebt.app_bucket', 'bucket')
+
+                assert dump.call_count == 0
+                assert not self.make_store().has('installed_plugins')
+
+        assert dump.call_count == 1
+        assert self.make_store().get('installed_plugins') == ['aws', 'aws_ecs', 'aws_ecr']
+
+    def test_does_not_leave_temporary_files(self):
+        store = self.make_store()
+        store.set('key', 'value')
+
+        assert os.listdir(self.store_dir.name) == ['chops_store.yml']
+
+
+def include_plugins(path, worker):
+    store = SqliteStore(path)
+    for i in range(20):
+        store.include('installed_plugins', '{}-{}'.format(worker, i))
+
+
+class SqliteStoreTestCase(StoreTestMixin, TestCase):
+    def make_store(self):
+        return SqliteStore(os.path.join(self.store_dir.name, 'chops_store.sqlite3'))
+
+    def test_created_from_settings(self):
+        config = {'project_path': self.store_dir.name, 'store': {'backend': 'sqlite'}}
+        assert isinstance(create_store(config), SqliteStore)
+        assert isinstance(create_store({'project_path': self.store_dir.name}), YamlStore)
+
+    def test_migrates_yaml_store(self):
+        yaml_store = YamlStore(os.path.join(self.store_dir.name, 'chops_store.yml'))
+        yaml_store.set('installed_plugins', ['aws', 'aws_ecs'])
+        yaml_store.set('aws_ebt.app_bucket', 'bucket')
+
+        config = {'project_path': self.store_dir.name, 'store': {'backend': 'sqlite'}}
+        store = create_store(config)
+        assert store.get('installed_plugins') == ['aws', 'aws_ecs']
+        assert store.get('aws_ebt.app_bucket') == 'bucket'
+
+        store.include('installed_plugins', 'aws_ecr')
+        store.delete('aws_ebt')
+
+        # Migration happens only once
+        store = create_store(config)
+        assert store.get('installed_plugins') == ['aws', 'aws_ecs', 'aws_ecr']
+        assert not store.has('aws_ebt')
+
+    def test_concurrent_processes(self):
+        path = os.path.join(self.store_dir.name, 'chops_store.sqlite3')
+        SqliteStore(path)
+
+        processes = [multiprocessing.Process(target=include_plugins, args=(path, worker)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert len(self.make_store().get('installed_plugins')) == 80
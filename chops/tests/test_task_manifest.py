@@ -0,0 +1,99 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from invoke import Collection, task
+
+from chops.core import ChopsApplication, ChopsProgram
+from chops.task_manifest import TaskManifest, find_module_files
+
+
+@task(iterable=['env'], help={'name': 'Parameter name'})
+def put(ctx, name, value='', decrypt=True, env=None):
+    """Puts parameter."""
+
+
+@task
+def describe(ctx):
+    """Describes things."""
+
+
+def get_plugin_collection():
+    plugin_ns = Collection('example')
+    plugin_ns.add_task(put)
+    plugin_ns.add_task(describe)
+    return plugin_ns
+
+
+class TaskManifestTestCase(TestCase):
+    def setUp(self):
+        self.build_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.build_dir.name, 'manifest.json')
+
+    def tearDown(self):
+        self.build_dir.cleanup()
+
+    def test_restores_tasks(self):
+        TaskManifest(self.path, 'abc').dump([get_plugin_collection()])
+
+        ns = Collection()
+        assert TaskManifest(self.path, 'abc').register_tasks(ns)
+
+        assert sorted(ns.task_names) == ['example.describe', 'example.put']
+        stub = ns.collections['example'].tasks['put']
+        assert stub.__doc__ == 'Puts parameter.'
+        assert stub.positional == put.positional
+
+        original = {arg.name: arg for arg in put.get_arguments()}
+        restored = {arg.name: arg for arg in stub.get_arguments()}
+        assert restored.keys() == original.keys()
+        for name, arg in original.items():
+            assert restored[name].kind == arg.kind, name
+            assert restored[name].default == arg.default, name
+            assert restored[name].help == arg.help, name
+
+    def test_stub_tasks_can_not_be_executed(self):
+        TaskManifest(self.path, 'abc').dump([get_plugin_collection()])
+
+        ns = Collection()
+        TaskManifest(self.path, 'abc').register_tasks(ns)
+
+        with self.assertRaises(RuntimeError):
+            ns.collections['example'].tasks['describe'].body(None)
+
+    def test_ignores_outdated_manifest(self):
+        TaskManifest(self.path, 'abc').dump([get_plugin_collection()])
+
+        ns = Collection()
+        assert not TaskManifest(self.path, 'def').register_tasks(ns)
+        assert ns.task_names == {}
+
+    def test_finds_package_files_without_import(self):
+        files = find_module_files('chops.plugins.aws')
+        assert any(f.endswith(os.path.join('aws', 'aws_ecs.py')) for f in files)
+        assert find_module_files('chops.plugins.missing') == []
+
+
+class TaskInspectionTestCase(TestCase):
+    def make_app(self, *args):
+        @task
+        def ping(ctx, host):
+            """Pings host."""
+
+        app = ChopsApplication.__new__(ChopsApplication)
+        app.argv = ['chops'] + list(args)
+        app.plugins = {}
+        app.ns = ChopsApplication.get_root_namespace()
+        app.ns.add_collection(get_plugin_collection())
+        app.ns.add_collection(Collection('network', ping))
+        app.program = ChopsProgram(app, namespace=app.ns)
+        return app
+
+    def test_detects_core_inspection_flags(self):
+        for args in [['-l'], ['--list'], ['-h'], ['--help', 'example.put'], ['-j', '2', '--list'], ['version'], []]:
+            assert self.make_app(*args).is_task_inspection(), args
+
+    def test_ignores_task_flags(self):
+        # Task arguments may use the same short flags as core arguments, e.g. `-h` for `--host`
+        for args in [['network.ping', '-h', 'example.com'], ['-j', '2', 'example.put', '--name', 'help']]:
+            assert not self.make_app(*args).is_task_inspection(), args
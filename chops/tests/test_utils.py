@@ -1,6 +1,11 @@
 from unittest import TestCase
 
-from chops.utils import deep_merge, is_dict_like_list
+import copy
+import io
+import pickle
+import threading
+
+from chops.utils import FrozenDict, PrefixedStream, deep_merge, freeze, is_dict_like_list, overlay, topological_sort
 
 
 def in_list_map(dct, key):
@@ -203,3 +208,126 @@ class DictMergeTestCase(TestCase):
         assert not in_list_map(merged['a'], 'a')
         assert get_from_list_map(merged['a'], 'b') == 2
         assert len(merged['a']) == 1
+
+
+class TopologicalSortTestCase(TestCase):
+    def test_puts_dependencies_first(self):
+        graph = {
+            'aws_ecs': ['aws', 'aws_envs', 'aws_ecr'],
+            'aws_ecr': ['aws', 'docker'],
+            'aws_envs': ['aws', 'dotenv'],
+            'aws': [],
+            'docker': ['dotenv'],
+            'dotenv': [],
+        }
+
+        ordered = topological_sort(graph)
+
+        assert sorted(ordered) == sorted(graph.keys())
+        for node, dependencies in graph.items():
+            for dependency in dependencies:
+                assert ordered.index(dependency) < ordered.index(node), f'{dependency} should go before {node}'
+
+    def test_keeps_independent_nodes_order(self):
+        assert topological_sort({'a': [], 'c': [], 'b': []}) == ['a', 'c', 'b']
+
+    def test_detects_cycles(self):
+        with self.assertRaises(ValueError):
+            topological_sort({'a': ['b'], 'b': ['c'], 'c': ['a']})
+
+
+class FrozenConfigTestCase(TestCase):
+    def setUp(self):
+        self.config = {
+            'namespace': 'example',
+            'task_definitions': {
+                'web': {'__containers__': {'web': {'memoryReservation': 128, 'environment': [
+                    {'name': 'DEBUG', 'value': 'false'},
+                ]}}},
+                'worker': {'__containers__': {'worker': {'memoryReservation': 256}}},
+            },
+            '__environments__': {
+                'dev': {'task_definitions': {'web': {'__containers__': {'web': {'environment': [
+                    {'name': 'DEBUG', 'value': 'true'},
+                ]}}}}},
+            },
+        }
+
+    def test_freezes_nested_values(self):
+        frozen = freeze(self.config)
+
+        assert frozen == freeze(copy.deepcopy(self.config))
+        assert hash(frozen) == hash(freeze(copy.deepcopy(self.config)))
+        assert isinstance(frozen['task_definitions']['web'], FrozenDict)
+        assert isinstance(frozen['task_definitions']['web']['__containers__']['web']['environment'], tuple)
+        assert freeze(frozen) is frozen
+
+        with self.assertRaises(TypeError):
+            frozen['namespace'] = 'other'
+        with self.assertRaises(TypeError):
+            frozen['task_definitions'].pop('web')
+
+    def test_frozen_dict_can_be_pickled_and_copied(self):
+        frozen = freeze(self.config)
+
+        assert pickle.loads(pickle.dumps(frozen)) == frozen
+        assert copy.deepcopy(frozen) is frozen
+
+        mutable = frozen.copy()
+        mutable['namespace'] = 'other'
+        assert frozen['namespace'] == 'example'
+
+    def test_overlays_environment_overrides(self):
+        frozen = freeze(self.config)
+        dev = overlay(frozen, self.config['__environments__']['dev'], exclude=['__environments__'])
+
+        assert '__environments__' not in dev
+        assert dev['task_definitions']['web']['__containers__']['web']['environment'] == (
+            FrozenDict({'name': 'DEBUG', 'value': 'true'}),
+        )
+        assert dev['task_definitions']['web']['__containers__']['web']['memoryReservation'] == 128
+        # Subtrees which are not overridden are shared
+        assert dev['task_definitions']['worker'] is frozen['task_definitions']['worker']
+
+    def test_shares_values_frozen_with_the_same_memo(self):
+        memo = {}
+        frozen = freeze(self.config, memo)
+        dev = deep_merge(self.config, self.config['__environments__']['dev'])
+
+        assert freeze(self.config, memo) is frozen
+        assert freeze(dev, memo)['task_definitions']['worker'] is frozen['task_definitions']['worker']
+        assert freeze(dev, memo)['task_definitions']['web'] is not frozen['task_definitions']['web']
+        # Without memo values are copied
+        assert freeze(self.config)['task_definitions'] is not frozen['task_definitions']
+
+    def test_frozen_values_pass_botocore_validation(self):
+        from botocore.session import get_session
+        from botocore.validate import ParamValidator
+
+        shape = get_session().get_service_model('ecs').operation_model('RegisterTaskDefinition').input_shape
+        params = freeze({
+            'family': 'example-web',
+            'containerDefinitions': [{'name': 'web', 'image': 'nginx', 'environment': [
+                {'name': 'DEBUG', 'value': 'true'},
+            ]}],
+        })
+
+        report = ParamValidator().validate(params, shape)
+        assert not report.has_errors(), report.generate_report()
+
+
+class PrefixedStreamTestCase(TestCase):
+    def test_prefixes_complete_lines(self):
+        output = io.StringIO()
+        lock = threading.Lock()
+        web = PrefixedStream(output, '[web] ', lock)
+        worker = PrefixedStream(output, '[worker] ', lock)
+
+        web.write('Pushing\nLayer ')
+        worker.write('Pulling\r\n')
+        web.write('pushed\nDone')
+        web.flush()
+        assert output.getvalue() == '[web] Pushing\n[worker] Pulling\n[web] Layer pushed\n'
+
+        web.close()
+        assert output.getvalue().endswith('[web] Done\n')
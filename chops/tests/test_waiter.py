@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from chops.waiter import Waiter
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+    def __call__(self):
+        return self.now
+
+
+class WaiterTestCase(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_waiter(self, **kwargs):
+        return Waiter(sleep=self.clock.sleep, clock=self.clock, **kwargs)
+
+    def test_backs_off_exponentially(self):
+        waiter = self.make_waiter(delay=1, factor=2, max_delay=5, jitter=0)
+
+        assert [delay for _, delay in zip(range(5), waiter.delays())] == [1, 2, 4, 5, 5]
+
+    def test_randomises_delays(self):
+        waiter = self.make_waiter(delay=4, factor=1, jitter=0.5)
+
+        assert all(2 <= delay <= 4 for _, delay in zip(range(100), waiter.delays()))
+
+    def test_checks_pending_keys_in_batches(self):
+        ready_at = {'web': 3, 'worker': 10, 'missing': None}
+        checks = []
+
+        def check(keys):
+            checks.append(keys)
+            return {
+                key: False if ready_at[key] is None else (True if self.clock.now >= ready_at[key] else None)
+                for key in keys
+            }
+
+        results = self.make_waiter(delay=1, factor=2, jitter=0).wait(check, ['web', 'worker', 'missing'])
+
+        assert results == {'web': True, 'worker': True, 'missing': False}
+        assert checks == [['web', 'worker', 'missing'], ['web', 'worker'], ['web', 'worker'], ['worker'], ['worker']]
+        assert self.clock.now == 15
+
+    def test_stops_at_deadline(self):
+        results = self.make_waiter(timeout=10, delay=3, factor=1, jitter=0).wait(lambda keys: {}, ['web'])
+
+        assert results == {'web': False}
+        assert self.clock.sleeps == [3, 3, 3, 1]
@@ -1,4 +1,5 @@
 import collections.abc
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import logging
 import os
 import uuid
@@ -10,6 +11,11 @@ TEMPLATES_PATH = os.path.join(PACKAGE_PATH, 'templates')
 
 CHOPS_SETTINGS_FILE = 'chops_settings.py'
 CHOPS_STORE_FILE = 'chops_store.yml'
+CHOPS_STORE_SQLITE_FILE = 'chops_store.sqlite3'
+CHOPS_TASK_MANIFEST_FILE = 'chops_tasks_manifest.json'
+CHOPS_SETTINGS_SNAPSHOT_FILE = '.chops_settings.snapshot'
+CHOPS_AWS_INVENTORY_FILE = 'chops_aws_inventory.yml'
+CHOPS_ECS_REVISIONS_DIR = 'chops_ecs_revisions'
 
 TEMPLATES = {
     CHOPS_SETTINGS_FILE: os.path.join(TEMPLATES_PATH, 'chops_settings_default.py'),
@@ -61,6 +67,148 @@ def get_logger(name, level=None):
     return logger
 
 
+def topological_sort(graph: dict):
+    """ Sorts graph nodes so each node goes after all of its dependencies.
+    Nodes without mutual dependencies keep their original order.
+
+    Args:
+        graph (dict): mapping of node names to iterables of their dependencies
+
+    Returns:
+        list: sorted node names
+
+    Raises:
+        ValueError: if graph has cycles
+    """
+    ordered = []
+    visited = set()
+    path = []
+
+    def visit(node):
+        if node in visited:
+            return
+        if node in path:
+            cycle = path[path.index(node):] + [node]
+            raise ValueError('Dependency cycle detected: {}.'.format(' -> '.join(str(n) for n in cycle)))
+
+        path.append(node)
+        for dependency in graph.get(node, []):
+            if dependency in graph:
+                visit(dependency)
+        path.pop()
+
+        visited.add(node)
+        ordered.append(node)
+
+    for node in graph:
+        visit(node)
+
+    return ordered
+
+
+def run_graph(graph: dict, func, max_workers=1):
+    """ Calls ``func`` for every node of the dependency graph.
+    Each node is processed after all of its dependencies. With more than one worker
+    nodes are processed concurrently as soon as their dependencies are processed.
+
+    If any call fails, no new nodes are scheduled and the exception is re-raised
+    once running calls are finished.
+
+    Args:
+        graph (dict): mapping of nodes to iterables of their dependencies
+        func (callable): function to call with each node
+        max_workers (int): maximum number of concurrent calls
+
+    Returns:
+        dict: results of ``func`` calls by node
+    """
+    ordered = topological_sort(graph)
+
+    if max_workers <= 1:
+        return {node: func(node) for node in ordered}
+
+    remaining = {node: set(dep for dep in graph[node] if dep in graph) for node in ordered}
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while remaining or running:
+            for node in [node for node, dependencies in remaining.items() if not dependencies]:
+                running[executor.submit(func, node)] = node
+                del remaining[node]
+
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                results[node] = future.result()
+                for dependencies in remaining.values():
+                    dependencies.discard(node)
+
+    return results
+
+
+def chunks(items, size):
+    """ Splits items into consecutive lists of at most ``size`` items.
+    Useful for API calls which limit the number of items per request.
+
+    Args:
+        items (Iterable): items to split
+        size (int): maximum chunk size
+
+    Returns:
+        Iterator[list]: chunks of items
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+class PrefixedStream(object):
+    """ Text stream which writes lines to the underlying stream starting them with the prefix.
+    Only complete lines are written, each write happens under the lock, so several streams which share
+    the lock (e.g. outputs of concurrent commands) could write to the same stream without mixing lines.
+
+    Call ``close`` to write the last incomplete line.
+
+    Args:
+        stream (TextIO): underlying stream
+        prefix (str): line prefix
+        lock (threading.Lock): lock shared by streams writing to the underlying stream
+    """
+
+    def __init__(self, stream, prefix, lock):
+        self.stream = stream
+        self.prefix = prefix
+        self.lock = lock
+        self._buffer = ''
+
+    def write(self, data):
+        self._buffer += data.replace('\r\n', '\n').replace('\r', '\n')
+        *lines, self._buffer = self._buffer.split('\n')
+        if lines:
+            self._write_lines(lines)
+
+    def flush(self):
+        with self.lock:
+            self.stream.flush()
+
+    def close(self):
+        if self._buffer:
+            self._write_lines([self._buffer])
+            self._buffer = ''
+
+    def _write_lines(self, lines):
+        with self.lock:
+            self.stream.write(''.join(self.prefix + line + '\n' for line in lines))
+            self.stream.flush()
+
+
 def is_dict_like_list(obj):
     """ Checks whether the passed object can be considered as a dictionary-like list.
     By the dictionary-like list we mean a list which items are {'name': ..., 'value': ...}
@@ -96,7 +244,8 @@ def deep_merge(dct: dict, merge_dct: dict, add_keys=True, merge_list_maps=True):
     Thanks to: https://gist.github.com/DomWeldon
 
     This version will return a copy of the dictionary and leave the original
-    arguments untouched.
+    arguments untouched. Nested values which are not affected by the merge
+    are shared with the arguments rather than copied, so treat them as read-only.
 
     The optional argument ``add_keys``, determines whether keys which are
     present in ``merge_dict`` but not ``dct`` should be included in the
@@ -139,30 +288,167 @@ def deep_merge(dct: dict, merge_dct: dict, add_keys=True, merge_list_maps=True):
     Returns:
         dict: updated dict
     """
-    dct = dct.copy()
-
-    if merge_list_maps and is_dict_like_list(dct) and is_dict_like_list(merge_dct):
-        as_dict = deep_merge(
-            {item['name']: item for item in dct},
-            {item['name']: item for item in merge_dct},
-            add_keys=add_keys,
-            merge_list_maps=merge_list_maps
-        )
-        return list(as_dict.values())
-
-    if not add_keys:
-        merge_dct = {
-            k: merge_dct[k]
-            for k in set(dct).intersection(set(merge_dct))
-        }
+    if merge_list_maps and _is_list_map(merge_dct) and _is_list_map(dct):
+        return _merge_list_maps(dct, merge_dct, add_keys, merge_list_maps)
+
+    merged = dct.copy()
+    _merge_into(merged, merge_dct, add_keys, merge_list_maps)
+
+    return merged
+
+
+def _is_list_map(obj):
+    """ Fast version of :func:`is_dict_like_list` which accepts only lists and tuples.
 
+    Dictionaries (even empty ones) and strings are never considered dictionary-like lists.
+    """
+    if not isinstance(obj, (list, tuple)):
+        return False
+
+    for item in obj:
+        if not isinstance(item, collections.abc.Mapping) or len(item) != 2 or 'name' not in item or 'value' not in item:
+            return False
+
+    return True
+
+
+def _merge_into(merged: dict, merge_dct, add_keys, merge_list_maps):
+    """ Merges ``merge_dct`` into the already copied ``merged`` dict. """
     for k, v in merge_dct.items():
-        if (k in dct and isinstance(dct[k], dict)
-                and isinstance(merge_dct[k], collections.abc.Mapping)):
-            dct[k] = deep_merge(dct[k], merge_dct[k], add_keys=add_keys)
-        elif merge_list_maps and is_dict_like_list(merge_dct[k]) and (is_dict_like_list(dct[k]) or k not in dict):
-            dct[k] = deep_merge(dct[k], merge_dct[k], add_keys=add_keys)
-        else:
-            dct[k] = merge_dct[k]
-
-    return dct
+        if k in merged:
+            merged[k] = _merge_values(merged[k], v, add_keys, merge_list_maps)
+        elif add_keys:
+            merged[k] = v
+
+
+def _merge_values(value, merge_value, add_keys, merge_list_maps):
+    """ Returns merged value sharing subtrees which are left unchanged. """
+    if value is merge_value:
+        return value
+
+    if isinstance(value, dict) and isinstance(merge_value, collections.abc.Mapping):
+        if not merge_value:
+            return value
+        merged = value.copy()
+        _merge_into(merged, merge_value, add_keys, merge_list_maps)
+        return merged
+
+    # Merge value is checked first since it is usually shorter than the value being overridden
+    if merge_list_maps and _is_list_map(merge_value) and _is_list_map(value):
+        return _merge_list_maps(value, merge_value, add_keys, merge_list_maps)
+
+    return merge_value
+
+
+def _merge_list_maps(items, merge_items, add_keys, merge_list_maps):
+    """ Merges dictionary-like lists by item names keeping the order of items. """
+    merged = list(items)
+    positions = {item['name']: i for i, item in enumerate(merged)}
+
+    for item in merge_items:
+        position = positions.get(item['name'])
+        if position is not None:
+            merged[position] = _merge_values(merged[position], item, add_keys, merge_list_maps)
+        elif add_keys:
+            positions[item['name']] = len(merged)
+            merged.append(item)
+
+    return merged
+
+
+class FrozenDict(dict):
+    """ Immutable and hashable dictionary.
+
+    It is still a ``dict``, so it can be passed wherever dictionaries are expected
+    (e.g. as boto3 request parameters), but any attempt to modify it raises ``TypeError``.
+    Use :meth:`copy` to get a mutable shallow copy.
+    """
+
+    __slots__ = ('_hash',)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('{} is immutable.'.format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def copy(self):
+        return dict(self)
+
+
+def freeze(obj, memo=None):
+    """ Returns immutable version of the object.
+    Mappings become :class:`FrozenDict`, lists and tuples become tuples and sets become frozensets.
+    Already frozen values are returned as is, so freezing shares them instead of copying.
+
+    Pass the same ``memo`` to freeze several trees which have common mutable values
+    (e.g. environment configs produced by :func:`deep_merge` from the same config),
+    so these values are frozen once and shared by the frozen trees.
+
+    Args:
+        obj (Any): object to freeze
+        memo (dict | None): frozen values by ids of original values
+
+    Returns:
+        Any: frozen object
+    """
+    if isinstance(obj, FrozenDict):
+        return obj
+
+    if memo is not None:
+        entry = memo.get(id(obj))
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+
+    if isinstance(obj, collections.abc.Mapping):
+        frozen = FrozenDict((k, freeze(v, memo)) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        frozen = tuple(freeze(item, memo) for item in obj)
+        if isinstance(obj, tuple) and all(a is b for a, b in zip(frozen, obj)):
+            frozen = obj
+    elif isinstance(obj, (set, frozenset)):
+        frozen = frozenset(freeze(item, memo) for item in obj)
+    else:
+        return obj
+
+    if memo is not None and frozen is not obj:
+        # Original value is kept to make sure its id is not reused
+        memo[id(obj)] = (obj, frozen)
+
+    return frozen
+
+
+def overlay(base, overrides, exclude=()):
+    """ Returns frozen ``base`` with ``overrides`` merged on top of it.
+    Only values along the overridden paths are created, the rest is shared with ``base`` if it is frozen.
+    Mutable ``base`` is frozen (copied) on every call, so freeze it once to overlay it several times.
+
+    Args:
+        base (dict): base config (frozen or not)
+        overrides (dict): overrides to apply (see :func:`deep_merge`)
+        exclude (Iterable[str]): top-level keys to drop from the result
+
+    Returns:
+        FrozenDict: frozen merged config
+    """
+    merged = deep_merge(freeze(base), overrides)
+    for key in exclude:
+        merged.pop(key, None)
+
+    return freeze(merged)
@@ -0,0 +1,102 @@
+import logging
+import random
+import time
+
+
+class Waiter(object):
+    """
+    Waits for many resources at once polling them with exponential backoff.
+
+    Resources are checked in batches by a function which receives keys of pending resources
+    and returns their states: `True` if resource is ready, `False` if it will never be ready
+    (waiting for it stops) and `None` (or no entry) if it is still pending:
+
+        ```
+        waiter = Waiter(timeout=120)
+        ready = waiter.wait(
+            lambda names: {name: is_running(name) for name in names},
+            ['web', 'worker'],
+            description='services to start',
+        )
+        ready == {'web': True, 'worker': True}
+        ```
+
+    Delays between checks grow by `factor` from `delay` up to `max_delay` and are randomised by `jitter`
+    (a fraction of the delay), so concurrent waiters do not poll in lockstep.
+    Waiting stops once all resources are settled or the `timeout` deadline is reached.
+    """
+
+    def __init__(self, timeout=180.0, delay=1.0, max_delay=15.0, factor=2.0, jitter=0.5, logger=None,
+                 sleep=time.sleep, clock=time.monotonic):
+        if logger is None:
+            logger = logging.getLogger('chops.Waiter')
+
+        self.timeout = timeout
+        self.delay = delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.logger = logger
+        self.sleep = sleep
+        self.clock = clock
+
+    @classmethod
+    def from_config(cls, config: dict, logger=None):
+        """
+        Creates waiter from config, unknown keys are ignored.
+        :param config: dict waiter config with `timeout`, `delay`, `max_delay`, `factor` and `jitter` keys
+        :param logger: Logger
+        :return: Waiter waiter
+        """
+        keys = ['timeout', 'delay', 'max_delay', 'factor', 'jitter']
+        return cls(logger=logger, **{key: config[key] for key in keys if key in config})
+
+    def delays(self):
+        """
+        Yields delays between checks.
+        :return: Iterator[float] delays in seconds
+        """
+        delay = self.delay
+        while True:
+            yield delay * (1 - self.jitter * random.random())
+            delay = min(delay * self.factor, self.max_delay)
+
+    def wait(self, check, keys, description='resources'):
+        """
+        Waits until all resources are settled.
+        :param check: callable function which accepts a list of pending keys and returns a dict of their states
+        :param keys: Iterable keys of resources to wait for
+        :param description: str description of resources for log messages
+        :return: dict whether each resource is ready by key
+        """
+        results = {}
+        pending = list(keys)
+        deadline = self.clock() + self.timeout
+        delays = self.delays()
+
+        while pending:
+            states = check(list(pending))
+            for key in list(pending):
+                if states.get(key) is not None:
+                    results[key] = bool(states[key])
+                    pending.remove(key)
+
+            if not pending:
+                break
+
+            left = deadline - self.clock()
+            if left <= 0:
+                break
+
+            delay = min(next(delays), left)
+            self.logger.info(
+                'Awaiting {count} {description}: {keys} (next check in {delay:.1f}s, {left:.0f}s left)...'.format(
+                    count=len(pending), description=description, keys=', '.join(str(key) for key in pending),
+                    delay=delay, left=left,
+                ))
+            self.sleep(delay)
+
+        for key in pending:
+            results[key] = False
+
+        return results
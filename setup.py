@@ -37,6 +37,7 @@ setup(
     license='MIT',
     packages=[
         'chops',
+        'chops.store',
         'chops.templates',
         'chops.plugins',
         'chops.plugins.aws',
@@ -46,7 +47,7 @@ setup(
     ],
     install_requires=[
         'markdown>=2.0',
-        'boto3==1.7.33',
+        'boto3==1.36.0',
         'invoke==1.0.0',
         'python-dotenv==0.7.1',
         'PyYaml==3.12',